@@ -0,0 +1,100 @@
+"""
+Acumulador numéricamente estable de los valores de una métrica
+"""
+# pylint: disable=invalid-name
+import math
+from typing import Dict
+
+
+class AcumuladorMetrica:
+    """
+    Cantidad, suma, media, mínimo, máximo y varianza de una serie de valores
+    en una sola pasada y memoria constante
+
+    La suma es compensada (Neumaier): el error de redondeo de cada adición se
+    acumula aparte y se suma al final. La media y la suma de cuadrados de las
+    desviaciones se actualizan con el algoritmo de Welford, que evita restar
+    cuadrados grandes y casi iguales. Dos acumuladores se combinan con la
+    fórmula de Chan, de modo que series parciales pueden agregarse por
+    separado.
+    """
+
+    def __init__(self):
+        """Crea un acumulador vacío"""
+        self._cantidad = 0
+        self._suma = 0.0
+        self._compensacion = 0.0
+        self._media = 0.0
+        self._m2 = 0.0
+        self._minimo = math.inf
+        self._maximo = -math.inf
+
+    def agregar(self, valor: float) -> None:
+        """
+        Acumula un valor
+
+        Args:
+            valor (float): Valor de la métrica
+        """
+        self._sumar(valor)
+        self._cantidad += 1
+        delta = valor - self._media
+        self._media += delta / self._cantidad
+        self._m2 += delta * (valor - self._media)
+        self._minimo = min(self._minimo, valor)
+        self._maximo = max(self._maximo, valor)
+
+    def _sumar(self, valor: float) -> None:
+        """Suma compensada de Neumaier"""
+        total = self._suma + valor
+        if abs(self._suma) >= abs(valor):
+            self._compensacion += (self._suma - total) + valor
+        else:
+            self._compensacion += (valor - total) + self._suma
+        self._suma = total
+
+    def combinar(self, otro: 'AcumuladorMetrica') -> None:
+        """
+        Incorpora los valores acumulados por otro acumulador
+
+        Args:
+            otro (AcumuladorMetrica): Acumulador a combinar con este
+        """
+        if not otro._cantidad:
+            return
+        if not self._cantidad:
+            self.__dict__.update(otro.__dict__)
+            return
+
+        cantidad = self._cantidad + otro._cantidad
+        delta = otro._media - self._media
+        self._m2 += otro._m2 + delta * delta * self._cantidad * otro._cantidad / cantidad
+        self._media += delta * otro._cantidad / cantidad
+        self._cantidad = cantidad
+        self._sumar(otro._suma)
+        self._compensacion += otro._compensacion
+        self._minimo = min(self._minimo, otro._minimo)
+        self._maximo = max(self._maximo, otro._maximo)
+
+    def get_cantidad(self) -> int:
+        """Obtiene la cantidad de valores acumulados"""
+        return self._cantidad
+
+    def a_dict(self) -> Dict[str, float]:
+        """
+        Obtiene los resultados de la agregación
+
+        Returns:
+            Dict[str, float]: 'cantidad', 'suma', 'media', 'minimo', 'maximo' y
+                'varianza' (poblacional); sin valores, todo es 0
+        """
+        if not self._cantidad:
+            return {'cantidad': 0, 'suma': 0.0, 'media': 0.0, 'minimo': 0.0, 'maximo': 0.0, 'varianza': 0.0}
+        return {
+            'cantidad': self._cantidad,
+            'suma': self._suma + self._compensacion,
+            'media': self._media,
+            'minimo': self._minimo,
+            'maximo': self._maximo,
+            'varianza': self._m2 / self._cantidad,
+        }
@@ -0,0 +1,113 @@
+"""
+Agregación de las métricas derivadas por tipo y por categoría de figura
+"""
+# pylint: disable=invalid-name
+from typing import Any, Dict, Iterable
+from AcumuladorMetrica import AcumuladorMetrica
+from Figura import Figura
+from PersistenciaArchivos import PersistenciaArchivos
+
+
+class AgregadorMetricas:
+    """
+    Cantidad, suma, media, mínimo, máximo y varianza de cada métrica
+    derivada, por tipo de figura y por categoría (2D/3D)
+
+    Cada grupo tiene un AcumuladorMetrica por métrica, así que la agregación
+    se hace en una pasada y en memoria proporcional a la cantidad de grupos,
+    no de figuras. Puede alimentarse con figuras o con los registros de un
+    archivo, sin cargar el repositorio.
+    """
+
+    def __init__(self):
+        """Crea un agregador vacío"""
+        # nombre del tipo en minúsculas -> {métrica: acumulador}
+        self._por_tipo: Dict[str, Dict[str, AcumuladorMetrica]] = {}
+        # categoría -> {métrica: acumulador}
+        self._por_categoria: Dict[str, Dict[str, AcumuladorMetrica]] = {}
+
+    def agregar(self, nombre: str, categoria: str, metricas: Dict[str, float]) -> None:
+        """
+        Acumula las métricas de una figura
+
+        Args:
+            nombre (str): Nombre de la figura (get_nombre())
+            categoria (str): Categoría de la figura (get_tipo())
+            metricas (Dict[str, float]): Sus métricas (obtener_metricas())
+        """
+        por_tipo = self._por_tipo.setdefault(nombre.lower(), {})
+        por_categoria = self._por_categoria.setdefault(categoria.upper(), {})
+        for metrica, valor in metricas.items():
+            por_tipo.setdefault(metrica, AcumuladorMetrica()).agregar(valor)
+            por_categoria.setdefault(metrica, AcumuladorMetrica()).agregar(valor)
+
+    def combinar(self, otro: 'AgregadorMetricas') -> None:
+        """
+        Incorpora lo agregado por otro agregador (por ejemplo, de otro archivo)
+
+        Args:
+            otro (AgregadorMetricas): Agregador a combinar con este
+        """
+        for propios, ajenos in ((self._por_tipo, otro._por_tipo), (self._por_categoria, otro._por_categoria)):
+            for clave, acumuladores in ajenos.items():
+                grupo = propios.setdefault(clave, {})
+                for metrica, acumulador in acumuladores.items():
+                    grupo.setdefault(metrica, AcumuladorMetrica()).combinar(acumulador)
+
+    def resultados(self) -> Dict[str, Dict[str, Dict[str, Dict[str, float]]]]:
+        """
+        Obtiene los resultados de la agregación
+
+        Returns:
+            Dict[str, Dict[str, Dict[str, Dict[str, float]]]]: 'por_tipo' y
+                'por_categoria', cada uno {grupo: {métrica: {'cantidad', 'suma',
+                'media', 'minimo', 'maximo', 'varianza'}}}
+        """
+        return {
+            'por_tipo': self._exportar(self._por_tipo),
+            'por_categoria': self._exportar(self._por_categoria),
+        }
+
+    @staticmethod
+    def _exportar(grupos: Dict[str, Dict[str, AcumuladorMetrica]]) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Resultados de cada acumulador de cada grupo"""
+        return {
+            clave: {metrica: acumulador.a_dict() for metrica, acumulador in sorted(acumuladores.items())}
+            for clave, acumuladores in sorted(grupos.items())
+        }
+
+    @staticmethod
+    def desde_figuras(figuras: Iterable[Figura]) -> Dict[str, Any]:
+        """
+        Agrega las métricas de una colección de figuras
+
+        Args:
+            figuras (Iterable[Figura]): Figuras a agregar (se recorren una vez)
+
+        Returns:
+            Dict[str, Any]: Resultados como en resultados()
+        """
+        agregador = AgregadorMetricas()
+        for figura in figuras:
+            agregador.agregar(figura.get_nombre(), figura.get_tipo(), figura.obtener_metricas())
+        return agregador.resultados()
+
+    @staticmethod
+    def desde_archivo(archivo: str) -> Dict[str, Any]:
+        """
+        Agrega las métricas de un repositorio guardado, leyéndolo registro a registro
+
+        Con un archivo guardado con métricas no se instancia ninguna figura.
+
+        Args:
+            archivo (str): Archivo del repositorio (o base de sus fragmentos)
+
+        Returns:
+            Dict[str, Any]: Resultados como en resultados()
+        """
+        agregador = AgregadorMetricas()
+        for datos in PersistenciaArchivos.iterar_registros_repositorio(archivo):
+            metricas = PersistenciaArchivos.metricas_de_registro(datos)
+            if metricas:
+                agregador.agregar(datos['nombre'], datos['tipo'], metricas)
+        return agregador.resultados()
@@ -0,0 +1,275 @@
+"""
+Formato binario de registros de ancho fijo para figuras
+"""
+# pylint: disable=invalid-name
+import mmap
+import os
+import struct
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, Tuple
+from RegistroFiguras import RegistroFiguras
+
+
+class ArchivoBinarioFiguras:
+    """
+    Archivo binario de figuras con registros de ancho fijo, accedido con mmap
+
+    Estructura (little-endian):
+        Cabecera (16 bytes): magia b'FIGB', versión (uint16),
+            tamaño de registro (uint16), cantidad de registros (uint64)
+        Registro v2 (25 bytes): id (int64), código de tipo (uint8),
+            dimensiones (float64 x 2, en el orden de RegistroFiguras; las
+            que el tipo no usa valen 0)
+        Registro v1 (17 bytes, solo lectura): id, código y una única dimensión
+
+    Al ser de ancho fijo, el registro N está en la posición
+    TAMANO_CABECERA + N * TAMANO_REGISTRO y se lee sin analizar el resto.
+    Cuando se escribe sobre un flujo no posicionable (por ejemplo comprimido)
+    la cantidad vale CANTIDAD_DESCONOCIDA y los registros llegan hasta el final.
+    """
+
+    MAGIA = b"FIGB"
+    VERSION = 2
+    MAXIMO_DIMENSIONES = 2
+
+    _CABECERA = struct.Struct("<4sHHQ")
+    # Versión -> estructura del registro
+    _REGISTROS = {
+        1: struct.Struct("<qBd"),
+        2: struct.Struct("<qBdd"),
+    }
+    _REGISTRO = _REGISTROS[VERSION]
+    _RELLENO = (0.0,) * MAXIMO_DIMENSIONES
+
+    TAMANO_CABECERA = _CABECERA.size
+    TAMANO_REGISTRO = _REGISTRO.size
+    CANTIDAD_DESCONOCIDA = 0xFFFFFFFFFFFFFFFF
+
+    def __init__(self, archivo: str):
+        """
+        Abre un archivo binario de figuras en modo solo lectura
+
+        Args:
+            archivo (str): Ruta del archivo binario
+
+        Raises:
+            ValueError: Si el archivo no tiene una cabecera válida
+        """
+        self._archivo = archivo
+        self._f = open(archivo, 'rb')
+        try:
+            self._mapa = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._f.close()
+            raise ValueError(f"Archivo binario vacío: {archivo}")
+
+        try:
+            self._registro, cantidad = self._leer_cabecera(self._mapa[:self.TAMANO_CABECERA])
+        except ValueError:
+            self.cerrar()
+            raise ValueError(f"Cabecera de archivo binario no válida: {archivo}")
+
+        if cantidad == self.CANTIDAD_DESCONOCIDA:
+            cantidad = (len(self._mapa) - self.TAMANO_CABECERA) // self._registro.size
+
+        self._cantidad = cantidad
+
+    @classmethod
+    def _leer_cabecera(cls, cabecera: bytes) -> Tuple[struct.Struct, int]:
+        """
+        Valida una cabecera y obtiene la estructura de registro de su versión
+
+        Args:
+            cabecera (bytes): Primeros TAMANO_CABECERA bytes del archivo
+
+        Returns:
+            Tuple[struct.Struct, int]: Estructura del registro y cantidad declarada
+
+        Raises:
+            ValueError: Si la cabecera no es válida
+        """
+        if len(cabecera) < cls.TAMANO_CABECERA:
+            raise ValueError("Cabecera de archivo binario incompleta")
+
+        magia, version, tamano_registro, cantidad = cls._CABECERA.unpack(cabecera)
+        registro = cls._REGISTROS.get(version)
+        if magia != cls.MAGIA or registro is None or tamano_registro != registro.size:
+            raise ValueError("Cabecera de archivo binario no válida")
+
+        return registro, cantidad
+
+    def __enter__(self) -> 'ArchivoBinarioFiguras':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.cerrar()
+
+    def __len__(self) -> int:
+        return self._cantidad
+
+    def cerrar(self) -> None:
+        """Libera el mapeo de memoria y cierra el archivo"""
+        self._mapa.close()
+        self._f.close()
+
+    def leer_registro(self, posicion: int) -> Dict[str, Any]:
+        """
+        Lee el registro en una posición sin recorrer los anteriores
+
+        Args:
+            posicion (int): Posición del registro (base 0)
+
+        Returns:
+            Dict[str, Any]: Datos de la figura
+
+        Raises:
+            IndexError: Si la posición está fuera de rango
+        """
+        if not 0 <= posicion < self._cantidad:
+            raise IndexError(f"Posición fuera de rango: {posicion}")
+
+        desplazamiento = self.TAMANO_CABECERA + posicion * self._registro.size
+        return self._registro_a_dict(*self._registro.unpack_from(self._mapa, desplazamiento))
+
+    def iterar_registros(self) -> Iterator[Dict[str, Any]]:
+        """
+        Recorre todos los registros en orden
+
+        Yields:
+            Dict[str, Any]: Datos de cada figura
+        """
+        fin = self.TAMANO_CABECERA + self._cantidad * self._registro.size
+        with memoryview(self._mapa) as vista:
+            for registro in self._registro.iter_unpack(vista[self.TAMANO_CABECERA:fin]):
+                yield self._registro_a_dict(*registro)
+
+    @classmethod
+    def iterar_flujo(cls, f: BinaryIO) -> Iterator[Dict[str, Any]]:
+        """
+        Recorre los registros leyendo secuencialmente de un flujo, sin mmap
+
+        Args:
+            f (BinaryIO): Flujo binario posicionado al inicio del archivo
+
+        Yields:
+            Dict[str, Any]: Datos de cada figura
+
+        Raises:
+            ValueError: Si la cabecera no es válida
+        """
+        estructura, cantidad = cls._leer_cabecera(f.read(cls.TAMANO_CABECERA))
+
+        registros_por_bloque = 4096
+        while cantidad:
+            pedidos = min(cantidad, registros_por_bloque)
+            bloque = f.read(pedidos * estructura.size)
+            completos = len(bloque) // estructura.size
+            for registro in estructura.iter_unpack(bloque[:completos * estructura.size]):
+                yield cls._registro_a_dict(*registro)
+            if completos < pedidos:
+                return
+            if cantidad != cls.CANTIDAD_DESCONOCIDA:
+                cantidad -= completos
+
+    @classmethod
+    def leer_registro_de_flujo(cls, f: BinaryIO, posicion: int) -> Dict[str, Any]:
+        """
+        Lee el registro en una posición de un flujo posicionable, sin mmap
+
+        Args:
+            f (BinaryIO): Flujo binario del archivo
+            posicion (int): Posición del registro (base 0)
+
+        Returns:
+            Dict[str, Any]: Datos de la figura
+        """
+        f.seek(0)
+        estructura, _ = cls._leer_cabecera(f.read(cls.TAMANO_CABECERA))
+        f.seek(cls.TAMANO_CABECERA + posicion * estructura.size)
+        return cls._registro_a_dict(*estructura.unpack(f.read(estructura.size)))
+
+    @classmethod
+    def _registro_a_dict(cls, id_figura: int, codigo: int, *valores: float) -> Dict[str, Any]:
+        """Convierte un registro desempaquetado al diccionario usado en JSON"""
+        tipo = RegistroFiguras.obtener_por_codigo(codigo)
+        if tipo is None:
+            raise ValueError(f"Código de tipo desconocido: {codigo}")
+
+        datos = {'id': id_figura, 'nombre': tipo.get_nombre(), 'tipo': tipo.get_categoria()}
+        datos.update(zip(tipo.get_dimensiones(), valores))
+        return datos
+
+    @classmethod
+    def _dict_a_registro(cls, datos: Dict[str, Any]) -> bytes:
+        """Empaqueta el diccionario de una figura en un registro binario"""
+        tipo = RegistroFiguras.obtener(datos['nombre'])
+        if tipo is None:
+            raise ValueError(f"Tipo de figura sin código binario: {datos['nombre']}")
+
+        valores = tuple(datos[dimension] for dimension in tipo.get_dimensiones())
+        if len(valores) > cls.MAXIMO_DIMENSIONES:
+            raise ValueError(f"{tipo.get_nombre()} tiene más dimensiones de las que admite el formato")
+
+        relleno = cls._RELLENO[:cls.MAXIMO_DIMENSIONES - len(valores)]
+        return cls._REGISTRO.pack(datos['id'], tipo.get_codigo(), *valores, *relleno)
+
+    @classmethod
+    def escribir(cls, registros: Iterable[Dict[str, Any]], archivo: str) -> int:
+        """
+        Escribe registros en formato binario de forma secuencial
+
+        La cantidad se completa en la cabecera al terminar, por lo que los
+        registros pueden provenir de un iterador.
+
+        Args:
+            registros (Iterable[Dict[str, Any]]): Datos de las figuras
+            archivo (str): Ruta del archivo destino
+
+        Returns:
+            int: Cantidad de registros escritos
+        """
+        cantidad = 0
+        with open(archivo, 'wb') as f:
+            f.write(cls._CABECERA.pack(cls.MAGIA, cls.VERSION, cls.TAMANO_REGISTRO, 0))
+            for datos in registros:
+                f.write(cls._dict_a_registro(datos))
+                cantidad += 1
+            f.seek(0)
+            f.write(cls._CABECERA.pack(cls.MAGIA, cls.VERSION, cls.TAMANO_REGISTRO, cantidad))
+
+        return cantidad
+
+    @classmethod
+    def escribir_en_flujo(cls, registros: Iterable[Dict[str, Any]], f: BinaryIO) -> int:
+        """
+        Escribe registros en un flujo que no admite volver atrás (por ejemplo comprimido)
+
+        Args:
+            registros (Iterable[Dict[str, Any]]): Datos de las figuras
+            f (BinaryIO): Flujo binario destino
+
+        Returns:
+            int: Cantidad de registros escritos
+        """
+        f.write(cls._CABECERA.pack(cls.MAGIA, cls.VERSION, cls.TAMANO_REGISTRO, cls.CANTIDAD_DESCONOCIDA))
+        cantidad = 0
+        for datos in registros:
+            f.write(cls._dict_a_registro(datos))
+            cantidad += 1
+        return cantidad
+
+    @classmethod
+    def es_binario(cls, archivo: str) -> bool:
+        """
+        Indica si un archivo comienza con la magia del formato binario
+
+        Args:
+            archivo (str): Ruta del archivo
+
+        Returns:
+            bool: True si es un archivo binario de figuras
+        """
+        if not os.path.exists(archivo):
+            return False
+
+        with open(archivo, 'rb') as f:
+            return f.read(len(cls.MAGIA)) == cls.MAGIA
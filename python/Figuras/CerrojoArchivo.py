@@ -0,0 +1,110 @@
+"""
+Cerrojo entre procesos sobre un archivo auxiliar
+"""
+# pylint: disable=invalid-name
+import os
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: solo se coordinan los hilos del proceso
+    fcntl = None
+
+
+class CerrojoArchivo:
+    """
+    Cerrojo consultivo (fcntl.flock) para coordinar varios procesos que
+    escriben el mismo repositorio
+
+    Se toma sobre un archivo propio (<archivo>.lock) y no sobre los datos,
+    que se reemplazan con os.replace al guardar. Es reentrante dentro del
+    proceso: mientras se mantiene, volver a pedirlo no bloquea (y tampoco
+    promueve un cerrojo compartido a exclusivo). Donde no existe fcntl solo
+    excluye a los hilos del proceso.
+    """
+
+    def __init__(self, archivo_cerrojo: str):
+        """
+        Constructor del cerrojo
+
+        Args:
+            archivo_cerrojo (str): Ruta del archivo sobre el que se toma el cerrojo
+        """
+        self._archivo_cerrojo = archivo_cerrojo
+        self._cerrojo_hilos = threading.RLock()
+        self._descriptor: Optional[int] = None
+        self._profundidad = 0
+
+    def get_archivo(self) -> str:
+        """Obtiene la ruta del archivo del cerrojo"""
+        return self._archivo_cerrojo
+
+    @contextmanager
+    def exclusivo(self) -> Iterator[None]:
+        """
+        Mantiene el cerrojo exclusivo durante el bloque (un solo escritor)
+
+        Yields:
+            None
+        """
+        with self._tomar(exclusivo=True):
+            yield
+
+    @contextmanager
+    def compartido(self) -> Iterator[None]:
+        """
+        Mantiene el cerrojo compartido durante el bloque (lectores simultáneos)
+
+        Yields:
+            None
+        """
+        with self._tomar(exclusivo=False):
+            yield
+
+    @contextmanager
+    def _tomar(self, exclusivo: bool) -> Iterator[None]:
+        """
+        Toma el cerrojo del archivo, salvo que este proceso ya lo tenga
+
+        Args:
+            exclusivo (bool): Si se pide en modo exclusivo o compartido
+
+        Yields:
+            None
+        """
+        with self._cerrojo_hilos:
+            if not self._profundidad:
+                self._abrir_y_bloquear(exclusivo)
+            self._profundidad += 1
+            try:
+                yield
+            finally:
+                self._profundidad -= 1
+                if not self._profundidad:
+                    self._liberar()
+
+    def _abrir_y_bloquear(self, exclusivo: bool) -> None:
+        """Abre el archivo del cerrojo y espera hasta obtenerlo"""
+        directorio = os.path.dirname(self._archivo_cerrojo)
+        if directorio and not os.path.exists(directorio):
+            os.makedirs(directorio)
+
+        self._descriptor = os.open(self._archivo_cerrojo, os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            try:
+                fcntl.flock(self._descriptor, fcntl.LOCK_EX if exclusivo else fcntl.LOCK_SH)
+            except OSError:
+                os.close(self._descriptor)
+                self._descriptor = None
+                raise
+
+    def _liberar(self) -> None:
+        """Libera el cerrojo y cierra el archivo"""
+        if self._descriptor is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(self._descriptor, fcntl.LOCK_UN)
+        os.close(self._descriptor)
+        self._descriptor = None
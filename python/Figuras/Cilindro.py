@@ -0,0 +1,67 @@
+"""
+Clase Cilindro - Figura tridimensional
+"""
+# pylint: disable=invalid-name
+import math
+from Figura3d import Figura3d
+
+class Cilindro(Figura3d):
+    """Clase que representa un cilindro circular recto"""
+
+    def __init__(self, radio: float, altura: float, id_figura: int):
+        """
+        Constructor de la clase Cilindro
+
+        Args:
+            radio (float): Radio de la base del cilindro
+            altura (float): Altura del cilindro
+            id_figura (int): Identificador único de la figura
+
+        Raises:
+            ValueError: Si el radio o la altura son menores o iguales a cero
+        """
+        if radio <= 0 or altura <= 0:
+            raise ValueError("El radio y la altura deben ser mayores que cero")
+        super().__init__("Cilindro", id_figura)
+        self._radio = radio
+        self._altura = altura
+
+    def calcular_volumen(self) -> float:
+        """Calcula el volumen del cilindro"""
+        return math.pi * (self._radio ** 2) * self._altura
+
+    def calcular_area_superficie(self) -> float:
+        """Calcula el área de superficie del cilindro (lateral más las dos bases)"""
+        return 2 * math.pi * self._radio * (self._radio + self._altura)
+
+    def get_radio(self) -> float:
+        """Obtiene el radio del cilindro"""
+        return self._radio
+
+    def set_radio(self, radio: float) -> None:
+        """Establece el radio del cilindro"""
+        if radio <= 0:
+            raise ValueError("El radio debe ser mayor que cero")
+        anterior = self._radio
+        self._radio = radio
+        self._notificar_cambio('radio', anterior)
+
+    def get_altura(self) -> float:
+        """Obtiene la altura del cilindro"""
+        return self._altura
+
+    def set_altura(self, altura: float) -> None:
+        """Establece la altura del cilindro"""
+        if altura <= 0:
+            raise ValueError("La altura debe ser mayor que cero")
+        anterior = self._altura
+        self._altura = altura
+        self._notificar_cambio('altura', anterior)
+
+    def __str__(self) -> str:
+        """Representación en cadena del cilindro"""
+        return f"Cilindro(id={self.get_id()}, radio={self._radio:.2f}, altura={self._altura:.2f})"
+
+    def __repr__(self) -> str:
+        """Representación técnica del cilindro"""
+        return f"Cilindro(radio={self._radio}, altura={self._altura}, id_figura={self.get_id()})"
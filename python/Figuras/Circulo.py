@@ -40,7 +40,9 @@ class Circulo(Figura2d):
         """Establece el radio del círculo"""
         if radio <= 0:
             raise ValueError("El radio debe ser mayor que cero")
+        anterior = self._radio
         self._radio = radio
+        self._notificar_cambio('radio', anterior)
 
     def __str__(self) -> str:
         """Representación en cadena del círculo"""
@@ -0,0 +1,68 @@
+"""
+Clase Cono - Figura tridimensional
+"""
+# pylint: disable=invalid-name
+import math
+from Figura3d import Figura3d
+
+class Cono(Figura3d):
+    """Clase que representa un cono circular recto"""
+
+    def __init__(self, radio: float, altura: float, id_figura: int):
+        """
+        Constructor de la clase Cono
+
+        Args:
+            radio (float): Radio de la base del cono
+            altura (float): Altura del cono
+            id_figura (int): Identificador único de la figura
+
+        Raises:
+            ValueError: Si el radio o la altura son menores o iguales a cero
+        """
+        if radio <= 0 or altura <= 0:
+            raise ValueError("El radio y la altura deben ser mayores que cero")
+        super().__init__("Cono", id_figura)
+        self._radio = radio
+        self._altura = altura
+
+    def calcular_volumen(self) -> float:
+        """Calcula el volumen del cono"""
+        return math.pi * (self._radio ** 2) * self._altura / 3
+
+    def calcular_area_superficie(self) -> float:
+        """Calcula el área de superficie del cono (lateral más la base)"""
+        generatriz = math.hypot(self._radio, self._altura)
+        return math.pi * self._radio * (self._radio + generatriz)
+
+    def get_radio(self) -> float:
+        """Obtiene el radio del cono"""
+        return self._radio
+
+    def set_radio(self, radio: float) -> None:
+        """Establece el radio del cono"""
+        if radio <= 0:
+            raise ValueError("El radio debe ser mayor que cero")
+        anterior = self._radio
+        self._radio = radio
+        self._notificar_cambio('radio', anterior)
+
+    def get_altura(self) -> float:
+        """Obtiene la altura del cono"""
+        return self._altura
+
+    def set_altura(self, altura: float) -> None:
+        """Establece la altura del cono"""
+        if altura <= 0:
+            raise ValueError("La altura debe ser mayor que cero")
+        anterior = self._altura
+        self._altura = altura
+        self._notificar_cambio('altura', anterior)
+
+    def __str__(self) -> str:
+        """Representación en cadena del cono"""
+        return f"Cono(id={self.get_id()}, radio={self._radio:.2f}, altura={self._altura:.2f})"
+
+    def __repr__(self) -> str:
+        """Representación técnica del cono"""
+        return f"Cono(radio={self._radio}, altura={self._altura}, id_figura={self.get_id()})"
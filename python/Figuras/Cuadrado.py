@@ -39,7 +39,9 @@ class Cuadrado(Figura2d):
         """Establece la longitud del lado del cuadrado"""
         if lado <= 0:
             raise ValueError("El lado debe ser mayor que cero")
+        anterior = self._lado
         self._lado = lado
+        self._notificar_cambio('lado', anterior)
 
     def __str__(self) -> str:
         """Representación en cadena del cuadrado"""
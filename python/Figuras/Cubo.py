@@ -34,7 +34,9 @@ class Cubo(Figura3d):
         """Establece la longitud del lado del cubo"""
         if lado <= 0:
             raise ValueError("El lado debe ser mayor que cero")
+        anterior = self._lado
         self._lado = lado
+        self._notificar_cambio('lado', anterior)
 
     def __str__(self) -> str:
         """Representación en cadena del cubo"""
@@ -0,0 +1,176 @@
+"""
+Diario de operaciones de solo anexado para la persistencia de figuras
+"""
+# pylint: disable=invalid-name
+import json
+import os
+from typing import Any, Dict, Iterator, List, Tuple
+
+
+class DiarioFiguras:
+    """
+    Diario (write-ahead log) donde cada mutación del repositorio se anexa
+    como un registro JSON compacto por línea, en lugar de reescribir todo
+    el archivo de figuras.
+    """
+
+    OPERACION_ALTA = "alta"
+    OPERACION_BAJA = "baja"
+    OPERACION_LIMPIAR = "limpiar"
+
+    UMBRAL_COMPACTACION_DEFECTO = 1024 * 1024
+
+    def __init__(self, archivo_diario: str,
+                 umbral_compactacion: int = UMBRAL_COMPACTACION_DEFECTO,
+                 sincronizar: bool = False):
+        """
+        Constructor del diario
+
+        Args:
+            archivo_diario (str): Ruta del archivo del diario
+            umbral_compactacion (int): Tamaño en bytes a partir del cual conviene compactar
+            sincronizar (bool): Si debe forzar fsync después de cada anexado
+        """
+        self._archivo_diario = archivo_diario
+        self._umbral_compactacion = umbral_compactacion
+        self._sincronizar = sincronizar
+
+    def get_archivo(self) -> str:
+        """Obtiene la ruta del archivo del diario"""
+        return self._archivo_diario
+
+    @staticmethod
+    def registro_alta(datos_figura: Dict[str, Any]) -> Dict[str, Any]:
+        """Crea el registro de diario para almacenar una figura"""
+        return {'op': DiarioFiguras.OPERACION_ALTA, 'figura': datos_figura}
+
+    @staticmethod
+    def registro_baja(id_figura: int) -> Dict[str, Any]:
+        """Crea el registro de diario para eliminar una figura"""
+        return {'op': DiarioFiguras.OPERACION_BAJA, 'id': id_figura}
+
+    @staticmethod
+    def registro_limpiar() -> Dict[str, Any]:
+        """Crea el registro de diario para vaciar el repositorio"""
+        return {'op': DiarioFiguras.OPERACION_LIMPIAR}
+
+    def anexar(self, registros: List[Dict[str, Any]]) -> bool:
+        """
+        Anexa registros al final del diario con una sola escritura
+
+        Args:
+            registros (List[Dict[str, Any]]): Registros a anexar
+
+        Returns:
+            bool: True si se anexaron exitosamente
+        """
+        if not registros:
+            return True
+
+        try:
+            directorio = os.path.dirname(self._archivo_diario)
+            if directorio and not os.path.exists(directorio):
+                os.makedirs(directorio)
+
+            lineas = "".join(
+                json.dumps(registro, ensure_ascii=False, separators=(',', ':')) + "\n"
+                for registro in registros
+            )
+
+            with open(self._archivo_diario, 'a', encoding='utf-8') as f:
+                f.write(lineas)
+                f.flush()
+                if self._sincronizar:
+                    os.fsync(f.fileno())
+
+            return True
+
+        except Exception as e:
+            print(f"Error al anexar al diario: {e}")
+            return False
+
+    def reproducir(self) -> Iterator[Dict[str, Any]]:
+        """
+        Recorre los registros del diario en orden de escritura
+
+        Una última línea incompleta (por ejemplo tras una caída a mitad de
+        escritura) se descarta.
+
+        Yields:
+            Dict[str, Any]: Registro del diario
+        """
+        if not os.path.exists(self._archivo_diario):
+            return
+
+        with open(self._archivo_diario, 'r', encoding='utf-8') as f:
+            for linea in f:
+                linea = linea.strip()
+                if not linea:
+                    continue
+                try:
+                    yield json.loads(linea)
+                except json.JSONDecodeError:
+                    print("Registro de diario incompleto descartado")
+                    return
+
+    def leer_desde(self, posicion: int) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Lee los registros anexados a partir de una posición del diario
+
+        Solo se consumen líneas completas, de modo que un anexado en curso
+        por otro proceso se leerá entero en la siguiente llamada.
+
+        Args:
+            posicion (int): Posición en bytes desde la que leer (la devuelta
+                por la llamada anterior, o 0 para leer todo)
+
+        Returns:
+            Tuple[List[Dict[str, Any]], int]: Registros leídos y posición
+                siguiente al último registro completo
+        """
+        if not os.path.exists(self._archivo_diario):
+            return [], 0
+
+        with open(self._archivo_diario, 'rb') as f:
+            f.seek(posicion)
+            contenido = f.read()
+
+        # El último elemento es lo que sigue al último salto de línea
+        registros = []
+        for linea in contenido.split(b"\n")[:-1]:
+            if linea.strip():
+                try:
+                    registros.append(json.loads(linea))
+                except json.JSONDecodeError:
+                    print("Registro de diario incompleto descartado")
+                    break
+            posicion += len(linea) + 1
+
+        return registros, posicion
+
+    def tamano(self) -> int:
+        """
+        Obtiene el tamaño actual del diario
+
+        Returns:
+            int: Tamaño en bytes (0 si no existe)
+        """
+        try:
+            return os.path.getsize(self._archivo_diario)
+        except OSError:
+            return 0
+
+    def debe_compactar(self) -> bool:
+        """
+        Indica si el diario superó el umbral de compactación
+
+        Returns:
+            bool: True si conviene generar un nuevo snapshot
+        """
+        return self.tamano() >= self._umbral_compactacion
+
+    def truncar(self) -> None:
+        """Vacía el diario después de compactarlo en un snapshot"""
+        if os.path.exists(self._archivo_diario):
+            with open(self._archivo_diario, 'w', encoding='utf-8'):
+                pass
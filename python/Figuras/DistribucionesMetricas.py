@@ -0,0 +1,179 @@
+"""
+Distribución aproximada de cada métrica derivada por tipo de figura
+"""
+# pylint: disable=invalid-name
+from typing import Any, Dict, List, Optional, Tuple
+from SketchCuantiles import SketchCuantiles
+
+
+class DistribucionesMetricas:
+    """
+    Un SketchCuantiles por cada tipo de figura y cada métrica derivada
+
+    Percentiles e histogramas se responden sobre el sketch de un tipo, o
+    sobre la combinación de los de todos los tipos que tienen la métrica.
+    Un sketch no puede olvidar valores: para reflejar una baja o un cambio
+    se descartan los sketches del tipo afectado (quitar_tipo) y se vuelven a
+    agregar sus figuras; los demás tipos no se tocan.
+    Las distribuciones de varios archivos o repositorios se combinan en una
+    global con combinar.
+    """
+
+    VERSION = 1
+
+    def __init__(self, k: int = SketchCuantiles.K_DEFECTO):
+        """
+        Crea distribuciones vacías
+
+        Args:
+            k (int): Parámetro k de cada sketch (ver SketchCuantiles)
+        """
+        self._k = k
+        # nombre del tipo en minúsculas -> {métrica: sketch}
+        self._tipos: Dict[str, Dict[str, SketchCuantiles]] = {}
+        # métrica -> combinación de todos los tipos, hasta el próximo cambio
+        self._combinados: Dict[str, Optional[SketchCuantiles]] = {}
+
+    def agregar(self, nombre: str, metricas: Dict[str, float]) -> None:
+        """
+        Agrega las métricas de una figura
+
+        Args:
+            nombre (str): Nombre de la figura (get_nombre())
+            metricas (Dict[str, float]): Sus métricas (obtener_metricas())
+        """
+        self._combinados = {}
+        sketches = self._tipos.setdefault(nombre.lower(), {})
+        for metrica, valor in metricas.items():
+            sketch = sketches.get(metrica)
+            if sketch is None:
+                sketch = sketches[metrica] = SketchCuantiles(self._k)
+            sketch.agregar(valor)
+
+    def quitar_tipo(self, nombre: str) -> None:
+        """
+        Descarta los sketches de un tipo, para volver a agregar sus figuras
+
+        Args:
+            nombre (str): Nombre del tipo
+        """
+        if self._tipos.pop(nombre.lower(), None) is not None:
+            self._combinados = {}
+
+    def combinar(self, otras: 'DistribucionesMetricas') -> None:
+        """
+        Incorpora las distribuciones de otra colección de figuras
+
+        Args:
+            otras (DistribucionesMetricas): Distribuciones a combinar (no se modifican)
+        """
+        self._combinados = {}
+        for nombre, sketches in otras._tipos.items():
+            propios = self._tipos.setdefault(nombre, {})
+            for metrica, sketch in sketches.items():
+                propios.setdefault(metrica, SketchCuantiles(self._k)).combinar(sketch)
+
+    def sketch(self, metrica: str, nombre: Optional[str] = None) -> Optional[SketchCuantiles]:
+        """
+        Obtiene el sketch de una métrica para un tipo o para todos
+
+        Args:
+            metrica (str): 'area', 'perimetro', 'volumen' o 'area_superficie'
+            nombre (Optional[str]): Nombre del tipo, o None para combinar todos
+
+        Returns:
+            Optional[SketchCuantiles]: Sketch (no debe modificarse), o None si
+                ninguna figura tiene la métrica
+        """
+        if nombre is not None:
+            return self._tipos.get(nombre.lower(), {}).get(metrica)
+
+        if metrica not in self._combinados:
+            sketches = [sketches[metrica] for sketches in self._tipos.values() if metrica in sketches]
+            combinado = sketches[0] if len(sketches) == 1 else None
+            if len(sketches) > 1:
+                combinado = SketchCuantiles(self._k)
+                for sketch in sketches:
+                    combinado.combinar(sketch)
+            self._combinados[metrica] = combinado
+        return self._combinados[metrica]
+
+    def copiar(self) -> 'DistribucionesMetricas':
+        """
+        Obtiene una copia independiente de las distribuciones
+
+        Returns:
+            DistribucionesMetricas: Copia que no cambia al agregar figuras a estas
+        """
+        return DistribucionesMetricas.desde_dict(self.a_dict())
+
+    def percentil(self, metrica: str, percentil: float, nombre: Optional[str] = None) -> Optional[float]:
+        """
+        Estima un percentil de una métrica
+
+        Args:
+            metrica (str): 'area', 'perimetro', 'volumen' o 'area_superficie'
+            percentil (float): Entre 0 y 100 (50 es la mediana)
+            nombre (Optional[str]): Nombre del tipo, o None para todos
+
+        Returns:
+            Optional[float]: Valor estimado, o None si ninguna figura tiene la métrica
+        """
+        sketch = self.sketch(metrica, nombre)
+        return sketch.cuantil(percentil / 100) if sketch is not None else None
+
+    def histograma(self, metrica: str, intervalos: int,
+                   nombre: Optional[str] = None) -> List[Tuple[float, float, int]]:
+        """
+        Estima el histograma de una métrica en intervalos de igual ancho
+
+        Args:
+            metrica (str): 'area', 'perimetro', 'volumen' o 'area_superficie'
+            intervalos (int): Cantidad de intervalos
+            nombre (Optional[str]): Nombre del tipo, o None para todos
+
+        Returns:
+            List[Tuple[float, float, int]]: Desde, hasta y cantidad estimada de cada intervalo
+        """
+        sketch = self.sketch(metrica, nombre)
+        return sketch.histograma(intervalos) if sketch is not None else []
+
+    def a_dict(self) -> Dict[str, Any]:
+        """
+        Convierte las distribuciones a diccionario para serialización
+
+        Returns:
+            Dict[str, Any]: Versión, parámetro k y sketches por tipo y métrica
+        """
+        return {
+            'version': self.VERSION,
+            'k': self._k,
+            'tipos': {
+                nombre: {metrica: sketch.a_dict() for metrica, sketch in sketches.items()}
+                for nombre, sketches in self._tipos.items()
+            },
+        }
+
+    @classmethod
+    def desde_dict(cls, datos: Dict[str, Any]) -> 'DistribucionesMetricas':
+        """
+        Reconstruye distribuciones serializadas con a_dict
+
+        Args:
+            datos (Dict[str, Any]): Diccionario de las distribuciones
+
+        Returns:
+            DistribucionesMetricas: Distribuciones reconstruidas
+
+        Raises:
+            ValueError: Si la versión no es compatible
+        """
+        if datos.get('version') != cls.VERSION:
+            raise ValueError(f"Versión de distribuciones no soportada: {datos.get('version')}")
+
+        distribuciones = cls(datos['k'])
+        distribuciones._tipos = {
+            nombre: {metrica: SketchCuantiles.desde_dict(sketch) for metrica, sketch in sketches.items()}
+            for nombre, sketches in datos['tipos'].items()
+        }
+        return distribuciones
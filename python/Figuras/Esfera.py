@@ -35,7 +35,9 @@ class Esfera(Figura3d):
         """Establece el radio de la esfera"""
         if radio <= 0:
             raise ValueError("El radio debe ser mayor que cero")
+        anterior = self._radio
         self._radio = radio
+        self._notificar_cambio('radio', anterior)
 
     def __str__(self) -> str:
         """Representación en cadena de la esfera"""
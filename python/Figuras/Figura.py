@@ -3,10 +3,16 @@ Clase base abstracta Figura
 """
 # pylint: disable=invalid-name
 from abc import ABC
+from typing import Any, Callable, Dict, Optional
 
 class Figura(ABC):
     """Clase abstracta base para todas las figuras geométricas"""
 
+    # Métricas derivadas ya calculadas; los setters de dimensiones las descartan
+    _metricas: Optional[Dict[str, float]] = None
+    # Función a la que se avisa después de cada cambio (ver set_observador)
+    _observador: Optional[Callable[['Figura', str, Any], None]] = None
+
     def __init__(self, nombre: str, tipo: str, id_figura: int):
         """
         Constructor de la clase Figura
@@ -34,8 +40,61 @@ class Figura(ABC):
 
     def set_nombre(self, nombre: str) -> None:
         """Establece el nombre de la figura"""
+        anterior = self._nombre
         self._nombre = nombre
+        self._notificar_cambio('nombre', anterior)
 
     def set_tipo(self, tipo: str) -> None:
         """Establece el tipo de la figura"""
+        anterior = self._tipo
         self._tipo = tipo
+        self._notificar_cambio('tipo', anterior)
+
+    def set_id(self, id_figura: int) -> None:
+        """Establece el ID de la figura"""
+        self._id_figura = id_figura
+
+    def obtener_metricas(self) -> Dict[str, float]:
+        """
+        Obtiene las métricas derivadas de la figura
+
+        Se calculan la primera vez y se reutilizan mientras no cambien las
+        dimensiones.
+
+        Returns:
+            Dict[str, float]: Nombre de la métrica -> valor ('area' y
+                'perimetro' en 2D, 'volumen' y 'area_superficie' en 3D)
+        """
+        if self._metricas is None:
+            self._metricas = self._calcular_metricas()
+        return dict(self._metricas)
+
+    def _calcular_metricas(self) -> Dict[str, float]:
+        """Calcula las métricas derivadas (las subclases definen cuáles)"""
+        return {}
+
+    def set_observador(self, observador: Optional[Callable[['Figura', str, Any], None]]) -> None:
+        """
+        Establece a quién se avisa cuando cambia la figura
+
+        Después de cada set_nombre, set_tipo o cambio de dimensión el
+        observador recibe la figura, el atributo que cambió ('nombre', 'tipo'
+        o el nombre de la dimensión) y su valor anterior. No se conserva al
+        serializar la figura con pickle.
+
+        Args:
+            observador (Optional[Callable[[Figura, str, Any], None]]): Función a llamar, o None
+        """
+        self._observador = observador
+
+    def _notificar_cambio(self, atributo: str, anterior: Any) -> None:
+        """Descarta las métricas calculadas y avisa al observador"""
+        self._metricas = None
+        if self._observador is not None:
+            self._observador(self, atributo, anterior)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Estado para pickle, sin el observador"""
+        estado = self.__dict__.copy()
+        estado.pop('_observador', None)
+        return estado
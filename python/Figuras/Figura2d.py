@@ -3,6 +3,7 @@ Clase abstracta para figuras bidimensionales
 """
 # pylint: disable=invalid-name
 from abc import abstractmethod
+from typing import Dict
 from Figura import Figura
 
 class Figura2d(Figura):
@@ -25,3 +26,7 @@ class Figura2d(Figura):
     @abstractmethod
     def calcular_perimetro(self) -> float:
         """Calcula el perímetro de la figura 2D"""
+
+    def _calcular_metricas(self) -> Dict[str, float]:
+        """Calcula área y perímetro"""
+        return {'area': self.calcular_area(), 'perimetro': self.calcular_perimetro()}
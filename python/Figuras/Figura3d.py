@@ -3,6 +3,7 @@ Clase abstracta para figuras tridimensionales
 """
 # pylint: disable=invalid-name
 from abc import abstractmethod
+from typing import Dict
 from Figura import Figura
 
 class Figura3d(Figura):
@@ -22,3 +23,11 @@ class Figura3d(Figura):
     def calcular_volumen(self) -> float:
         """Calcula el volumen de la figura 3D"""
         pass
+
+    @abstractmethod
+    def calcular_area_superficie(self) -> float:
+        """Calcula el área de superficie de la figura 3D"""
+
+    def _calcular_metricas(self) -> Dict[str, float]:
+        """Calcula volumen y área de superficie"""
+        return {'volumen': self.calcular_volumen(), 'area_superficie': self.calcular_area_superficie()}
@@ -4,11 +4,8 @@ Factory para crear figuras geométricas
 # pylint: disable=invalid-name
 from typing import Union, List
 from Figura import Figura
-from Circulo import Circulo
-from Cuadrado import Cuadrado
-from Cubo import Cubo
-from Esfera import Esfera
 from GeneradorID import GeneradorID
+from RegistroFiguras import RegistroFiguras
 
 class FiguraFactory:
     """Factory para crear diferentes tipos de figuras geométricas"""
@@ -19,48 +16,30 @@ class FiguraFactory:
         Crea una figura según el tipo especificado
 
         Args:
-            tipo (str): Tipo de figura ('circulo', 'cuadrado', 'cubo', 'esfera')
-            dimensiones (Union[float, List[float]]): Dimensiones de la figura
+            tipo (str): Tipo de figura registrado ('circulo', 'cuadrado', 'cubo', 'esfera',
+                'rectangulo', 'cilindro', 'cono', ...)
+            dimensiones (Union[float, List[float]]): Dimensiones de la figura, en el orden
+                de RegistroFiguras (por ejemplo [radio, altura] para el cilindro)
 
         Returns:
             Figura: Instancia de la figura creada
 
         Raises:
-            ValueError: Si el tipo de figura no es válido
+            ValueError: Si el tipo de figura no es válido o faltan dimensiones
         """
-        tipo = tipo.lower()
         id_figura = GeneradorID.obtener_siguiente_id()
 
-        if tipo == "circulo":
-            if isinstance(dimensiones, list):
-                radio = dimensiones[0]
-            else:
-                radio = dimensiones
-            return Circulo(radio, id_figura)
-
-        elif tipo == "cuadrado":
-            if isinstance(dimensiones, list):
-                lado = dimensiones[0]
-            else:
-                lado = dimensiones
-            return Cuadrado(lado, id_figura)
-
-        elif tipo == "cubo":
-            if isinstance(dimensiones, list):
-                lado = dimensiones[0]
-            else:
-                lado = dimensiones
-            return Cubo(lado, id_figura)
-
-        elif tipo == "esfera":
-            if isinstance(dimensiones, list):
-                radio = dimensiones[0]
-            else:
-                radio = dimensiones
-            return Esfera(radio, id_figura)
+        tipo_figura = RegistroFiguras.obtener(tipo)
+        if tipo_figura is None:
+            raise ValueError(f"Tipo de figura no válido: {tipo.lower()}")
 
+        cantidad = len(tipo_figura.get_dimensiones())
+        if isinstance(dimensiones, list):
+            valores = dimensiones[:cantidad]
         else:
-            raise ValueError(f"Tipo de figura no válido: {tipo}")
+            valores = [dimensiones]
+
+        return tipo_figura.crear(valores, id_figura)
 
     @staticmethod
     def tipos_disponibles() -> List[str]:
@@ -70,4 +49,4 @@ class FiguraFactory:
         Returns:
             List[str]: Lista de tipos de figuras disponibles
         """
-        return ["circulo", "cuadrado", "cubo", "esfera"]
+        return RegistroFiguras.claves()
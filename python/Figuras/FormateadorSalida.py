@@ -4,14 +4,16 @@ Clase para formatear la salida hacia el usuario
 # pylint: disable=invalid-name
 from typing import List, Dict, Any
 from Figura import Figura
-from Figura2d import Figura2d
-from Figura3d import Figura3d
 from UnidadMedida import UnidadMedida
 from UnidadAdapter import UnidadAdapter
+from RegistroFiguras import RegistroFiguras
 
 class FormateadorSalida:
     """Clase para formatear y presentar información al usuario"""
 
+    # Exponente de la unidad de longitud -> superíndice que se le agrega
+    _SUPERINDICES = {1: "", 2: "²", 3: "³", 4: "⁴", 6: "⁶"}
+
     @staticmethod
     def formatear_menu(titulo: str, opciones: List[str], info: str = None) -> str:
         """
@@ -58,16 +60,13 @@ class FormateadorSalida:
         resultado.append(f"   Tipo: {figura.get_nombre()}")
         resultado.append(f"   Categoría: {figura.get_tipo()}")
 
-        # Mostrar dimensiones específicas
-        if hasattr(figura, 'get_radio'):
-            radio_convertido = UnidadAdapter.convertir(figura.get_radio(), UnidadMedida.METROS, unidad)
-            resultado.append(f"   Radio: {UnidadAdapter.formatear_con_unidad(radio_convertido, unidad)}")
-        elif hasattr(figura, 'get_lado'):
-            lado_convertido = UnidadAdapter.convertir(figura.get_lado(), UnidadMedida.METROS, unidad)
-            resultado.append(f"   Lado: {UnidadAdapter.formatear_con_unidad(lado_convertido, unidad)}")
+        # Mostrar dimensiones específicas según el formateador del tipo
+        tipo = RegistroFiguras.obtener_de_figura(figura)
+        if tipo is not None:
+            resultado.extend(tipo.formatear(figura, unidad))
 
         # Mostrar cálculos
-        if isinstance(figura, Figura2d):
+        if figura.get_tipo() == "2D":
             area = figura.calcular_area()
             perimetro = figura.calcular_perimetro()
 
@@ -79,7 +78,7 @@ class FormateadorSalida:
             resultado.append(f"   Área: {area_convertida:.2f} {unidad.get_simbolo()}²")
             resultado.append(f"   Perímetro: {UnidadAdapter.formatear_con_unidad(perimetro_convertido, unidad)}")
 
-        elif isinstance(figura, Figura3d):
+        elif figura.get_tipo() == "3D":
             volumen = figura.calcular_volumen()
 
             # Convertir volumen (unidad³)
@@ -88,10 +87,9 @@ class FormateadorSalida:
 
             resultado.append(f"   Volumen: {volumen_convertido:.2f} {unidad.get_simbolo()}³")
 
-            if hasattr(figura, 'calcular_area_superficie'):
-                area_superficie = figura.calcular_area_superficie()
-                area_convertida = area_superficie / (factor ** 2)
-                resultado.append(f"   Área superficie: {area_convertida:.2f} {unidad.get_simbolo()}²")
+            area_superficie = figura.calcular_area_superficie()
+            area_convertida = area_superficie / (factor ** 2)
+            resultado.append(f"   Área superficie: {area_convertida:.2f} {unidad.get_simbolo()}²")
 
         return "\n".join(resultado)
 
@@ -137,7 +135,7 @@ class FormateadorSalida:
         resultado.append("")
         resultado.append("Distribución por tipo:")
 
-        tipos = ['círculo', 'cuadrado', 'cubo', 'esfera']
+        tipos = [tipo.get_nombre().lower() for tipo in RegistroFiguras.tipos()]
         for tipo in tipos:
             cantidad = estadisticas.get(tipo, 0)
             if cantidad > 0:
@@ -146,6 +144,52 @@ class FormateadorSalida:
 
         return "\n".join(resultado)
 
+    @staticmethod
+    def formatear_agregados(agregados: Dict[str, Any], unidad: UnidadMedida) -> str:
+        """
+        Formatea la agregación de métricas por tipo y por categoría
+
+        Args:
+            agregados (Dict[str, Any]): Resultado de RepositorioFiguras.obtener_agregados
+            unidad (UnidadMedida): Unidad de medida a usar
+
+        Returns:
+            str: Agregados formateados
+        """
+        resultado = []
+        resultado.append("📊 MÉTRICAS AGREGADAS")
+        resultado.append("=" * 40)
+
+        for titulo, clave in (("Por categoría:", 'por_categoria'), ("Por tipo:", 'por_tipo')):
+            grupos = agregados.get(clave, {})
+            if not grupos:
+                continue
+            resultado.append(titulo)
+            for grupo, metricas in grupos.items():
+                # Las categorías ("2D", "3D") se muestran tal cual
+                resultado.append(f"  • {grupo.capitalize() if clave == 'por_tipo' else grupo}")
+                for metrica, valores in metricas.items():
+                    exponente = UnidadAdapter.EXPONENTES_METRICAS[metrica]
+                    simbolo = unidad.get_simbolo() + FormateadorSalida._SUPERINDICES[exponente]
+                    # La varianza está en el cuadrado de las unidades de la métrica
+                    simbolo_varianza = unidad.get_simbolo() + FormateadorSalida._SUPERINDICES[exponente * 2]
+
+                    factor = UnidadAdapter.convertir_metrica(1.0, metrica, UnidadMedida.METROS, unidad)
+
+                    resultado.append(
+                        f"      {metrica}: n={valores['cantidad']}, "
+                        f"suma={valores['suma'] * factor:.2f} {simbolo}, "
+                        f"media={valores['media'] * factor:.2f} {simbolo}, "
+                        f"mín={valores['minimo'] * factor:.2f} {simbolo}, "
+                        f"máx={valores['maximo'] * factor:.2f} {simbolo}, "
+                        f"varianza={valores['varianza'] * factor ** 2:.2f} {simbolo_varianza}"
+                    )
+
+        if len(resultado) == 2:
+            resultado.append("No hay figuras para agregar.")
+
+        return "\n".join(resultado)
+
     @staticmethod
     def mostrar_error(mensaje: str) -> str:
         """
@@ -0,0 +1,241 @@
+"""
+Formato binario de intercambio de figuras entre las implementaciones Python y Java
+"""
+# pylint: disable=invalid-name
+import struct
+import zlib
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+from RegistroFiguras import RegistroFiguras
+
+
+class FormatoIntercambio:
+    """
+    Formato de intercambio por bloques, big-endian en todos sus campos
+
+    Estructura (big-endian, el orden de DataInputStream/DataOutputStream):
+        Cabecera (8 bytes): magia b'FIGX', versión (uint16), indicadores
+            (uint16, reservados: se escriben en 0)
+        Bloques, cada uno con:
+            cantidad de registros (uint32), longitud en bytes del contenido
+            (uint32), CRC32 del contenido (uint32, el de java.util.zip.CRC32)
+            y el contenido: los registros, uno tras otro
+        Bloque final: cantidad, longitud y CRC en 0
+
+    Registro (11 + 8 x N bytes): id (int64), código de tipo (uint16),
+    cantidad de dimensiones N (uint8) y N dimensiones (float64) en el orden
+    declarado por el tipo. Códigos: 1 círculo (radio), 2 cuadrado (lado),
+    3 cubo (lado), 4 esfera (radio), 5 rectángulo (base, altura),
+    6 cilindro (radio, altura), 7 cono (radio, altura).
+
+    Como cada registro dice cuántas dimensiones tiene, un lector puede
+    saltear los tipos que no conoce. Los bloques permiten escribir sin
+    conocer el total de antemano, importar de a un bloque por vez y
+    detectar con el CRC un bloque dañado sin leer el resto.
+    """
+
+    MAGIA = b"FIGX"
+    VERSION = 1
+    TAMANO_BLOQUE_DEFECTO = 4096
+
+    _CABECERA = struct.Struct(">4sHH")
+    _BLOQUE = struct.Struct(">III")
+    _REGISTRO = struct.Struct(">qHB")
+    _DIMENSION = struct.Struct(">d")
+
+    TAMANO_CABECERA = _CABECERA.size
+
+    @classmethod
+    def escribir_en_flujo(cls, registros: Iterable[Dict[str, Any]], f: BinaryIO,
+                          tamano_bloque: int = TAMANO_BLOQUE_DEFECTO) -> int:
+        """
+        Escribe registros en un flujo, de a un bloque por vez
+
+        Args:
+            registros (Iterable[Dict[str, Any]]): Datos de las figuras
+            f (BinaryIO): Flujo binario de destino (no necesita ser posicionable)
+            tamano_bloque (int): Registros por bloque
+
+        Returns:
+            int: Cantidad de registros escritos
+        """
+        f.write(cls._CABECERA.pack(cls.MAGIA, cls.VERSION, 0))
+
+        cantidad = 0
+        contenido: List[bytes] = []
+        for datos in registros:
+            contenido.append(cls._dict_a_registro(datos))
+            if len(contenido) == tamano_bloque:
+                cls._escribir_bloque(f, contenido)
+                cantidad += len(contenido)
+                contenido = []
+
+        if contenido:
+            cls._escribir_bloque(f, contenido)
+            cantidad += len(contenido)
+        f.write(cls._BLOQUE.pack(0, 0, 0))
+
+        return cantidad
+
+    @classmethod
+    def _escribir_bloque(cls, f: BinaryIO, registros: List[bytes]) -> None:
+        """Escribe un bloque con su cabecera"""
+        contenido = b"".join(registros)
+        f.write(cls._BLOQUE.pack(len(registros), len(contenido), zlib.crc32(contenido)))
+        f.write(contenido)
+
+    @classmethod
+    def _dict_a_registro(cls, datos: Dict[str, Any]) -> bytes:
+        """Empaqueta el diccionario de una figura en un registro"""
+        tipo = RegistroFiguras.obtener(datos['nombre'])
+        if tipo is None:
+            raise ValueError(f"Tipo de figura sin código de intercambio: {datos['nombre']}")
+
+        valores = [datos[dimension] for dimension in tipo.get_dimensiones()]
+        return cls._REGISTRO.pack(datos['id'], tipo.get_codigo(), len(valores)) + b"".join(
+            cls._DIMENSION.pack(valor) for valor in valores
+        )
+
+    @classmethod
+    def _leer_cabecera(cls, f: BinaryIO) -> None:
+        """
+        Valida la cabecera al inicio del flujo
+
+        Raises:
+            ValueError: Si la magia o la versión no corresponden
+        """
+        cabecera = f.read(cls.TAMANO_CABECERA)
+        if len(cabecera) < cls.TAMANO_CABECERA:
+            raise ValueError("Cabecera de intercambio incompleta")
+        magia, version, _ = cls._CABECERA.unpack(cabecera)
+        if magia != cls.MAGIA:
+            raise ValueError("El flujo no está en formato de intercambio")
+        if version != cls.VERSION:
+            raise ValueError(f"Versión de intercambio no soportada: {version}")
+
+    @classmethod
+    def _iterar_contenidos(cls, f: BinaryIO) -> Iterator[Tuple[int, bytes]]:
+        """
+        Recorre los bloques validando su CRC
+
+        Yields:
+            Tuple[int, bytes]: Posición en el flujo del contenido y el contenido
+
+        Raises:
+            ValueError: Si un bloque está truncado o su CRC no coincide
+        """
+        cls._leer_cabecera(f)
+        posicion = cls.TAMANO_CABECERA
+
+        while True:
+            cabecera = f.read(cls._BLOQUE.size)
+            if len(cabecera) < cls._BLOQUE.size:
+                raise ValueError("Flujo de intercambio truncado: falta el bloque final")
+            cantidad, longitud, crc = cls._BLOQUE.unpack(cabecera)
+            posicion += cls._BLOQUE.size
+            if not cantidad:
+                return
+
+            contenido = f.read(longitud)
+            if len(contenido) < longitud:
+                raise ValueError("Bloque de intercambio truncado")
+            if zlib.crc32(contenido) != crc:
+                raise ValueError(f"CRC incorrecto en el bloque de intercambio en {posicion}")
+
+            yield posicion, contenido
+            posicion += longitud
+
+    @classmethod
+    def _decodificar(cls, contenido: bytes) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Decodifica los registros de un contenido, salteando los tipos desconocidos
+
+        Yields:
+            Tuple[int, Dict[str, Any]]: Posición relativa y datos de cada registro
+        """
+        posicion = 0
+        while posicion < len(contenido):
+            id_figura, codigo, cantidad = cls._REGISTRO.unpack_from(contenido, posicion)
+            inicio_registro = posicion
+            posicion += cls._REGISTRO.size
+            valores = list(struct.unpack_from(f">{cantidad}d", contenido, posicion))
+            posicion += cantidad * cls._DIMENSION.size
+
+            datos = cls._registro_a_dict(id_figura, codigo, valores)
+            if datos is not None:
+                yield inicio_registro, datos
+
+    @staticmethod
+    def _registro_a_dict(id_figura: int, codigo: int, valores: List[float]) -> Optional[Dict[str, Any]]:
+        """
+        Convierte un registro al diccionario usado en JSON
+
+        Returns:
+            Optional[Dict[str, Any]]: Datos de la figura, o None si el tipo no se conoce
+
+        Raises:
+            ValueError: Si el tipo se conoce pero no coincide la cantidad de dimensiones
+        """
+        tipo = RegistroFiguras.obtener_por_codigo(codigo)
+        if tipo is None:
+            return None
+
+        if len(valores) != len(tipo.get_dimensiones()):
+            raise ValueError(f"{tipo.get_nombre()} con {len(valores)} dimensiones en el registro {id_figura}")
+
+        datos = {'id': id_figura, 'nombre': tipo.get_nombre(), 'tipo': tipo.get_categoria()}
+        datos.update(zip(tipo.get_dimensiones(), valores))
+        return datos
+
+    @classmethod
+    def iterar_bloques(cls, f: BinaryIO) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Recorre el flujo de a un bloque por vez
+
+        Args:
+            f (BinaryIO): Flujo binario posicionado al inicio
+
+        Yields:
+            List[Dict[str, Any]]: Datos de las figuras de cada bloque
+        """
+        for _, contenido in cls._iterar_contenidos(f):
+            yield [datos for _, datos in cls._decodificar(contenido)]
+
+    @classmethod
+    def iterar_flujo(cls, f: BinaryIO) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Recorre los registros del flujo en orden
+
+        Args:
+            f (BinaryIO): Flujo binario posicionado al inicio
+
+        Yields:
+            Tuple[int, Dict[str, Any]]: Posición en el flujo y datos de cada
+                figura; la posición sirve para leer_registro_de_flujo
+        """
+        for posicion, contenido in cls._iterar_contenidos(f):
+            for relativa, datos in cls._decodificar(contenido):
+                yield posicion + relativa, datos
+
+    @classmethod
+    def leer_registro_de_flujo(cls, f: BinaryIO, posicion: int) -> Dict[str, Any]:
+        """
+        Lee un único registro a partir de su posición en un flujo posicionable
+
+        Args:
+            f (BinaryIO): Flujo binario del archivo
+            posicion (int): Posición obtenida con iterar_flujo
+
+        Returns:
+            Dict[str, Any]: Datos de la figura
+
+        Raises:
+            ValueError: Si el registro es de un tipo desconocido
+        """
+        f.seek(posicion)
+        id_figura, codigo, cantidad = cls._REGISTRO.unpack(f.read(cls._REGISTRO.size))
+        valores = list(struct.unpack(f">{cantidad}d", f.read(cantidad * cls._DIMENSION.size)))
+
+        datos = cls._registro_a_dict(id_figura, codigo, valores)
+        if datos is None:
+            raise ValueError(f"Código de tipo desconocido: {codigo}")
+        return datos
@@ -0,0 +1,237 @@
+"""
+Fusión de tres vías de archivos de figuras
+"""
+# pylint: disable=invalid-name
+import heapq
+import json
+import os
+import tempfile
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from GeneradorID import GeneradorID
+from PersistenciaArchivos import PersistenciaArchivos
+
+
+class FusionFiguras:
+    """
+    Fusiona dos copias de un repositorio que divergieron de un archivo base
+
+    Los tres archivos se recorren ordenados por ID y se combinan con un
+    merge-join, comparando en cada paso solo los registros de un ID. Cada
+    ID se clasifica como sin cambios, agregado, eliminado, modificado o en
+    conflicto (ambas copias lo cambiaron de forma distinta, o una lo
+    modificó y la otra lo eliminó); los conflictos se resuelven a favor de
+    la copia preferida. Si ambas copias agregaron figuras distintas con el
+    mismo ID, la de la derecha recibe un ID nuevo del GeneradorID.
+
+    Un archivo que no entra en un tramo en memoria se ordena por tramos
+    escritos en archivos temporales, de modo que nunca reside en memoria
+    más de un tramo por archivo.
+    """
+
+    IZQUIERDA = "izquierda"
+    DERECHA = "derecha"
+
+    SIN_CAMBIOS = "sin_cambios"
+    AGREGADA = "agregadas"
+    ELIMINADA = "eliminadas"
+    MODIFICADA = "modificadas"
+    CONFLICTO = "conflictos"
+
+    TAMANO_TRAMO_DEFECTO = 100000
+
+    @staticmethod
+    def fusionar(base: str, izquierda: str, derecha: str, destino: str,
+                 preferencia: str = IZQUIERDA, tamano_tramo: int = TAMANO_TRAMO_DEFECTO,
+                 nivel_compresion: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Fusiona dos copias de un repositorio y guarda el resultado
+
+        Args:
+            base (str): Archivo del que partieron ambas copias
+            izquierda (str): Primera copia
+            derecha (str): Segunda copia
+            destino (str): Archivo a generar (formato según su extensión)
+            preferencia (str): IZQUIERDA o DERECHA, copia que gana en los conflictos
+            tamano_tramo (int): Registros por archivo que se ordenan en memoria
+            nivel_compresion (Optional[int]): Nivel de compresión del destino
+
+        Returns:
+            Dict[str, Any]: Cantidad de IDs sin cambios, agregados, eliminados y
+                modificados, lista de IDs en conflicto, renumeraciones
+                {ID anterior: ID nuevo} y total de figuras guardadas
+
+        Raises:
+            ValueError: Si la preferencia no es válida
+        """
+        if preferencia not in (FusionFiguras.IZQUIERDA, FusionFiguras.DERECHA):
+            raise ValueError(f"Preferencia no válida: {preferencia}")
+
+        informe: Dict[str, Any] = {
+            FusionFiguras.SIN_CAMBIOS: 0,
+            FusionFiguras.AGREGADA: 0,
+            FusionFiguras.ELIMINADA: 0,
+            FusionFiguras.MODIFICADA: 0,
+            FusionFiguras.CONFLICTO: [],
+            'renumeradas': {},
+        }
+
+        informe['total'] = PersistenciaArchivos.guardar_registros(
+            FusionFiguras._fusionar_registros(base, izquierda, derecha, preferencia, tamano_tramo, informe),
+            destino, nivel_compresion
+        )
+        return informe
+
+    @staticmethod
+    def _fusionar_registros(base: str, izquierda: str, derecha: str, preferencia: str,
+                            tamano_tramo: int, informe: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Produce los registros fusionados completando el informe a medida que avanza"""
+        # Las figuras que chocan se guardan aparte: su ID nuevo debe superar a todos
+        colisiones: List[Dict[str, Any]] = []
+        id_maximo = 0
+
+        alineados = FusionFiguras._alinear(
+            FusionFiguras._iterar_ordenado(base, tamano_tramo),
+            FusionFiguras._iterar_ordenado(izquierda, tamano_tramo),
+            FusionFiguras._iterar_ordenado(derecha, tamano_tramo),
+        )
+        for id_figura, (original, propia, ajena) in alineados:
+            id_maximo = max(id_maximo, id_figura)
+            clase, elegida = FusionFiguras.clasificar(original, propia, ajena, preferencia)
+
+            if clase == FusionFiguras.CONFLICTO:
+                informe[clase].append(id_figura)
+            else:
+                informe[clase] += 1
+
+            if original is None and propia is not None and ajena is not None and propia != ajena:
+                colisiones.append(ajena)
+
+            if elegida is not None:
+                yield elegida
+
+        GeneradorID.actualizar_si_mayor(id_maximo)
+        for ajena in colisiones:
+            id_nuevo = GeneradorID.obtener_siguiente_id()
+            informe['renumeradas'][ajena['id']] = id_nuevo
+            informe[FusionFiguras.AGREGADA] += 1
+            yield dict(ajena, id=id_nuevo)
+
+    @staticmethod
+    def clasificar(original: Optional[Dict[str, Any]], propia: Optional[Dict[str, Any]],
+                   ajena: Optional[Dict[str, Any]],
+                   preferencia: str = IZQUIERDA) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """
+        Clasifica un ID según sus versiones y elige la que se conserva
+
+        Args:
+            original (Optional[Dict[str, Any]]): Registro en la base (None si no estaba)
+            propia (Optional[Dict[str, Any]]): Registro en la copia izquierda
+            ajena (Optional[Dict[str, Any]]): Registro en la copia derecha
+            preferencia (str): Copia que gana en los conflictos
+
+        Returns:
+            Tuple[str, Optional[Dict[str, Any]]]: Clasificación y registro que se
+                conserva (None si la figura queda eliminada). Dos altas distintas
+                con el mismo ID se informan como agregada: se conserva la izquierda
+                y la derecha se renumera aparte
+        """
+        if propia == ajena:
+            if propia is None:
+                return FusionFiguras.ELIMINADA, None
+            if original is None:
+                return FusionFiguras.AGREGADA, propia
+            if propia == original:
+                return FusionFiguras.SIN_CAMBIOS, propia
+            return FusionFiguras.MODIFICADA, propia
+
+        if original is None:
+            return FusionFiguras.AGREGADA, propia if propia is not None else ajena
+
+        # Si una copia no tocó la figura, vale lo que hizo la otra
+        if propia == original:
+            return (FusionFiguras.MODIFICADA if ajena is not None else FusionFiguras.ELIMINADA), ajena
+        if ajena == original:
+            return (FusionFiguras.MODIFICADA if propia is not None else FusionFiguras.ELIMINADA), propia
+
+        return FusionFiguras.CONFLICTO, propia if preferencia == FusionFiguras.IZQUIERDA else ajena
+
+    @staticmethod
+    def _alinear(*flujos: Iterator[Dict[str, Any]]) -> Iterator[Tuple[int, List[Optional[Dict[str, Any]]]]]:
+        """
+        Recorre en paralelo flujos ordenados por ID (merge-join)
+
+        Args:
+            *flujos (Iterator[Dict[str, Any]]): Registros de cada archivo, por ID creciente
+
+        Yields:
+            Tuple[int, List[Optional[Dict[str, Any]]]]: ID y el registro de cada
+                flujo con ese ID (None en los que no está)
+        """
+        actuales = [next(flujo, None) for flujo in flujos]
+        while True:
+            presentes = [actual['id'] for actual in actuales if actual is not None]
+            if not presentes:
+                return
+
+            id_figura = min(presentes)
+            fila: List[Optional[Dict[str, Any]]] = []
+            for posicion, actual in enumerate(actuales):
+                if actual is not None and actual['id'] == id_figura:
+                    fila.append(actual)
+                    actuales[posicion] = next(flujos[posicion], None)
+                else:
+                    fila.append(None)
+
+            yield id_figura, fila
+
+    @staticmethod
+    def _iterar_ordenado(archivo: str, tamano_tramo: int) -> Iterator[Dict[str, Any]]:
+        """
+        Recorre los registros de un archivo ordenados por ID
+
+        Si el archivo cabe en un tramo se ordena en memoria; si no, cada tramo
+        ordenado se escribe en un archivo temporal y los tramos se combinan
+        con heapq.merge.
+
+        Args:
+            archivo (str): Archivo de figuras (si no existe, no tiene registros)
+            tamano_tramo (int): Registros que se ordenan en memoria a la vez
+
+        Yields:
+            Dict[str, Any]: Datos de cada figura por ID creciente
+        """
+        registros = PersistenciaArchivos.iterar_registros_repositorio(archivo)
+        tramo: List[Dict[str, Any]] = []
+        for datos in registros:
+            tramo.append(datos)
+            if len(tramo) == tamano_tramo:
+                break
+        else:
+            tramo.sort(key=lambda datos: datos['id'])
+            yield from tramo
+            return
+
+        with tempfile.TemporaryDirectory(prefix="fusion_figuras_") as directorio:
+            rutas = []
+            while tramo:
+                tramo.sort(key=lambda datos: datos['id'])
+                ruta = os.path.join(directorio, f"tramo{len(rutas)}.jsonl")
+                with open(ruta, 'w', encoding='utf-8') as f:
+                    for datos in tramo:
+                        f.write(json.dumps(datos, ensure_ascii=False, separators=(',', ':')))
+                        f.write("\n")
+                rutas.append(ruta)
+
+                tramo = []
+                for datos in registros:
+                    tramo.append(datos)
+                    if len(tramo) == tamano_tramo:
+                        break
+
+            archivos = [open(ruta, 'r', encoding='utf-8') for ruta in rutas]
+            try:
+                yield from heapq.merge(*((json.loads(linea) for linea in f) for f in archivos),
+                                       key=lambda datos: datos['id'])
+            finally:
+                for f in archivos:
+                    f.close()
@@ -8,17 +8,25 @@ from UnidadMedida import UnidadMedida
 from LectorEntrada import LectorEntrada
 from FormateadorSalida import FormateadorSalida
 from FiguraFactory import FiguraFactory
+from RegistroFiguras import RegistroFiguras
 
 class Gestionar:
     """Clase principal para gestionar el sistema de figuras geométricas"""
 
-    def __init__(self):
-        """Constructor de la clase Gestionar"""
+    def __init__(self, concurrente: bool = False):
+        """
+        Constructor de la clase Gestionar
+
+        Args:
+            concurrente (bool): Si otras instancias (otros procesos) escriben el
+                mismo figuras.json; cada escritura toma entonces un cerrojo de
+                archivo e incorpora lo que ellas publicaron
+        """
         import os
         # Construir la ruta al archivo figuras.json en el directorio del módulo
         directorio_actual = os.path.dirname(__file__)
         archivo_figuras = os.path.join(directorio_actual, "figuras.json")
-        self._repositorio = RepositorioFiguras(archivo_figuras, True)
+        self._repositorio = RepositorioFiguras(archivo_figuras, True, concurrente=concurrente)
         self._adapter = UnidadAdapter()
         self._unidad_actual = UnidadMedida.METROS
         self._lector = LectorEntrada()
@@ -32,10 +40,10 @@ class Gestionar:
         while True:
             try:
                 self.mostrar_menu_principal()
-                opcion = self._lector.leer_entero("\nSeleccione una opción: ", 1, 8)
+                opcion = self._lector.leer_entero("\nSeleccione una opción: ", 1, 9)
                 self.procesar_opcion(opcion)
 
-                if opcion == 8:  # Salir
+                if opcion == 9:  # Salir
                     break
 
                 input("\nPresione Enter para continuar...")
@@ -46,6 +54,9 @@ class Gestionar:
             except Exception as e:
                 print(self._formateador.mostrar_error(f"Error inesperado: {e}"))
 
+        # Persistir lo que la política de guardado tenga pendiente
+        self._repositorio.cerrar()
+
     def mostrar_menu_principal(self) -> None:
         """Muestra el menú principal de opciones"""
         opciones = [
@@ -54,13 +65,13 @@ class Gestionar:
             "Consultar figura por ID",
             "Eliminar figura",
             "Ver estadísticas",
+            "Ver métricas agregadas",
             "Cambiar unidad de medida",
             "Limpiar repositorio",
             "Salir"
         ]
 
-        estadisticas = self._repositorio.obtener_estadisticas()
-        info = f"Figuras almacenadas: {estadisticas['total']} | Unidad: {self._unidad_actual.get_simbolo()}"
+        info = f"Figuras almacenadas: {self._repositorio.contar_figuras()} | Unidad: {self._unidad_actual.get_simbolo()}"
 
         menu = self._formateador.formatear_menu("SISTEMA DE FIGURAS GEOMÉTRICAS", opciones, info)
         print(menu)
@@ -83,10 +94,12 @@ class Gestionar:
         elif opcion == 5:
             self.mostrar_estadisticas()
         elif opcion == 6:
-            self.cambiar_unidad_medida()
+            self.mostrar_agregados()
         elif opcion == 7:
-            self.limpiar_repositorio()
+            self.cambiar_unidad_medida()
         elif opcion == 8:
+            self.limpiar_repositorio()
+        elif opcion == 9:
             print(self._formateador.mostrar_info("¡Gracias por usar el sistema!"))
 
     def crear_figura(self) -> None:
@@ -103,20 +116,18 @@ class Gestionar:
         tipo_seleccionado = tipos_disponibles[indice]
 
         try:
-            if tipo_seleccionado in ["circulo", "esfera"]:
-                radio = self._lector.leer_flotante(f"\nIngrese el radio del {tipo_seleccionado} (en {self._unidad_actual.get_simbolo()}): ", 0.001)
-                # Convertir a metros para almacenamiento interno
-                radio_metros = UnidadAdapter.convertir(radio, self._unidad_actual, UnidadMedida.METROS)
-                figura = FiguraFactory.crear_figura(tipo_seleccionado, radio_metros)
+            tipo_figura = RegistroFiguras.obtener(tipo_seleccionado)
+            if tipo_figura is None:
+                raise ValueError(f"Tipo de figura no soportado: {tipo_seleccionado}")
 
-            elif tipo_seleccionado in ["cuadrado", "cubo"]:
-                lado = self._lector.leer_flotante(f"\nIngrese el lado del {tipo_seleccionado} (en {self._unidad_actual.get_simbolo()}): ", 0.001)
+            dimensiones_metros = []
+            for dimension in tipo_figura.get_dimensiones():
+                descripcion = RegistroFiguras.describir_dimension(dimension)
+                valor = self._lector.leer_flotante(f"\nIngrese {descripcion} del {tipo_seleccionado} (en {self._unidad_actual.get_simbolo()}): ", 0.001)
                 # Convertir a metros para almacenamiento interno
-                lado_metros = UnidadAdapter.convertir(lado, self._unidad_actual, UnidadMedida.METROS)
-                figura = FiguraFactory.crear_figura(tipo_seleccionado, lado_metros)
+                dimensiones_metros.append(UnidadAdapter.convertir(valor, self._unidad_actual, UnidadMedida.METROS))
 
-            else:
-                raise ValueError(f"Tipo de figura no soportado: {tipo_seleccionado}")
+            figura = FiguraFactory.crear_figura(tipo_seleccionado, dimensiones_metros)
 
             id_figura = self._repositorio.almacenar_figura(figura)
             print(self._formateador.mostrar_exito(f"Figura creada exitosamente con ID: {id_figura}"))
@@ -195,6 +206,15 @@ class Gestionar:
         resultado = self._formateador.formatear_estadisticas(estadisticas)
         print(resultado)
 
+    def mostrar_agregados(self) -> None:
+        """Muestra las métricas agregadas por tipo y categoría (recorre todas las figuras)"""
+        print("\n" + "="*50)
+        print(" MÉTRICAS AGREGADAS")
+        print("="*50)
+
+        agregados = self._repositorio.obtener_agregados()
+        print(self._formateador.formatear_agregados(agregados, self._unidad_actual))
+
     def cambiar_unidad_medida(self) -> None:
         """Permite cambiar la unidad de medida actual"""
         print("\n" + "="*50)
@@ -222,12 +242,12 @@ class Gestionar:
         print(" LIMPIAR REPOSITORIO")
         print("="*50)
 
-        estadisticas = self._repositorio.obtener_estadisticas()
-        if estadisticas['total'] == 0:
+        total = self._repositorio.contar_figuras()
+        if total == 0:
             print(self._formateador.mostrar_info("El repositorio ya está vacío."))
             return
 
-        print(f"Se eliminarán {estadisticas['total']} figuras del repositorio.")
+        print(f"Se eliminarán {total} figuras del repositorio.")
 
         if self._lector.confirmar_accion("¿Está seguro de que desea eliminar todas las figuras?"):
             self._repositorio.limpiar_repositorio()
@@ -0,0 +1,271 @@
+"""
+Historial de versiones de las figuras con deltas y fotogramas clave
+"""
+# pylint: disable=invalid-name
+import bisect
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from DiarioFiguras import DiarioFiguras
+
+
+class HistorialFiguras:
+    """
+    Guarda cada versión de cada figura para poder leerla más tarde
+
+    Cada versión se guarda como un delta respecto de la anterior (solo las
+    claves que cambiaron), salvo cada `intervalo_claves` versiones, que se
+    guarda completa (fotograma clave). Reconstruir una versión parte del
+    último fotograma clave y aplica a lo sumo intervalo_claves - 1 deltas.
+    Eliminar una figura agrega una versión que la marca como eliminada.
+
+    Las versiones se anexan a un archivo propio (una línea JSON por versión)
+    y se releen al abrir el historial. En memoria se conservan los deltas y
+    el estado actual de cada figura, no cada estado histórico completo.
+    """
+
+    INTERVALO_CLAVES_DEFECTO = 16
+
+    _CLAVE = "clave"
+    _DELTA = "delta"
+    _BAJA = "baja"
+
+    def __init__(self, archivo_historial: str, intervalo_claves: int = INTERVALO_CLAVES_DEFECTO):
+        """
+        Abre el historial, cargando las versiones ya guardadas
+
+        Args:
+            archivo_historial (str): Ruta del archivo del historial
+            intervalo_claves (int): Cada cuántas versiones se guarda una completa
+
+        Raises:
+            ValueError: Si el intervalo no es positivo
+        """
+        if intervalo_claves < 1:
+            raise ValueError("El intervalo de fotogramas clave debe ser al menos 1")
+
+        self._archivo_historial = archivo_historial
+        self._intervalo_claves = intervalo_claves
+        self._cerrojo = threading.RLock()
+        # ID -> versiones (tipo, contenido) y sus marcas de tiempo, en orden
+        self._versiones: Dict[int, List[Tuple[str, Any]]] = {}
+        self._tiempos: Dict[int, List[float]] = {}
+        # ID -> estado de la última versión (None si está eliminada)
+        self._actuales: Dict[int, Optional[Dict[str, Any]]] = {}
+        self._cargar()
+
+    def get_archivo(self) -> str:
+        """Obtiene la ruta del archivo del historial"""
+        return self._archivo_historial
+
+    def registrar(self, registros: List[Dict[str, Any]], marca_tiempo: Optional[float] = None) -> None:
+        """
+        Agrega las versiones que producen registros de diario
+
+        Args:
+            registros (List[Dict[str, Any]]): Registros de alta, baja o limpieza
+            marca_tiempo (Optional[float]): Momento de los cambios (por defecto, ahora)
+        """
+        marca_tiempo = time.time() if marca_tiempo is None else marca_tiempo
+        lineas: List[Dict[str, Any]] = []
+
+        with self._cerrojo:
+            for registro in registros:
+                operacion = registro.get('op')
+                if operacion == DiarioFiguras.OPERACION_ALTA:
+                    lineas.append(self._nueva_version(registro['figura'], marca_tiempo))
+                elif operacion == DiarioFiguras.OPERACION_BAJA:
+                    lineas.append(self._nueva_baja(registro['id'], marca_tiempo))
+                elif operacion == DiarioFiguras.OPERACION_LIMPIAR:
+                    lineas.extend(self._nueva_baja(id_figura, marca_tiempo)
+                                  for id_figura, actual in list(self._actuales.items()) if actual is not None)
+
+            self._anexar([linea for linea in lineas if linea is not None])
+
+    def _nueva_version(self, datos: Dict[str, Any], marca_tiempo: float) -> Optional[Dict[str, Any]]:
+        """Agrega la versión con el estado dado, si difiere del actual, y devuelve su línea"""
+        id_figura = datos['id']
+        estado = {clave: valor for clave, valor in datos.items() if clave != 'metricas'}
+        actual = self._actuales.get(id_figura)
+        if actual == estado:
+            return None
+
+        versiones = self._versiones.setdefault(id_figura, [])
+        if actual is None or len(versiones) % self._intervalo_claves == 0:
+            version = (self._CLAVE, estado)
+        else:
+            version = (self._DELTA, {
+                'cambios': {clave: valor for clave, valor in estado.items() if actual.get(clave) != valor},
+                'quitadas': [clave for clave in actual if clave not in estado],
+            })
+        return self._agregar(id_figura, version, marca_tiempo, estado)
+
+    def _nueva_baja(self, id_figura: int, marca_tiempo: float) -> Optional[Dict[str, Any]]:
+        """Marca la figura como eliminada y devuelve la línea de la versión"""
+        if self._actuales.get(id_figura) is None:
+            return None
+        return self._agregar(id_figura, (self._BAJA, None), marca_tiempo, None)
+
+    def _agregar(self, id_figura: int, version: Tuple[str, Any], marca_tiempo: float,
+                 estado: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Agrega una versión en memoria y devuelve su línea para el archivo"""
+        self._versiones.setdefault(id_figura, []).append(version)
+        self._tiempos.setdefault(id_figura, []).append(marca_tiempo)
+        self._actuales[id_figura] = estado
+
+        tipo, contenido = version
+        linea: Dict[str, Any] = {'id': id_figura, 'v': len(self._versiones[id_figura]), 't': marca_tiempo, tipo: True}
+        if contenido is not None:
+            linea[tipo] = contenido
+        return linea
+
+    def _anexar(self, lineas: List[Dict[str, Any]]) -> None:
+        """Anexa las versiones nuevas al archivo con una sola escritura"""
+        if not lineas:
+            return
+
+        try:
+            directorio = os.path.dirname(self._archivo_historial)
+            if directorio and not os.path.exists(directorio):
+                os.makedirs(directorio)
+
+            with open(self._archivo_historial, 'a', encoding='utf-8') as f:
+                f.write("".join(
+                    json.dumps(linea, ensure_ascii=False, separators=(',', ':')) + "\n" for linea in lineas
+                ))
+
+        except Exception as e:
+            print(f"Error al anexar al historial: {e}")
+
+    def _cargar(self) -> None:
+        """Relee las versiones guardadas, descartando una última línea incompleta"""
+        if not os.path.exists(self._archivo_historial):
+            return
+
+        with open(self._archivo_historial, 'r', encoding='utf-8') as f:
+            for linea in f:
+                if not linea.strip():
+                    continue
+                try:
+                    entrada = json.loads(linea)
+                except json.JSONDecodeError:
+                    print("Versión de historial incompleta descartada")
+                    return
+
+                id_figura = entrada['id']
+                if self._CLAVE in entrada:
+                    version: Tuple[str, Any] = (self._CLAVE, entrada[self._CLAVE])
+                elif self._DELTA in entrada:
+                    version = (self._DELTA, entrada[self._DELTA])
+                else:
+                    version = (self._BAJA, None)
+
+                self._agregar(id_figura, version, entrada['t'],
+                              self._aplicar(self._actuales.get(id_figura), version))
+
+    @staticmethod
+    def _aplicar(estado: Optional[Dict[str, Any]], version: Tuple[str, Any]) -> Optional[Dict[str, Any]]:
+        """Aplica una versión sobre el estado anterior y devuelve el nuevo"""
+        tipo, contenido = version
+        if tipo == HistorialFiguras._BAJA:
+            return None
+        if tipo == HistorialFiguras._CLAVE:
+            return dict(contenido)
+
+        nuevo = dict(estado or {})
+        for clave in contenido['quitadas']:
+            nuevo.pop(clave, None)
+        nuevo.update(contenido['cambios'])
+        return nuevo
+
+    def get_version_actual(self, id_figura: int) -> int:
+        """
+        Obtiene el número de la última versión de una figura
+
+        Args:
+            id_figura (int): ID de la figura
+
+        Returns:
+            int: Número de versión (0 si no tiene historial)
+        """
+        with self._cerrojo:
+            return len(self._versiones.get(id_figura, ()))
+
+    def versiones(self, id_figura: int) -> List[Dict[str, Any]]:
+        """
+        Describe las versiones de una figura
+
+        Args:
+            id_figura (int): ID de la figura
+
+        Returns:
+            List[Dict[str, Any]]: Por versión, 'version', 'marca_tiempo' y 'eliminada'
+        """
+        with self._cerrojo:
+            return [
+                {'version': numero, 'marca_tiempo': marca_tiempo, 'eliminada': tipo == self._BAJA}
+                for numero, ((tipo, _), marca_tiempo) in enumerate(
+                    zip(self._versiones.get(id_figura, ()), self._tiempos.get(id_figura, ())), start=1
+                )
+            ]
+
+    def reconstruir(self, id_figura: int, version: int) -> Optional[Dict[str, Any]]:
+        """
+        Reconstruye el estado de una figura en una versión
+
+        Args:
+            id_figura (int): ID de la figura
+            version (int): Número de versión (1 es la primera)
+
+        Returns:
+            Optional[Dict[str, Any]]: Datos de la figura en esa versión, o None si
+                la versión no existe o la figura estaba eliminada
+        """
+        with self._cerrojo:
+            versiones = self._versiones.get(id_figura, [])
+            if not 1 <= version <= len(versiones):
+                return None
+
+            # Retroceder hasta el fotograma clave (o la baja) más cercano
+            inicio = version - 1
+            while versiones[inicio][0] == self._DELTA:
+                inicio -= 1
+
+            estado = None
+            for posicion in range(inicio, version):
+                estado = self._aplicar(estado, versiones[posicion])
+            return estado
+
+    def version_en(self, id_figura: int, marca_tiempo: float) -> int:
+        """
+        Obtiene la versión vigente de una figura en un momento dado
+
+        Args:
+            id_figura (int): ID de la figura
+            marca_tiempo (float): Momento (segundos desde la época, como time.time())
+
+        Returns:
+            int: Número de la última versión registrada hasta ese momento (0 si ninguna)
+        """
+        with self._cerrojo:
+            return bisect.bisect_right(self._tiempos.get(id_figura, []), marca_tiempo)
+
+    def estado_en(self, marca_tiempo: float) -> Dict[int, Dict[str, Any]]:
+        """
+        Reconstruye todas las figuras vigentes en un momento dado
+
+        Args:
+            marca_tiempo (float): Momento (segundos desde la época, como time.time())
+
+        Returns:
+            Dict[int, Dict[str, Any]]: ID -> datos de cada figura que existía entonces
+        """
+        with self._cerrojo:
+            estado = {}
+            for id_figura in self._versiones:
+                datos = self.reconstruir(id_figura, self.version_en(id_figura, marca_tiempo))
+                if datos is not None:
+                    estado[id_figura] = datos
+            return estado
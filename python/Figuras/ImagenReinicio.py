@@ -0,0 +1,160 @@
+"""
+Imagen de reinicio del repositorio serializada con pickle
+"""
+# pylint: disable=invalid-name
+import hashlib
+import os
+import pickle
+import struct
+import zlib
+from typing import Any, Dict, List, Optional, Sequence
+
+
+class ImagenReinicio:
+    """
+    Volcado del estado en memoria del repositorio para reiniciar sin volver
+    a analizar el archivo de datos ni construir las figuras una por una
+
+    Estructura (little-endian):
+        Cabecera (36 bytes): magia b'FIMG', versión (uint16), cantidad de
+            buffers fuera de banda (uint16), CRC32 del resto del archivo
+            (uint32), firma de los archivos de origen (16 bytes), longitud
+            del pickle (uint64)
+        Longitud de cada buffer (uint64 x cantidad)
+        Pickle (protocolo 5) seguido de los buffers fuera de banda
+
+    Las figuras van dentro del pickle como objetos, así que cargarlo ya las
+    restaura sin llamar a ningún constructor. Los objetos que se serializan
+    como pickle.PickleBuffer (los valores de los sketches de cuantiles, ver
+    SketchCuantiles) viajan fuera del pickle y al cargar se entregan como
+    vistas sobre lo leído, sin copiarlos.
+    La firma resume tamaño y fecha de modificación de los archivos de origen:
+    si alguno cambió desde que se generó la imagen, esta se descarta.
+    """
+
+    MAGIA = b"FIMG"
+    # 2: el resumen incluido acumula también métricas derivadas
+    # 3: las figuras se guardaban en columnas fuera de banda
+    # 4: las figuras vuelven a ir como objetos; los sketches, fuera de banda
+    VERSION = 4
+
+    _CABECERA = struct.Struct("<4sHHI16sQ")
+    _LONGITUD = struct.Struct("<Q")
+
+    def __init__(self, archivo_imagen: str, archivos_origen: Sequence[str]):
+        """
+        Constructor de la imagen
+
+        Args:
+            archivo_imagen (str): Ruta de la imagen
+            archivos_origen (Sequence[str]): Archivos cuyo contenido refleja la imagen
+                (datos, diario, manifiesto); pueden no existir
+        """
+        self._archivo_imagen = archivo_imagen
+        self._archivos_origen = tuple(archivos_origen)
+
+    def get_archivo(self) -> str:
+        """Obtiene la ruta de la imagen"""
+        return self._archivo_imagen
+
+    def firma(self) -> bytes:
+        """
+        Calcula la firma del estado actual de los archivos de origen
+
+        Returns:
+            bytes: Resumen de 16 bytes de la existencia, tamaño y mtime de cada archivo
+        """
+        resumen = hashlib.blake2b(digest_size=16)
+        for archivo in self._archivos_origen:
+            try:
+                estado = os.stat(archivo)
+                resumen.update(f"{archivo}|{estado.st_size}|{estado.st_mtime_ns}\n".encode('utf-8'))
+            except FileNotFoundError:
+                resumen.update(f"{archivo}|-\n".encode('utf-8'))
+        return resumen.digest()
+
+    def guardar(self, estado: Dict[str, Any]) -> bool:
+        """
+        Escribe la imagen con el estado dado y la firma actual de los orígenes
+
+        Args:
+            estado (Dict[str, Any]): Estado a serializar
+
+        Returns:
+            bool: True si se guardó exitosamente
+        """
+        try:
+            buffers: List[pickle.PickleBuffer] = []
+            datos = pickle.dumps(estado, protocol=5, buffer_callback=buffers.append)
+            vistas = [buffer.raw() for buffer in buffers]
+
+            longitudes = b"".join(self._LONGITUD.pack(vista.nbytes) for vista in vistas)
+            crc = zlib.crc32(longitudes)
+            crc = zlib.crc32(datos, crc)
+            for vista in vistas:
+                crc = zlib.crc32(vista, crc)
+
+            archivo_temporal = self._archivo_imagen + ".tmp"
+            with open(archivo_temporal, 'wb') as f:
+                f.write(self._CABECERA.pack(self.MAGIA, self.VERSION, len(vistas), crc,
+                                            self.firma(), len(datos)))
+                f.write(longitudes)
+                f.write(datos)
+                for vista in vistas:
+                    f.write(vista)
+            os.replace(archivo_temporal, self._archivo_imagen)
+
+            return True
+
+        except Exception as e:
+            print(f"Error al guardar imagen de reinicio: {e}")
+            return False
+
+    def cargar(self) -> Optional[Dict[str, Any]]:
+        """
+        Lee la imagen con una única lectura y la deserializa
+
+        Returns:
+            Optional[Dict[str, Any]]: Estado guardado, o None si no hay imagen,
+                está dañada, es de otra versión o los orígenes cambiaron
+        """
+        try:
+            if not os.path.exists(self._archivo_imagen):
+                return None
+
+            with open(self._archivo_imagen, 'rb') as f:
+                contenido = f.read()
+
+            tamano_cabecera = self._CABECERA.size
+            if len(contenido) < tamano_cabecera:
+                return None
+
+            magia, version, cantidad, crc, firma, longitud_datos = self._CABECERA.unpack_from(contenido)
+            if magia != self.MAGIA or version != self.VERSION or firma != self.firma():
+                return None
+
+            vista = memoryview(contenido)
+            if zlib.crc32(vista[tamano_cabecera:]) != crc:
+                return None
+
+            posicion = tamano_cabecera + cantidad * self._LONGITUD.size
+            longitudes = [self._LONGITUD.unpack_from(contenido, tamano_cabecera + i * self._LONGITUD.size)[0]
+                          for i in range(cantidad)]
+            datos = vista[posicion:posicion + longitud_datos]
+            posicion += longitud_datos
+
+            buffers = []
+            for longitud in longitudes:
+                buffers.append(vista[posicion:posicion + longitud])
+                posicion += longitud
+
+            return pickle.loads(datos, buffers=buffers)
+
+        except Exception as e:
+            print(f"Error al cargar imagen de reinicio: {e}")
+            return None
+
+    def eliminar(self) -> None:
+        """Elimina la imagen si existe"""
+        if os.path.exists(self._archivo_imagen):
+            os.remove(self._archivo_imagen)
@@ -0,0 +1,165 @@
+"""
+Índice en disco de ID de figura a ubicación dentro del archivo de datos
+"""
+# pylint: disable=invalid-name
+import bisect
+import mmap
+import os
+import struct
+from array import array
+from typing import Iterator, Optional
+from PersistenciaArchivos import PersistenciaArchivos
+
+
+class IndiceDesplazamientos:
+    """
+    Índice ID -> ubicación guardado junto al archivo de datos (<archivo>.idx)
+
+    Estructura (little-endian):
+        Cabecera (32 bytes): magia b'FIDX', versión (uint16), relleno,
+            mtime en ns y tamaño del archivo de datos indexado, cantidad
+        IDs ordenados (int64 x cantidad) seguidos de sus ubicaciones (int64 x cantidad)
+
+    El índice se abre con mmap y se consulta por búsqueda binaria, así que
+    abrirlo no depende de la cantidad de figuras. Si el archivo de datos
+    cambió desde que se generó (mtime o tamaño distintos), se reconstruye.
+    """
+
+    MAGIA = b"FIDX"
+    VERSION = 1
+
+    _CABECERA = struct.Struct("<4sHxxqQQ")
+
+    def __init__(self, archivo_datos: str):
+        """
+        Abre (o construye si falta o está desactualizado) el índice de un archivo
+
+        Args:
+            archivo_datos (str): Archivo de figuras a indexar
+        """
+        self._archivo_datos = archivo_datos
+        self._archivo_indice = archivo_datos + ".idx"
+        self._f = None
+        self._mapa = None
+        self._ids = memoryview(array('q'))
+        self._ubicaciones = memoryview(array('q'))
+
+        if not os.path.exists(archivo_datos):
+            return
+
+        if not self._abrir():
+            IndiceDesplazamientos.construir(archivo_datos, self._archivo_indice)
+            self._abrir()
+
+    def _abrir(self) -> bool:
+        """Mapea el índice en memoria si existe y corresponde al archivo de datos actual"""
+        if not os.path.exists(self._archivo_indice):
+            return False
+
+        estado = os.stat(self._archivo_datos)
+        f = open(self._archivo_indice, 'rb')
+        try:
+            mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            f.close()
+            return False
+
+        magia, version, mtime_ns, tamano, cantidad = self._CABECERA.unpack_from(mapa, 0)
+        tamano_esperado = self._CABECERA.size + 16 * cantidad
+        if (magia != self.MAGIA or version != self.VERSION or mtime_ns != estado.st_mtime_ns
+                or tamano != estado.st_size or len(mapa) != tamano_esperado):
+            mapa.close()
+            f.close()
+            return False
+
+        self.cerrar()
+        self._f, self._mapa = f, mapa
+        vista = memoryview(mapa)
+        inicio = self._CABECERA.size
+        self._ids = vista[inicio:inicio + 8 * cantidad].cast('q')
+        self._ubicaciones = vista[inicio + 8 * cantidad:tamano_esperado].cast('q')
+        return True
+
+    @classmethod
+    def construir(cls, archivo_datos: str, archivo_indice: str) -> int:
+        """
+        Recorre el archivo de datos y escribe su índice ordenado por ID
+
+        Si un ID aparece varias veces prevalece la última aparición, igual
+        que al cargar el archivo completo.
+
+        Args:
+            archivo_datos (str): Archivo de figuras a indexar
+            archivo_indice (str): Archivo de índice a generar
+
+        Returns:
+            int: Cantidad de IDs indexados
+        """
+        estado = os.stat(archivo_datos)
+        ubicaciones = {}
+        for ubicacion, datos in PersistenciaArchivos.iterar_registros_con_desplazamiento(archivo_datos):
+            ubicaciones[datos['id']] = ubicacion
+
+        ids = array('q', sorted(ubicaciones))
+        desplazamientos = array('q', (ubicaciones[id_figura] for id_figura in ids))
+
+        archivo_temporal = archivo_indice + ".tmp"
+        with open(archivo_temporal, 'wb') as f:
+            f.write(cls._CABECERA.pack(cls.MAGIA, cls.VERSION, estado.st_mtime_ns,
+                                       estado.st_size, len(ids)))
+            ids.tofile(f)
+            desplazamientos.tofile(f)
+        os.replace(archivo_temporal, archivo_indice)
+
+        return len(ids)
+
+    def cerrar(self) -> None:
+        """Libera el mapeo del índice"""
+        self._ids.release()
+        self._ubicaciones.release()
+        self._ids = memoryview(array('q'))
+        self._ubicaciones = memoryview(array('q'))
+        if self._mapa is not None:
+            self._mapa.close()
+            self._f.close()
+            self._mapa = None
+            self._f = None
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, id_figura: int) -> bool:
+        return self.buscar(id_figura) is not None
+
+    def buscar(self, id_figura: int) -> Optional[int]:
+        """
+        Busca la ubicación de una figura por búsqueda binaria
+
+        Args:
+            id_figura (int): ID de la figura
+
+        Returns:
+            Optional[int]: Ubicación en el archivo de datos o None si no está
+        """
+        posicion = bisect.bisect_left(self._ids, id_figura)
+        if posicion < len(self._ids) and self._ids[posicion] == id_figura:
+            return self._ubicaciones[posicion]
+        return None
+
+    def iterar_ids(self) -> Iterator[int]:
+        """
+        Recorre los IDs indexados en orden ascendente
+
+        Yields:
+            int: ID de figura
+        """
+        return iter(self._ids)
+
+    def id_maximo(self) -> int:
+        """
+        Obtiene el mayor ID indexado
+
+        Returns:
+            int: Mayor ID (0 si el índice está vacío)
+        """
+        return self._ids[-1] if len(self._ids) else 0
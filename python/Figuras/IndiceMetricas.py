@@ -0,0 +1,136 @@
+"""
+Índices ordenados de figuras por sus métricas derivadas
+"""
+# pylint: disable=invalid-name
+import bisect
+import heapq
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+class IndiceMetricas:
+    """
+    Por cada métrica derivada y cada tipo de figura, una lista de pares
+    (valor, ID) ordenada, sobre la que los rangos se resuelven con bisect
+
+    Cada ID recuerda su tipo y los valores con que se indexó, de modo que
+    quitarlo o reindexarlo tras un cambio de dimensión no depende de que la
+    figura conserve sus métricas anteriores. Una consulta sobre varios tipos
+    combina los tramos de cada uno, que ya vienen ordenados.
+    """
+
+    def __init__(self):
+        """Crea un índice vacío"""
+        # (métrica, nombre del tipo en minúsculas) -> [(valor, ID)] ordenada
+        self._ordenados: Dict[Tuple[str, str], List[Tuple[float, int]]] = {}
+        # ID -> (nombre del tipo, {métrica: valor})
+        self._entradas: Dict[int, Tuple[str, Dict[str, float]]] = {}
+
+    def agregar(self, id_figura: int, nombre: str, metricas: Dict[str, float]) -> None:
+        """
+        Indexa una figura, o la reindexa si cambió su tipo o sus métricas
+
+        Args:
+            id_figura (int): ID de la figura
+            nombre (str): Nombre de la figura (get_nombre())
+            metricas (Dict[str, float]): Sus métricas (obtener_metricas())
+        """
+        entrada = (nombre.lower(), dict(metricas))
+        if self._entradas.get(id_figura) == entrada:
+            return
+
+        self.quitar(id_figura)
+        self._entradas[id_figura] = entrada
+        for metrica, valor in entrada[1].items():
+            bisect.insort(self._ordenados.setdefault((metrica, entrada[0]), []), (valor, id_figura))
+
+    def quitar(self, id_figura: int) -> None:
+        """
+        Quita una figura del índice (no hace nada si no estaba)
+
+        Args:
+            id_figura (int): ID de la figura
+        """
+        entrada = self._entradas.pop(id_figura, None)
+        if entrada is None:
+            return
+
+        nombre, metricas = entrada
+        for metrica, valor in metricas.items():
+            ordenados = self._ordenados[(metrica, nombre)]
+            del ordenados[bisect.bisect_left(ordenados, (valor, id_figura))]
+            if not ordenados:
+                del self._ordenados[(metrica, nombre)]
+
+    def vaciar(self) -> None:
+        """Quita todas las figuras del índice"""
+        self._ordenados = {}
+        self._entradas = {}
+
+    def _listas(self, metrica: str, nombre: Optional[str]) -> List[List[Tuple[float, int]]]:
+        """Listas ordenadas de una métrica, de un tipo o de todos"""
+        if nombre is not None:
+            ordenados = self._ordenados.get((metrica, nombre.lower()))
+            return [ordenados] if ordenados else []
+        return [ordenados for (clave, _), ordenados in self._ordenados.items() if clave == metrica]
+
+    def rango(self, metrica: str, minimo: Optional[float] = None, maximo: Optional[float] = None,
+              nombre: Optional[str] = None) -> Iterator[Tuple[float, int]]:
+        """
+        Recorre las figuras cuya métrica cae en un rango, de menor a mayor
+
+        Ubicar los extremos cuesta O(log n) por tipo; luego cada resultado O(1)
+        (más O(log t) al combinar t tipos).
+
+        Args:
+            metrica (str): 'area', 'perimetro', 'volumen' o 'area_superficie'
+            minimo (Optional[float]): Cota inferior inclusiva (sin cota si es None)
+            maximo (Optional[float]): Cota superior inclusiva (sin cota si es None)
+            nombre (Optional[str]): Nombre del tipo, o None para todos
+
+        Yields:
+            Tuple[float, int]: Valor de la métrica e ID de cada figura
+        """
+        tramos = []
+        for ordenados in self._listas(metrica, nombre):
+            inicio = 0 if minimo is None else bisect.bisect_left(ordenados, (minimo,))
+            fin = len(ordenados) if maximo is None else bisect.bisect_right(ordenados, (maximo, float('inf')))
+            if inicio < fin:
+                tramos.append(ordenados[inicio:fin])
+
+        if len(tramos) == 1:
+            yield from tramos[0]
+        else:
+            yield from heapq.merge(*tramos)
+
+    def extremos(self, metrica: str, cantidad: int, mayores: bool = True,
+                 nombre: Optional[str] = None) -> List[Tuple[float, int]]:
+        """
+        Obtiene las figuras con los valores más altos o más bajos de una métrica
+
+        De cada tipo se toman a lo sumo `cantidad` pares de un extremo de su
+        lista ordenada, sin recorrer el resto.
+
+        Args:
+            metrica (str): 'area', 'perimetro', 'volumen' o 'area_superficie'
+            cantidad (int): Cuántas figuras devolver como máximo
+            mayores (bool): True para los valores más altos, False para los más bajos
+            nombre (Optional[str]): Nombre del tipo, o None para todos
+
+        Returns:
+            List[Tuple[float, int]]: Valor e ID, del más extremo al menos extremo
+        """
+        if cantidad <= 0:
+            return []
+
+        if mayores:
+            candidatos = [par for ordenados in self._listas(metrica, nombre) for par in ordenados[-cantidad:]]
+            return heapq.nlargest(cantidad, candidatos)
+        candidatos = [par for ordenados in self._listas(metrica, nombre) for par in ordenados[:cantidad]]
+        return heapq.nsmallest(cantidad, candidatos)
+
+    def contar(self, metrica: str, nombre: Optional[str] = None) -> int:
+        """Cuenta las figuras indexadas con una métrica, de un tipo o de todos"""
+        return sum(len(ordenados) for ordenados in self._listas(metrica, nombre))
+
+    def __len__(self) -> int:
+        return len(self._entradas)
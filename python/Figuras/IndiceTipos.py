@@ -0,0 +1,121 @@
+"""
+Índice secundario de figuras por tipo y por categoría
+"""
+# pylint: disable=invalid-name
+from typing import Dict, List, Tuple
+
+
+class IndiceTipos:
+    """
+    Índice de IDs por nombre de figura (en minúsculas) y por categoría (2D/3D)
+
+    Cada ID recuerda con qué claves se indexó, de modo que un cambio de
+    nombre o una baja se resuelven sin buscarlo en los conjuntos. Los IDs de
+    cada clave se guardan en un diccionario usado como conjunto ordenado,
+    para devolverlos en el orden en que se indexaron.
+    """
+
+    def __init__(self):
+        """Crea un índice vacío"""
+        self._por_nombre: Dict[str, Dict[int, None]] = {}
+        self._por_categoria: Dict[str, Dict[int, None]] = {}
+        self._claves: Dict[int, Tuple[str, str]] = {}
+
+    @staticmethod
+    def _normalizar(nombre: str, categoria: str) -> Tuple[str, str]:
+        """Claves con que se indexan un nombre y una categoría"""
+        return nombre.lower(), categoria.upper()
+
+    def agregar(self, id_figura: int, nombre: str, categoria: str) -> None:
+        """
+        Indexa una figura, o la reindexa si cambió su nombre o categoría
+
+        Args:
+            id_figura (int): ID de la figura
+            nombre (str): Nombre de la figura (get_nombre())
+            categoria (str): Categoría de la figura (get_tipo())
+        """
+        claves = self._normalizar(nombre, categoria)
+        if self._claves.get(id_figura) == claves:
+            return
+
+        self.quitar(id_figura)
+        self._claves[id_figura] = claves
+        self._por_nombre.setdefault(claves[0], {})[id_figura] = None
+        self._por_categoria.setdefault(claves[1], {})[id_figura] = None
+
+    def quitar(self, id_figura: int) -> None:
+        """
+        Quita una figura del índice (no hace nada si no estaba)
+
+        Args:
+            id_figura (int): ID de la figura
+        """
+        claves = self._claves.pop(id_figura, None)
+        if claves is None:
+            return
+
+        for indice, clave in ((self._por_nombre, claves[0]), (self._por_categoria, claves[1])):
+            ids = indice[clave]
+            del ids[id_figura]
+            if not ids:
+                del indice[clave]
+
+    def vaciar(self) -> None:
+        """Quita todas las figuras del índice"""
+        self._por_nombre = {}
+        self._por_categoria = {}
+        self._claves = {}
+
+    def ids_por_nombre(self, nombre: str) -> List[int]:
+        """
+        Obtiene los IDs de las figuras con un nombre
+
+        Args:
+            nombre (str): Nombre de la figura, sin distinguir mayúsculas
+
+        Returns:
+            List[int]: IDs en el orden en que se indexaron
+        """
+        return list(self._por_nombre.get(nombre.lower(), ()))
+
+    def ids_por_categoria(self, categoria: str) -> List[int]:
+        """
+        Obtiene los IDs de las figuras de una categoría
+
+        Args:
+            categoria (str): "2D" o "3D", sin distinguir mayúsculas
+
+        Returns:
+            List[int]: IDs en el orden en que se indexaron
+        """
+        return list(self._por_categoria.get(categoria.upper(), ()))
+
+    def contar_por_nombre(self, nombre: str) -> int:
+        """Cuenta las figuras con un nombre, sin distinguir mayúsculas"""
+        return len(self._por_nombre.get(nombre.lower(), ()))
+
+    def contar_por_categoria(self, categoria: str) -> int:
+        """Cuenta las figuras de una categoría, sin distinguir mayúsculas"""
+        return len(self._por_categoria.get(categoria.upper(), ()))
+
+    def conteos_por_nombre(self) -> Dict[str, int]:
+        """
+        Obtiene la cantidad de figuras de cada nombre presente
+
+        Returns:
+            Dict[str, int]: Nombre en minúsculas -> cantidad
+        """
+        return {nombre: len(ids) for nombre, ids in self._por_nombre.items()}
+
+    def conteos_por_categoria(self) -> Dict[str, int]:
+        """
+        Obtiene la cantidad de figuras de cada categoría presente
+
+        Returns:
+            Dict[str, int]: Categoría -> cantidad
+        """
+        return {categoria: len(ids) for categoria, ids in self._por_categoria.items()}
+
+    def __len__(self) -> int:
+        return len(self._claves)
@@ -0,0 +1,185 @@
+"""
+Mapa de figuras con una cantidad acotada de figuras residentes en memoria
+"""
+# pylint: disable=invalid-name
+import glob
+import os
+import pickle
+import shelve
+import threading
+from collections import OrderedDict
+from collections.abc import ItemsView, MutableMapping, ValuesView
+from typing import Dict, Iterator, Set, Tuple
+from Figura import Figura
+
+
+class MapaFigurasAcotado(MutableMapping):
+    """
+    Diccionario ID -> Figura que mantiene construidas a lo sumo `capacidad`
+    figuras y pagina el resto a un almacén en disco (shelve)
+
+    Las figuras residentes se ordenan por uso (LRU): al superar la capacidad
+    la menos usada se escribe en el almacén y se suelta; al volver a pedirla
+    se lee de allí y pasa a ser la más reciente. Una figura paginada vuelve
+    como otro objeto, así que no se debe retener una figura para modificarla
+    más tarde. El almacén es solo un desborde de memoria: se recrea al abrir
+    el mapa y se borra al cerrarlo; la persistencia sigue siendo el snapshot.
+
+    Recorrer values() o items() (por ejemplo al guardar) entrega las figuras
+    paginadas sin volver a hacerlas residentes, para no desalojar a las que
+    se están usando.
+    """
+
+    def __init__(self, archivo_paginas: str, capacidad: int):
+        """
+        Abre el mapa con un almacén de páginas vacío
+
+        Args:
+            archivo_paginas (str): Ruta base del almacén en disco
+            capacidad (int): Cantidad máxima de figuras residentes
+
+        Raises:
+            ValueError: Si la capacidad no es positiva
+        """
+        if capacidad <= 0:
+            raise ValueError("La capacidad debe ser mayor que cero")
+
+        self._archivo_paginas = archivo_paginas
+        self._capacidad = capacidad
+        self._cerrojo = threading.RLock()
+        self._residentes: 'OrderedDict[int, Figura]' = OrderedDict()
+        self._ids: Set[int] = set()
+        self._aciertos = 0
+        self._fallos = 0
+        self._desalojos = 0
+        self._almacen = self._abrir_almacen()
+
+    def _abrir_almacen(self) -> shelve.Shelf:
+        """Crea el almacén de páginas, descartando uno anterior"""
+        directorio = os.path.dirname(self._archivo_paginas)
+        if directorio and not os.path.exists(directorio):
+            os.makedirs(directorio)
+        return shelve.open(self._archivo_paginas, flag='n', protocol=pickle.HIGHEST_PROTOCOL)
+
+    def cerrar(self) -> None:
+        """Cierra el almacén de páginas y borra sus archivos"""
+        with self._cerrojo:
+            if self._almacen is None:
+                return
+            self._almacen.close()
+            self._almacen = None
+            # Según el módulo dbm disponible el almacén ocupa uno o varios archivos
+            for archivo in glob.glob(glob.escape(self._archivo_paginas) + "*"):
+                os.remove(archivo)
+
+    def get_capacidad(self) -> int:
+        """Obtiene la cantidad máxima de figuras residentes"""
+        return self._capacidad
+
+    def estadisticas_cache(self) -> Dict[str, int]:
+        """
+        Obtiene los contadores del caché de figuras
+
+        Returns:
+            Dict[str, int]: 'aciertos', 'fallos' (figuras leídas del almacén),
+                'desalojos', 'residentes' y 'capacidad'
+        """
+        with self._cerrojo:
+            return {
+                'aciertos': self._aciertos,
+                'fallos': self._fallos,
+                'desalojos': self._desalojos,
+                'residentes': len(self._residentes),
+                'capacidad': self._capacidad,
+            }
+
+    def _desalojar(self) -> None:
+        """Pagina las figuras menos usadas hasta respetar la capacidad"""
+        while len(self._residentes) > self._capacidad:
+            id_figura, figura = self._residentes.popitem(last=False)
+            # Se escribe siempre: la figura pudo modificarse mientras era residente
+            self._almacen[str(id_figura)] = figura
+            self._desalojos += 1
+
+    def __getitem__(self, id_figura: int) -> Figura:
+        with self._cerrojo:
+            figura = self._residentes.get(id_figura)
+            if figura is not None:
+                self._residentes.move_to_end(id_figura)
+                self._aciertos += 1
+                return figura
+
+            if id_figura not in self._ids:
+                raise KeyError(id_figura)
+
+            self._fallos += 1
+            figura = self._almacen.pop(str(id_figura))
+            self._residentes[id_figura] = figura
+            self._desalojar()
+            return figura
+
+    def __setitem__(self, id_figura: int, figura: Figura) -> None:
+        with self._cerrojo:
+            if id_figura in self._ids and id_figura not in self._residentes:
+                del self._almacen[str(id_figura)]
+            self._ids.add(id_figura)
+            self._residentes[id_figura] = figura
+            self._residentes.move_to_end(id_figura)
+            self._desalojar()
+
+    def __delitem__(self, id_figura: int) -> None:
+        with self._cerrojo:
+            if id_figura not in self._ids:
+                raise KeyError(id_figura)
+
+            self._ids.discard(id_figura)
+            if self._residentes.pop(id_figura, None) is None:
+                del self._almacen[str(id_figura)]
+
+    def __contains__(self, id_figura: object) -> bool:
+        return id_figura in self._ids
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(list(self._ids))
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def clear(self) -> None:
+        """Vacía el mapa y recrea el almacén de páginas"""
+        with self._cerrojo:
+            self._residentes = OrderedDict()
+            self._ids = set()
+            self._almacen.close()
+            self._almacen = self._abrir_almacen()
+
+    def values(self) -> ValuesView:
+        return _ValoresSinPromover(self)
+
+    def items(self) -> ItemsView:
+        return _ElementosSinPromover(self)
+
+    def _recorrer(self) -> Iterator[Tuple[int, Figura]]:
+        """Recorre todas las figuras sin alterar el orden de uso ni la residencia"""
+        for id_figura in list(self._ids):
+            with self._cerrojo:
+                figura = self._residentes.get(id_figura)
+                if figura is None and id_figura in self._ids:
+                    figura = self._almacen[str(id_figura)]
+            if figura is not None:
+                yield id_figura, figura
+
+
+class _ValoresSinPromover(ValuesView):
+    """Vista de valores que lee las figuras paginadas sin hacerlas residentes"""
+
+    def __iter__(self) -> Iterator[Figura]:
+        for _, figura in self._mapping._recorrer():  # pylint: disable=protected-access
+            yield figura
+
+
+class _ElementosSinPromover(ItemsView):
+    """Vista de pares (ID, figura) que no altera la residencia de las figuras"""
+
+    def __iter__(self) -> Iterator[Tuple[int, Figura]]:
+        return self._mapping._recorrer()  # pylint: disable=protected-access
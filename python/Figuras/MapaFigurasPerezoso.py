@@ -0,0 +1,196 @@
+"""
+Mapa de figuras que materializa cada figura recién al accederla
+"""
+# pylint: disable=invalid-name
+import weakref
+from collections.abc import MutableMapping
+from typing import Dict, Iterator, Optional, Set
+from Figura import Figura
+from PersistenciaArchivos import PersistenciaArchivos
+from ArchivoBinarioFiguras import ArchivoBinarioFiguras
+from IndiceDesplazamientos import IndiceDesplazamientos
+
+
+class MapaFigurasPerezoso(MutableMapping):
+    """
+    Diccionario ID -> Figura respaldado por el archivo de datos y su índice
+
+    Al abrirlo solo se mapea el índice de desplazamientos; una figura se lee
+    y se construye la primera vez que se accede a ella y queda en un mapa de
+    identidad, de modo que accesos sucesivos devuelven el mismo objeto
+    mientras alguien lo siga referenciando. Las figuras leídas del archivo se
+    retienen débilmente (se pueden volver a leer); las agregadas en memoria
+    se retienen hasta que el archivo se reescribe, igual que las leídas que
+    luego se modificaron (marcar_modificada). Las bajas se registran en
+    memoria sobre la vista del archivo.
+    """
+
+    def __init__(self, archivo: str):
+        """
+        Abre el mapa sobre un archivo de figuras
+
+        Args:
+            archivo (str): Archivo de figuras (JSON, por líneas o binario)
+        """
+        self._archivo = archivo
+        self._limpias: 'weakref.WeakValueDictionary[int, Figura]' = weakref.WeakValueDictionary()
+        self._modificadas: Dict[int, Figura] = {}
+        self._eliminadas: Set[int] = set()
+        self._descartado = False
+        self._cantidad = 0
+        self._indice: Optional[IndiceDesplazamientos] = None
+        self._lector = None
+        self._formato = PersistenciaArchivos.detectar_formato(archivo)
+        self._abrir_archivo()
+
+    def _abrir_archivo(self) -> None:
+        """Abre el índice y el lector del archivo de datos"""
+        self._indice = IndiceDesplazamientos(self._archivo)
+        self._cantidad = len(self._indice)
+
+        if not len(self._indice):
+            self._lector = None
+        elif (self._formato == PersistenciaArchivos.FORMATO_BINARIO
+              and PersistenciaArchivos.detectar_compresion(self._archivo) is None):
+            self._lector = ArchivoBinarioFiguras(self._archivo)
+        else:
+            # Un archivo comprimido se lee a través de su códec: correcto, pero
+            # cada acceso descomprime hasta el registro buscado
+            self._lector = PersistenciaArchivos.abrir_lectura(self._archivo)
+
+    def cerrar(self) -> None:
+        """Cierra el índice y el archivo de datos"""
+        if isinstance(self._lector, ArchivoBinarioFiguras):
+            self._lector.cerrar()
+        elif self._lector is not None:
+            self._lector.close()
+        self._lector = None
+
+        if self._indice is not None:
+            self._indice.cerrar()
+
+    def reabrir(self) -> None:
+        """
+        Vuelve a apoyar el mapa sobre el archivo de datos tras reescribirlo
+
+        Las figuras agregadas en memoria que ya están en el archivo pasan a
+        retenerse débilmente, conservando su identidad mientras se usen.
+        """
+        self.cerrar()
+        self._eliminadas = set()
+        self._descartado = False
+        self._formato = PersistenciaArchivos.detectar_formato(self._archivo)
+        self._abrir_archivo()
+
+        for id_figura, figura in list(self._modificadas.items()):
+            if self._indice.buscar(id_figura) is not None:
+                self._limpias[id_figura] = figura
+                del self._modificadas[id_figura]
+        self._cantidad = len(self._indice) + len(self._modificadas)
+
+    def _en_archivo(self, id_figura: int) -> bool:
+        """Indica si el ID está en el archivo y no fue eliminado en memoria"""
+        return (not self._descartado and id_figura not in self._eliminadas
+                and self._indice.buscar(id_figura) is not None)
+
+    def _leer(self, id_figura: int) -> Optional[Figura]:
+        """Lee y construye la figura con ese ID desde el archivo de datos"""
+        if not self._en_archivo(id_figura):
+            return None
+        ubicacion = self._indice.buscar(id_figura)
+
+        if isinstance(self._lector, ArchivoBinarioFiguras):
+            datos = self._lector.leer_registro(ubicacion)
+        else:
+            datos = PersistenciaArchivos.leer_registro_en(self._lector, ubicacion, self._formato)
+
+        return PersistenciaArchivos.dict_a_figura(datos)
+
+    def __getitem__(self, id_figura: int) -> Figura:
+        figura = self._modificadas.get(id_figura)
+        if figura is None:
+            figura = self._limpias.get(id_figura)
+        if figura is not None:
+            return figura
+
+        figura = self._leer(id_figura)
+        if figura is None:
+            raise KeyError(id_figura)
+
+        self._limpias[id_figura] = figura
+        return figura
+
+    def __setitem__(self, id_figura: int, figura: Figura) -> None:
+        if id_figura not in self:
+            self._cantidad += 1
+        self._modificadas[id_figura] = figura
+        self._limpias.pop(id_figura, None)
+        self._eliminadas.discard(id_figura)
+
+    def __delitem__(self, id_figura: int) -> None:
+        if id_figura not in self:
+            raise KeyError(id_figura)
+
+        self._modificadas.pop(id_figura, None)
+        self._limpias.pop(id_figura, None)
+        if self._en_archivo(id_figura):
+            self._eliminadas.add(id_figura)
+        self._cantidad -= 1
+
+    def marcar_modificada(self, id_figura: int) -> None:
+        """
+        Retiene una figura leída del archivo que se modificó en memoria
+
+        Sin esto, al soltarla quien la modificó se perdería el cambio y la
+        próxima lectura devolvería la versión del archivo.
+
+        Args:
+            id_figura (int): ID de la figura modificada
+        """
+        figura = self._limpias.pop(id_figura, None)
+        if figura is not None:
+            self._modificadas[id_figura] = figura
+
+    def __contains__(self, id_figura: object) -> bool:
+        return id_figura in self._modificadas or (
+            isinstance(id_figura, int) and self._en_archivo(id_figura)
+        )
+
+    def __iter__(self) -> Iterator[int]:
+        if not self._descartado:
+            for id_figura in self._indice.iterar_ids():
+                if id_figura not in self._eliminadas:
+                    yield id_figura
+
+        for id_figura in list(self._modificadas):
+            if not self._en_archivo(id_figura):
+                yield id_figura
+
+    def __len__(self) -> int:
+        return self._cantidad
+
+    def clear(self) -> None:
+        """Vacía el mapa sin recorrer el archivo"""
+        self._modificadas = {}
+        self._limpias = weakref.WeakValueDictionary()
+        self._eliminadas = set()
+        self._descartado = True
+        self._cantidad = 0
+
+    def cantidad_materializadas(self) -> int:
+        """
+        Obtiene cuántas figuras están construidas en memoria
+
+        Returns:
+            int: Figuras residentes en el mapa de identidad
+        """
+        return len(self._modificadas) + len(self._limpias)
+
+    def id_maximo(self) -> int:
+        """
+        Obtiene el mayor ID presente en el archivo, sin materializar figuras
+
+        Returns:
+            int: Mayor ID del índice
+        """
+        return self._indice.id_maximo()
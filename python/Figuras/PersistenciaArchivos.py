@@ -2,49 +2,549 @@
 Manejo de persistencia de datos en archivos
 """
 # pylint: disable=invalid-name
+import bisect
+import bz2
+import codecs
+import gzip
+import io
 import json
+import lzma
 import os
-from typing import List, Dict, Any
+from concurrent.futures import ProcessPoolExecutor
+from typing import IO, List, Dict, Any, BinaryIO, Iterable, Iterator, Optional, TextIO, Tuple
 from Figura import Figura
 from FiguraFactory import FiguraFactory
+from ArchivoBinarioFiguras import ArchivoBinarioFiguras
+from FormatoIntercambio import FormatoIntercambio
+from RegistroFiguras import RegistroFiguras
+from ResumenFiguras import ResumenFiguras
+from DistribucionesMetricas import DistribucionesMetricas
 
 class PersistenciaArchivos:
     """Clase para manejar la persistencia de figuras en archivos JSON"""
 
+    FORMATO_JSON = "json"
+    FORMATO_NDJSON = "ndjson"
+    FORMATO_BINARIO = "binario"
+    FORMATO_INTERCAMBIO = "intercambio"
+
+    EXTENSIONES_NDJSON = (".jsonl", ".ndjson")
+    EXTENSIONES_BINARIO = (".figb",)
+    EXTENSIONES_INTERCAMBIO = (".figx",)
+
+    ESTRATEGIA_HASH = "hash"
+    ESTRATEGIA_RANGO = "rango"
+    TAMANO_BLOQUE_LECTURA = 64 * 1024
+
+    COMPRESION_GZIP = "gzip"
+    COMPRESION_BZIP2 = "bz2"
+    COMPRESION_LZMA = "lzma"
+
+    # Compresión -> bytes mágicos con que comienza el archivo comprimido
+    MAGIAS_COMPRESION = {
+        COMPRESION_GZIP: b"\x1f\x8b",
+        COMPRESION_BZIP2: b"BZh",
+        COMPRESION_LZMA: b"\xfd7zXZ\x00",
+    }
+    EXTENSIONES_COMPRESION = {".gz": COMPRESION_GZIP, ".bz2": COMPRESION_BZIP2, ".xz": COMPRESION_LZMA}
+
+    # Nivel por defecto: intermedio, para no pagar en CPU lo que se ahorra en disco.
+    # gzip y bz2 aceptan 1-9, lzma es un preset 0-9 (más alto, más lento y más pequeño)
+    NIVEL_COMPRESION_DEFECTO = 6
+
+    @staticmethod
+    def detectar_compresion(archivo: str) -> Optional[str]:
+        """
+        Detecta si un archivo está comprimido leyendo sus bytes mágicos
+
+        Args:
+            archivo (str): Ruta del archivo
+
+        Returns:
+            Optional[str]: COMPRESION_GZIP, COMPRESION_BZIP2, COMPRESION_LZMA o
+                None si no está comprimido (o no existe)
+        """
+        if not os.path.exists(archivo):
+            return None
+
+        with open(archivo, 'rb') as f:
+            inicio = f.read(8)
+        for compresion, magia in PersistenciaArchivos.MAGIAS_COMPRESION.items():
+            if inicio.startswith(magia):
+                return compresion
+        return None
+
+    @staticmethod
+    def _compresion_por_extension(archivo: str) -> Optional[str]:
+        """Obtiene la compresión de escritura correspondiente a la extensión del archivo"""
+        return PersistenciaArchivos.EXTENSIONES_COMPRESION.get(os.path.splitext(archivo)[1].lower())
+
+    @staticmethod
+    def _abrir_comprimido(archivo: str, modo: str, compresion: Optional[str],
+                          nivel: Optional[int] = None) -> IO:
+        """
+        Abre un archivo a través del códec indicado, o directamente si no hay compresión
+
+        Los objetos de gzip, bz2 y lzma comprimen y descomprimen por bloques
+        a medida que se escribe o se lee, sin retener el contenido completo.
+
+        Args:
+            archivo (str): Ruta del archivo
+            modo (str): 'rb' o 'wb'
+            compresion (Optional[str]): Códec a usar
+            nivel (Optional[int]): Nivel de compresión al escribir
+
+        Returns:
+            IO: Flujo binario
+        """
+        if compresion is None:
+            return open(archivo, modo)
+
+        escritura = modo.startswith('w')
+        if nivel is None:
+            nivel = PersistenciaArchivos.NIVEL_COMPRESION_DEFECTO
+
+        if compresion == PersistenciaArchivos.COMPRESION_GZIP:
+            if escritura:
+                return gzip.open(archivo, modo, compresslevel=nivel)
+            return gzip.open(archivo, modo)
+        if compresion == PersistenciaArchivos.COMPRESION_BZIP2:
+            if escritura:
+                return bz2.open(archivo, modo, compresslevel=nivel)
+            return bz2.open(archivo, modo)
+        if compresion == PersistenciaArchivos.COMPRESION_LZMA:
+            if escritura:
+                return lzma.open(archivo, modo, preset=nivel)
+            return lzma.open(archivo, modo)
+
+        raise ValueError(f"Compresión no soportada: {compresion}")
+
     @staticmethod
-    def guardar_en_archivo(figuras: Dict[int, Figura], archivo: str) -> bool:
+    def abrir_lectura(archivo: str) -> BinaryIO:
+        """
+        Abre un archivo de figuras en modo binario, descomprimiéndolo si corresponde
+
+        Args:
+            archivo (str): Ruta del archivo
+
+        Returns:
+            BinaryIO: Flujo con el contenido sin comprimir
+        """
+        return PersistenciaArchivos._abrir_comprimido(
+            archivo, 'rb', PersistenciaArchivos.detectar_compresion(archivo)
+        )
+
+    @staticmethod
+    def detectar_formato(archivo: str) -> str:
+        """
+        Detecta el formato de un archivo de figuras
+
+        Si el archivo existe se reconoce por su contenido (ya descomprimido):
+        la magia del formato binario o del de intercambio, o un primer
+        carácter significativo '{' para una figura JSON por línea. Si no
+        existe, se decide por la extensión sin contar la de compresión (.figb
+        binario, .figx intercambio, .jsonl/.ndjson por líneas, el resto
+        arreglo JSON).
+
+        Args:
+            archivo (str): Ruta del archivo
+
+        Returns:
+            str: FORMATO_JSON, FORMATO_NDJSON, FORMATO_BINARIO o FORMATO_INTERCAMBIO
+        """
+        if os.path.exists(archivo) and os.path.getsize(archivo) > 0:
+            with PersistenciaArchivos.abrir_lectura(archivo) as f:
+                inicio = f.read(PersistenciaArchivos.TAMANO_BLOQUE_LECTURA)
+            if inicio.startswith(ArchivoBinarioFiguras.MAGIA):
+                return PersistenciaArchivos.FORMATO_BINARIO
+            if inicio.startswith(FormatoIntercambio.MAGIA):
+                return PersistenciaArchivos.FORMATO_INTERCAMBIO
+            if inicio.lstrip().startswith(b'{'):
+                return PersistenciaArchivos.FORMATO_NDJSON
+            return PersistenciaArchivos.FORMATO_JSON
+
+        return PersistenciaArchivos._formato_por_extension(archivo)
+
+    @staticmethod
+    def _formato_por_extension(archivo: str) -> str:
+        """Obtiene el formato de escritura correspondiente a la extensión del archivo"""
+        nombre = archivo.lower()
+        if PersistenciaArchivos._compresion_por_extension(nombre):
+            nombre = os.path.splitext(nombre)[0]
+        if nombre.endswith(PersistenciaArchivos.EXTENSIONES_BINARIO):
+            return PersistenciaArchivos.FORMATO_BINARIO
+        if nombre.endswith(PersistenciaArchivos.EXTENSIONES_INTERCAMBIO):
+            return PersistenciaArchivos.FORMATO_INTERCAMBIO
+        if nombre.endswith(PersistenciaArchivos.EXTENSIONES_NDJSON):
+            return PersistenciaArchivos.FORMATO_NDJSON
+        return PersistenciaArchivos.FORMATO_JSON
+
+    @staticmethod
+    def guardar_en_archivo(figuras: Dict[int, Figura], archivo: str,
+                           nivel_compresion: Optional[int] = None,
+                           incluir_metricas: bool = False) -> bool:
         """
         Guarda las figuras en un archivo JSON
 
+        Las figuras se serializan de una en una, sin construir una lista
+        intermedia con todo el contenido. Si el archivo termina en .gz, .bz2
+        o .xz se comprime mientras se escribe. En la misma pasada se calcula
+        el resumen que se guarda junto al archivo (ver leer_resumen).
+
         Args:
             figuras (Dict[int, Figura]): Diccionario de figuras a guardar
             archivo (str): Ruta del archivo donde guardar
+            nivel_compresion (Optional[int]): Nivel de compresión (por defecto
+                NIVEL_COMPRESION_DEFECTO); más alto ocupa menos y cuesta más CPU
+            incluir_metricas (bool): Si cada registro lleva sus métricas derivadas
+                (ver metricas_de_registro); los formatos binarios no las guardan
 
         Returns:
             bool: True si se guardó exitosamente, False en caso contrario
         """
         try:
-            # Crear directorio si no existe
-            directorio = os.path.dirname(archivo)
-            if directorio and not os.path.exists(directorio):
-                os.makedirs(directorio)
-
-            # Convertir figuras a formato serializable
-            datos_figuras = []
-            for figura in figuras.values():
-                datos_figura = PersistenciaArchivos._figura_a_dict(figura)
-                datos_figuras.append(datos_figura)
-
-            # Guardar en archivo JSON
-            with open(archivo, 'w', encoding='utf-8') as f:
-                json.dump(datos_figuras, f, indent=2, ensure_ascii=False)
-
+            PersistenciaArchivos.guardar_registros(
+                (PersistenciaArchivos.figura_a_dict(figura, incluir_metricas) for figura in figuras.values()),
+                archivo, nivel_compresion
+            )
             return True
 
         except Exception as e:
             print(f"Error al guardar archivo: {e}")
             return False
 
+    @staticmethod
+    def guardar_registros(registros: Iterable[Dict[str, Any]], archivo: str,
+                          nivel_compresion: Optional[int] = None) -> int:
+        """
+        Guarda registros (diccionarios de figuras) reemplazando el archivo de forma atómica
+
+        Los registros se escriben a medida que llegan, en el formato y la
+        compresión que indica la extensión, y el resumen se calcula en la
+        misma pasada.
+
+        Args:
+            registros (Iterable[Dict[str, Any]]): Datos de las figuras
+            archivo (str): Ruta del archivo donde guardar
+            nivel_compresion (Optional[int]): Nivel de compresión
+
+        Returns:
+            int: Cantidad de registros guardados
+        """
+        # Crear directorio si no existe
+        directorio = os.path.dirname(archivo)
+        if directorio and not os.path.exists(directorio):
+            os.makedirs(directorio)
+
+        resumen = ResumenFiguras()
+
+        # Guardar en un archivo temporal y reemplazar de forma atómica,
+        # para no dejar un archivo a medio escribir si el proceso cae
+        archivo_temporal = archivo + ".tmp"
+        cantidad = PersistenciaArchivos._escribir_registros(
+            PersistenciaArchivos._resumir(registros, resumen), archivo_temporal,
+            PersistenciaArchivos._formato_por_extension(archivo),
+            PersistenciaArchivos._compresion_por_extension(archivo), nivel_compresion
+        )
+        PersistenciaArchivos._reemplazar_atomicamente(archivo_temporal, archivo)
+        PersistenciaArchivos.guardar_resumen(resumen, archivo)
+
+        return cantidad
+
+    @staticmethod
+    def _resumir(registros: Iterable[Dict[str, Any]], resumen: ResumenFiguras) -> Iterator[Dict[str, Any]]:
+        """Deja pasar los registros acumulándolos en el resumen"""
+        for datos in registros:
+            resumen.agregar(datos)
+            yield datos
+
+    @staticmethod
+    def archivo_resumen(archivo: str) -> str:
+        """Obtiene la ruta del resumen que acompaña a un archivo de figuras"""
+        return archivo + ".resumen"
+
+    @staticmethod
+    def guardar_resumen(resumen: ResumenFiguras, archivo: str) -> None:
+        """
+        Escribe el resumen de un archivo de datos recién escrito
+
+        El resumen registra tamaño y fecha de modificación del archivo de
+        datos: si el proceso cae entre ambas escrituras, o el archivo se
+        modifica por otra vía, el resumen deja de coincidir y se descarta.
+        Un fallo aquí no invalida los datos ya guardados.
+
+        Args:
+            resumen (ResumenFiguras): Resumen del contenido del archivo
+            archivo (str): Archivo de datos al que corresponde
+        """
+        try:
+            estado = os.stat(archivo)
+            contenido = resumen.a_dict()
+            contenido['origen'] = {'tamano': estado.st_size, 'mtime_ns': estado.st_mtime_ns}
+
+            archivo_resumen = PersistenciaArchivos.archivo_resumen(archivo)
+            with open(archivo_resumen + ".tmp", 'w', encoding='utf-8') as f:
+                json.dump(contenido, f, ensure_ascii=False)
+            os.replace(archivo_resumen + ".tmp", archivo_resumen)
+
+        except Exception as e:
+            print(f"Error al guardar resumen: {e}")
+
+    @staticmethod
+    def leer_resumen(archivo: str) -> Optional[ResumenFiguras]:
+        """
+        Lee el resumen guardado de un archivo de figuras sin leer el archivo
+
+        En un repositorio fragmentado combina los resúmenes de sus fragmentos.
+
+        Args:
+            archivo (str): Archivo de figuras (o archivo base fragmentado)
+
+        Returns:
+            Optional[ResumenFiguras]: Resumen vigente, o None si falta o no
+                corresponde al contenido actual del archivo
+        """
+        if PersistenciaArchivos.esta_fragmentado(archivo):
+            resumen = ResumenFiguras()
+            for ruta in PersistenciaArchivos._rutas_fragmentos(archivo):
+                resumen_fragmento = PersistenciaArchivos.leer_resumen(ruta)
+                if resumen_fragmento is None:
+                    return None
+                resumen.combinar(resumen_fragmento)
+            return resumen
+
+        archivo_resumen = PersistenciaArchivos.archivo_resumen(archivo)
+        if not os.path.exists(archivo) or not os.path.exists(archivo_resumen):
+            return None
+
+        try:
+            with open(archivo_resumen, 'r', encoding='utf-8') as f:
+                contenido = json.load(f)
+
+            estado = os.stat(archivo)
+            origen = contenido.get('origen', {})
+            if origen.get('tamano') != estado.st_size or origen.get('mtime_ns') != estado.st_mtime_ns:
+                return None
+
+            return ResumenFiguras.desde_dict(contenido)
+
+        except Exception as e:
+            print(f"Error al leer resumen: {e}")
+            return None
+
+    @staticmethod
+    def obtener_resumen(archivo: str) -> ResumenFiguras:
+        """
+        Obtiene el resumen de un archivo, regenerándolo si no está vigente
+
+        La regeneración recorre los registros en streaming; solo instancia
+        figuras para calcular las métricas que los registros no traen.
+
+        Args:
+            archivo (str): Archivo de figuras (o archivo base fragmentado)
+
+        Returns:
+            ResumenFiguras: Resumen del contenido actual
+        """
+        resumen = PersistenciaArchivos.leer_resumen(archivo)
+        if resumen is not None:
+            return resumen
+
+        if PersistenciaArchivos.esta_fragmentado(archivo):
+            resumen = ResumenFiguras()
+            for ruta in PersistenciaArchivos._rutas_fragmentos(archivo):
+                resumen.combinar(PersistenciaArchivos.obtener_resumen(ruta))
+            return resumen
+
+        resumen = ResumenFiguras()
+        for datos in PersistenciaArchivos.iterar_registros(archivo):
+            resumen.agregar(datos)
+        if os.path.exists(archivo):
+            PersistenciaArchivos.guardar_resumen(resumen, archivo)
+        return resumen
+
+    @staticmethod
+    def archivo_distribuciones(archivo: str) -> str:
+        """Obtiene la ruta de las distribuciones que acompañan a un archivo de figuras"""
+        return archivo + ".cuantiles"
+
+    @staticmethod
+    def guardar_distribuciones(distribuciones: DistribucionesMetricas, archivo: str) -> None:
+        """
+        Escribe las distribuciones de métricas de un archivo de datos recién escrito
+
+        Como el resumen, registran tamaño y fecha de modificación del archivo
+        de datos y se descartan si dejan de coincidir.
+
+        Args:
+            distribuciones (DistribucionesMetricas): Distribuciones del contenido del archivo
+            archivo (str): Archivo de datos al que corresponden
+        """
+        try:
+            estado = os.stat(archivo)
+            contenido = distribuciones.a_dict()
+            contenido['origen'] = {'tamano': estado.st_size, 'mtime_ns': estado.st_mtime_ns}
+
+            archivo_distribuciones = PersistenciaArchivos.archivo_distribuciones(archivo)
+            with open(archivo_distribuciones + ".tmp", 'w', encoding='utf-8') as f:
+                json.dump(contenido, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(archivo_distribuciones + ".tmp", archivo_distribuciones)
+
+        except Exception as e:
+            print(f"Error al guardar distribuciones: {e}")
+
+    @staticmethod
+    def leer_distribuciones(archivo: str) -> Optional[DistribucionesMetricas]:
+        """
+        Lee las distribuciones guardadas de un archivo de figuras sin leer el archivo
+
+        En un repositorio fragmentado combina las de sus fragmentos.
+
+        Args:
+            archivo (str): Archivo de figuras (o archivo base fragmentado)
+
+        Returns:
+            Optional[DistribucionesMetricas]: Distribuciones vigentes, o None si
+                faltan o no corresponden al contenido actual del archivo
+        """
+        if PersistenciaArchivos.esta_fragmentado(archivo):
+            distribuciones = DistribucionesMetricas()
+            for ruta in PersistenciaArchivos._rutas_fragmentos(archivo):
+                distribuciones_fragmento = PersistenciaArchivos.leer_distribuciones(ruta)
+                if distribuciones_fragmento is None:
+                    return None
+                distribuciones.combinar(distribuciones_fragmento)
+            return distribuciones
+
+        archivo_distribuciones = PersistenciaArchivos.archivo_distribuciones(archivo)
+        if not os.path.exists(archivo) or not os.path.exists(archivo_distribuciones):
+            return None
+
+        try:
+            with open(archivo_distribuciones, 'r', encoding='utf-8') as f:
+                contenido = json.load(f)
+
+            estado = os.stat(archivo)
+            origen = contenido.get('origen', {})
+            if origen.get('tamano') != estado.st_size or origen.get('mtime_ns') != estado.st_mtime_ns:
+                return None
+
+            return DistribucionesMetricas.desde_dict(contenido)
+
+        except Exception as e:
+            print(f"Error al leer distribuciones: {e}")
+            return None
+
+    @staticmethod
+    def obtener_distribuciones(archivo: str) -> DistribucionesMetricas:
+        """
+        Obtiene las distribuciones de métricas de un archivo, regenerándolas si no están vigentes
+
+        La regeneración recorre los registros en streaming y deja guardadas
+        las distribuciones junto al archivo. Las de varios archivos se
+        combinan con DistribucionesMetricas.combinar.
+
+        Args:
+            archivo (str): Archivo de figuras (o archivo base fragmentado)
+
+        Returns:
+            DistribucionesMetricas: Distribuciones del contenido actual
+        """
+        distribuciones = PersistenciaArchivos.leer_distribuciones(archivo)
+        if distribuciones is not None:
+            return distribuciones
+
+        distribuciones = DistribucionesMetricas()
+        if PersistenciaArchivos.esta_fragmentado(archivo):
+            for ruta in PersistenciaArchivos._rutas_fragmentos(archivo):
+                distribuciones.combinar(PersistenciaArchivos.obtener_distribuciones(ruta))
+            return distribuciones
+
+        for datos in PersistenciaArchivos.iterar_registros(archivo):
+            metricas = PersistenciaArchivos.metricas_de_registro(datos)
+            if metricas:
+                distribuciones.agregar(datos['nombre'], metricas)
+        if os.path.exists(archivo):
+            PersistenciaArchivos.guardar_distribuciones(distribuciones, archivo)
+        return distribuciones
+
+    @staticmethod
+    def _reemplazar_atomicamente(archivo_temporal: str, archivo: str) -> None:
+        """
+        Sincroniza un archivo temporal con el disco y lo renombra sobre el destino
+
+        Tras una caída queda en disco la versión anterior completa o la nueva
+        completa, nunca una mezcla.
+
+        Args:
+            archivo_temporal (str): Archivo ya escrito
+            archivo (str): Ruta definitiva
+        """
+        with open(archivo_temporal, 'rb+') as f:
+            os.fsync(f.fileno())
+
+        os.replace(archivo_temporal, archivo)
+
+        # Sincronizar el directorio para que el renombrado sea durable (POSIX)
+        if hasattr(os, 'O_DIRECTORY'):
+            descriptor = os.open(os.path.dirname(os.path.abspath(archivo)), os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(descriptor)
+            finally:
+                os.close(descriptor)
+
+    @staticmethod
+    def _escribir_registros(registros: Iterable[Dict[str, Any]], archivo: str, formato: str,
+                            compresion: Optional[str] = None, nivel: Optional[int] = None) -> int:
+        """
+        Escribe registros en el formato indicado, de uno en uno
+
+        Args:
+            registros (Iterable[Dict[str, Any]]): Datos de las figuras
+            archivo (str): Ruta del archivo destino
+            formato (str): Formato de escritura
+            compresion (Optional[str]): Códec con que se comprime la salida
+            nivel (Optional[int]): Nivel de compresión
+
+        Returns:
+            int: Cantidad de registros escritos
+        """
+        if formato == PersistenciaArchivos.FORMATO_BINARIO and compresion is None:
+            return ArchivoBinarioFiguras.escribir(registros, archivo)
+
+        with PersistenciaArchivos._abrir_comprimido(archivo, 'wb', compresion, nivel) as binario:
+            if formato == PersistenciaArchivos.FORMATO_BINARIO:
+                return ArchivoBinarioFiguras.escribir_en_flujo(registros, binario)
+            if formato == PersistenciaArchivos.FORMATO_INTERCAMBIO:
+                return FormatoIntercambio.escribir_en_flujo(registros, binario)
+
+            with io.TextIOWrapper(binario, encoding='utf-8', newline='') as f:
+                if formato == PersistenciaArchivos.FORMATO_NDJSON:
+                    return PersistenciaArchivos._escribir_ndjson(registros, f)
+                return PersistenciaArchivos._escribir_arreglo_json(registros, f)
+
+    @staticmethod
+    def _escribir_ndjson(registros: Iterable[Dict[str, Any]], f: TextIO) -> int:
+        """Escribe un registro JSON compacto por línea"""
+        cantidad = 0
+        for datos in registros:
+            f.write(json.dumps(datos, ensure_ascii=False, separators=(',', ':')))
+            f.write("\n")
+            cantidad += 1
+        return cantidad
+
+    @staticmethod
+    def _escribir_arreglo_json(registros: Iterable[Dict[str, Any]], f: TextIO) -> int:
+        """Escribe un arreglo JSON indentado, idéntico al que produce json.dump(indent=2)"""
+        cantidad = 0
+        for datos in registros:
+            texto = json.dumps(datos, indent=2, ensure_ascii=False)
+            f.write("[\n  " if cantidad == 0 else ",\n  ")
+            f.write(texto.replace("\n", "\n  "))
+            cantidad += 1
+        f.write("[]" if cantidad == 0 else "\n]")
+        return cantidad
+
     @staticmethod
     def cargar_desde_archivo(archivo: str) -> List[Figura]:
         """
@@ -56,52 +556,568 @@ class PersistenciaArchivos:
         Returns:
             List[Figura]: Lista de figuras cargadas
         """
-        figuras = []
+        return list(PersistenciaArchivos.iterar_desde_archivo(archivo))
 
+    @staticmethod
+    def iterar_desde_archivo(archivo: str) -> Iterator[Figura]:
+        """
+        Recorre las figuras de un archivo sin cargarlo completo en memoria
+
+        Args:
+            archivo (str): Ruta del archivo a leer
+
+        Yields:
+            Figura: Cada figura válida del archivo, en orden
+        """
+        for datos in PersistenciaArchivos.iterar_registros(archivo):
+            figura = PersistenciaArchivos.dict_a_figura(datos)
+            if figura:
+                yield figura
+
+    @staticmethod
+    def iterar_registros(archivo: str) -> Iterator[Dict[str, Any]]:
+        """
+        Recorre los registros (diccionarios) de un archivo de figuras en streaming
+
+        Admite el arreglo JSON, el formato de una figura por línea y el
+        formato binario de ancho fijo. Un error de lectura se informa y termina el recorrido.
+
+        Args:
+            archivo (str): Ruta del archivo a leer
+
+        Yields:
+            Dict[str, Any]: Datos de cada figura
+        """
+        for _, datos in PersistenciaArchivos._iterar(archivo, False):
+            yield datos
+
+    @staticmethod
+    def iterar_registros_repositorio(archivo: str) -> Iterator[Dict[str, Any]]:
+        """
+        Recorre los registros de un repositorio, esté en un archivo o fragmentado
+
+        Args:
+            archivo (str): Archivo de figuras base
+
+        Yields:
+            Dict[str, Any]: Datos de cada figura
+        """
+        if not PersistenciaArchivos.esta_fragmentado(archivo):
+            yield from PersistenciaArchivos.iterar_registros(archivo)
+            return
+
+        for ruta in PersistenciaArchivos._rutas_fragmentos(archivo):
+            yield from PersistenciaArchivos.iterar_registros(ruta)
+
+    @staticmethod
+    def iterar_registros_con_desplazamiento(archivo: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Recorre los registros de un archivo junto con su ubicación en él
+
+        La ubicación es el desplazamiento en bytes del inicio del registro en
+        los formatos de texto, y la posición del registro en el formato
+        binario. Sirve para construir índices y leer luego un registro con
+        leer_registro_en sin recorrer el archivo.
+
+        Args:
+            archivo (str): Ruta del archivo a leer
+
+        Yields:
+            Tuple[int, Dict[str, Any]]: Ubicación y datos de cada figura
+        """
+        return PersistenciaArchivos._iterar(archivo, True)
+
+    @staticmethod
+    def _iterar(archivo: str, medir: bool) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Recorre los registros de un archivo, midiendo su ubicación si se pide"""
         try:
             if not os.path.exists(archivo):
-                return figuras
+                return
+
+            formato = PersistenciaArchivos.detectar_formato(archivo)
+            comprimido = PersistenciaArchivos.detectar_compresion(archivo) is not None
+
+            if formato == PersistenciaArchivos.FORMATO_BINARIO:
+                if comprimido:
+                    with PersistenciaArchivos.abrir_lectura(archivo) as f:
+                        yield from enumerate(ArchivoBinarioFiguras.iterar_flujo(f))
+                    return
+                with ArchivoBinarioFiguras(archivo) as binario:
+                    yield from enumerate(binario.iterar_registros())
+                return
 
-            with open(archivo, 'r', encoding='utf-8') as f:
-                datos_figuras = json.load(f)
+            if formato == PersistenciaArchivos.FORMATO_INTERCAMBIO:
+                with PersistenciaArchivos.abrir_lectura(archivo) as f:
+                    yield from FormatoIntercambio.iterar_flujo(f)
+                return
 
-            for datos in datos_figuras:
-                figura = PersistenciaArchivos._dict_a_figura(datos)
-                if figura:
-                    figuras.append(figura)
+            if formato == PersistenciaArchivos.FORMATO_NDJSON:
+                with PersistenciaArchivos.abrir_lectura(archivo) as f:
+                    desplazamiento = 0
+                    for linea in f:
+                        if linea.strip():
+                            yield desplazamiento, json.loads(linea)
+                        desplazamiento += len(linea)
+                return
+
+            # newline='' conserva los saltos de línea tal cual, para poder medir bytes
+            with io.TextIOWrapper(PersistenciaArchivos.abrir_lectura(archivo),
+                                  encoding='utf-8', newline='') as f:
+                yield from PersistenciaArchivos._iterar_arreglo_json(f, medir)
 
         except Exception as e:
             print(f"Error al cargar archivo: {e}")
 
-        return figuras
+    @staticmethod
+    def _iterar_arreglo_json(f: TextIO, medir: bool = False) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Decodifica incrementalmente los elementos de un arreglo JSON
+
+        Lee el archivo por bloques y decodifica cada elemento con
+        JSONDecoder.raw_decode, de modo que en memoria solo reside el bloque
+        actual y no el arreglo completo.
+
+        Args:
+            f (TextIO): Archivo abierto en modo texto
+            medir (bool): Si debe calcular el desplazamiento en bytes de cada elemento
+                (si no, se informa -1)
+
+        Yields:
+            Tuple[int, Dict[str, Any]]: Desplazamiento y datos de cada elemento
+        """
+        decodificador = json.JSONDecoder()
+        tamano_bloque = PersistenciaArchivos.TAMANO_BLOQUE_LECTURA
+        buffer = f.read(tamano_bloque)
+        posicion = 0
+
+        # Bytes anteriores a buffer[posicion_medida], acumulados de forma incremental
+        bytes_medidos = 0
+        posicion_medida = 0
+
+        def avanzar_medicion(hasta: int) -> None:
+            nonlocal bytes_medidos, posicion_medida
+            if medir:
+                bytes_medidos += len(buffer[posicion_medida:hasta].encode('utf-8'))
+            posicion_medida = hasta
+
+        while posicion < len(buffer) and buffer[posicion].isspace():
+            posicion += 1
+        if posicion >= len(buffer):
+            return
+        if buffer[posicion] != '[':
+            raise ValueError("El archivo no contiene un arreglo JSON")
+
+        posicion += 1
+        while True:
+            # Saltar espacios y separadores, leyendo más si se agota el bloque
+            while posicion < len(buffer) and buffer[posicion] in " \t\r\n,":
+                posicion += 1
+
+            if posicion >= len(buffer):
+                bloque = f.read(tamano_bloque)
+                if not bloque:
+                    raise ValueError("Arreglo JSON incompleto")
+                avanzar_medicion(posicion)
+                buffer, posicion, posicion_medida = bloque, 0, 0
+                continue
+
+            if buffer[posicion] == ']':
+                return
+
+            try:
+                datos, fin = decodificador.raw_decode(buffer, posicion)
+            except json.JSONDecodeError:
+                # El elemento continúa en el siguiente bloque
+                bloque = f.read(tamano_bloque)
+                if not bloque:
+                    raise
+                avanzar_medicion(posicion)
+                buffer, posicion, posicion_medida = buffer[posicion:] + bloque, 0, 0
+                continue
+
+            avanzar_medicion(posicion)
+            yield (bytes_medidos if medir else -1), datos
+            posicion = fin
+
+    @staticmethod
+    def leer_registro_en(f: BinaryIO, desplazamiento: int, formato: str) -> Dict[str, Any]:
+        """
+        Lee un único registro a partir de su ubicación
+
+        En un archivo comprimido el desplazamiento se refiere al contenido
+        descomprimido, y posicionarse obliga al códec a descomprimir desde
+        el inicio: funciona, pero pierde el acceso directo.
+
+        Args:
+            f (BinaryIO): Archivo de figuras abierto con abrir_lectura
+            desplazamiento (int): Ubicación obtenida al indexar (posición del
+                registro en el formato binario)
+            formato (str): FORMATO_JSON, FORMATO_NDJSON, FORMATO_BINARIO o FORMATO_INTERCAMBIO
+
+        Returns:
+            Dict[str, Any]: Datos de la figura
+        """
+        if formato == PersistenciaArchivos.FORMATO_BINARIO:
+            return ArchivoBinarioFiguras.leer_registro_de_flujo(f, desplazamiento)
+        if formato == PersistenciaArchivos.FORMATO_INTERCAMBIO:
+            return FormatoIntercambio.leer_registro_de_flujo(f, desplazamiento)
+
+        f.seek(desplazamiento)
+
+        if formato == PersistenciaArchivos.FORMATO_NDJSON:
+            return json.loads(f.readline())
+
+        decodificador = json.JSONDecoder()
+        decodificador_utf8 = codecs.getincrementaldecoder('utf-8')()
+        texto = ""
+        while True:
+            bloque = f.read(PersistenciaArchivos.TAMANO_BLOQUE_LECTURA)
+            texto += decodificador_utf8.decode(bloque, final=not bloque)
+            try:
+                datos, _ = decodificador.raw_decode(texto)
+                return datos
+            except json.JSONDecodeError:
+                if not bloque:
+                    raise
+
+    @staticmethod
+    def archivo_manifiesto(archivo: str) -> str:
+        """Obtiene la ruta del manifiesto de fragmentos de un archivo de figuras"""
+        return archivo + ".fragmentos"
+
+    @staticmethod
+    def esta_fragmentado(archivo: str) -> bool:
+        """
+        Indica si el repositorio de un archivo está guardado en fragmentos
+
+        Args:
+            archivo (str): Archivo de figuras base
+
+        Returns:
+            bool: True si existe su manifiesto de fragmentos
+        """
+        return os.path.exists(PersistenciaArchivos.archivo_manifiesto(archivo))
+
+    @staticmethod
+    def leer_manifiesto(archivo: str) -> Dict[str, Any]:
+        """
+        Lee el manifiesto de fragmentos de un archivo de figuras
+
+        Args:
+            archivo (str): Archivo de figuras base
+
+        Returns:
+            Dict[str, Any]: 'estrategia', 'limites', 'archivos', 'id_maximo' y
+                'generacion' (0 en manifiestos anteriores a las generaciones)
+        """
+        with open(PersistenciaArchivos.archivo_manifiesto(archivo), 'r', encoding='utf-8') as f:
+            manifiesto = json.load(f)
+        manifiesto.setdefault('generacion', 0)
+        return manifiesto
+
+    @staticmethod
+    def _rutas_fragmentos(archivo: str) -> List[str]:
+        """Obtiene las rutas de los fragmentos listados en el manifiesto"""
+        directorio = os.path.dirname(archivo)
+        return [os.path.join(directorio, nombre)
+                for nombre in PersistenciaArchivos.leer_manifiesto(archivo)['archivos']]
+
+    @staticmethod
+    def _ruta_fragmento(archivo: str, numero: int, generacion: int) -> str:
+        """Obtiene la ruta del fragmento N de una generación, conservando formato y compresión"""
+        raiz, extension = os.path.splitext(archivo)
+        if PersistenciaArchivos._compresion_por_extension(archivo):
+            raiz, extension_formato = os.path.splitext(raiz)
+            extension = extension_formato + extension
+        return f"{raiz}.g{generacion}.frag{numero}{extension}"
+
+    @staticmethod
+    def _eliminar_archivos_fragmentos(rutas: Iterable[str]) -> None:
+        """Borra fragmentos que ya no están en el manifiesto, junto con sus archivos auxiliares"""
+        for ruta in rutas:
+            for archivo in (ruta, ruta + ".idx", PersistenciaArchivos.archivo_resumen(ruta),
+                            PersistenciaArchivos.archivo_distribuciones(ruta)):
+                try:
+                    os.remove(archivo)
+                except FileNotFoundError:
+                    pass
+
+    @staticmethod
+    def eliminar_fragmentos(archivo: str) -> None:
+        """
+        Deja de guardar un repositorio en fragmentos: borra el manifiesto y luego los fragmentos
+
+        Args:
+            archivo (str): Archivo de figuras base
+        """
+        if not PersistenciaArchivos.esta_fragmentado(archivo):
+            return
+        rutas = PersistenciaArchivos._rutas_fragmentos(archivo)
+        os.remove(PersistenciaArchivos.archivo_manifiesto(archivo))
+        PersistenciaArchivos._eliminar_archivos_fragmentos(rutas)
+
+    @staticmethod
+    def guardar_en_fragmentos(figuras: Dict[int, Figura], archivo: str, cantidad: int,
+                              estrategia: str = ESTRATEGIA_HASH,
+                              nivel_compresion: Optional[int] = None,
+                              incluir_metricas: bool = False) -> bool:
+        """
+        Guarda las figuras repartidas en varios archivos (fragmentos)
+
+        Con la estrategia por hash cada figura va al fragmento id % cantidad;
+        con la estrategia por rango los IDs ordenados se dividen en tramos
+        consecutivos de igual tamaño. Un manifiesto (<archivo>.fragmentos)
+        lista los fragmentos, la estrategia y el ID máximo global.
+
+        Cada guardado es una generación nueva: sus fragmentos se escriben con
+        otro nombre (<raiz>.g<generación>.frag<N>), sin tocar los que lista el
+        manifiesto vigente; luego el manifiesto se reemplaza de forma atómica
+        y recién entonces se borran los fragmentos de la generación anterior.
+        Tras una caída el manifiesto describe siempre una generación completa.
+
+        Args:
+            figuras (Dict[int, Figura]): Diccionario de figuras a guardar
+            archivo (str): Archivo base; los fragmentos toman su formato por extensión
+            cantidad (int): Cantidad de fragmentos
+            estrategia (str): ESTRATEGIA_HASH o ESTRATEGIA_RANGO
+            nivel_compresion (Optional[int]): Nivel de compresión de los fragmentos
+            incluir_metricas (bool): Si cada registro lleva sus métricas derivadas
+
+        Returns:
+            bool: True si se guardó exitosamente
+        """
+        try:
+            if cantidad < 1:
+                raise ValueError("La cantidad de fragmentos debe ser al menos 1")
+
+            limites: List[int] = []
+            if estrategia == PersistenciaArchivos.ESTRATEGIA_RANGO:
+                ids = sorted(figuras)
+                tramo = -(-len(ids) // cantidad) if ids else 1
+                limites = [ids[i] for i in range(tramo, len(ids), tramo)][:cantidad - 1]
+            elif estrategia != PersistenciaArchivos.ESTRATEGIA_HASH:
+                raise ValueError(f"Estrategia de fragmentación no válida: {estrategia}")
+
+            repartidas: List[List[Figura]] = [[] for _ in range(cantidad)]
+            for id_figura, figura in figuras.items():
+                numero = PersistenciaArchivos._numero_fragmento(id_figura, cantidad, estrategia, limites)
+                repartidas[numero].append(figura)
+
+            anteriores: List[str] = []
+            generacion = 1
+            if PersistenciaArchivos.esta_fragmentado(archivo):
+                anteriores = PersistenciaArchivos._rutas_fragmentos(archivo)
+                generacion = PersistenciaArchivos.leer_manifiesto(archivo)['generacion'] + 1
+
+            archivos = []
+            for numero, figuras_fragmento in enumerate(repartidas):
+                ruta = PersistenciaArchivos._ruta_fragmento(archivo, numero, generacion)
+                if not PersistenciaArchivos.guardar_en_archivo(
+                        {figura.get_id(): figura for figura in figuras_fragmento}, ruta, nivel_compresion,
+                        incluir_metricas):
+                    return False
+                archivos.append(os.path.basename(ruta))
+
+            manifiesto = {
+                'version': 1,
+                'estrategia': estrategia,
+                'limites': limites,
+                'archivos': archivos,
+                'id_maximo': max(figuras, default=0),
+                'generacion': generacion,
+            }
+            archivo_manifiesto = PersistenciaArchivos.archivo_manifiesto(archivo)
+            with open(archivo_manifiesto + ".tmp", 'w', encoding='utf-8') as f:
+                json.dump(manifiesto, f, indent=2, ensure_ascii=False)
+            PersistenciaArchivos._reemplazar_atomicamente(archivo_manifiesto + ".tmp", archivo_manifiesto)
+
+            directorio = os.path.dirname(archivo)
+            vigentes = {os.path.join(directorio, nombre) for nombre in archivos}
+            PersistenciaArchivos._eliminar_archivos_fragmentos(
+                ruta for ruta in anteriores if ruta not in vigentes)
+
+            return True
+
+        except Exception as e:
+            print(f"Error al guardar fragmentos: {e}")
+            return False
+
+    @staticmethod
+    def _numero_fragmento(id_figura: int, cantidad: int, estrategia: str, limites: List[int]) -> int:
+        """Calcula a qué fragmento corresponde un ID"""
+        if estrategia == PersistenciaArchivos.ESTRATEGIA_RANGO:
+            return bisect.bisect_right(limites, id_figura)
+        return id_figura % cantidad
+
+    @staticmethod
+    def cargar_fragmentos_en_paralelo(archivo: str,
+                                      procesos: Optional[int] = None) -> Iterator[Tuple[List[Figura], int]]:
+        """
+        Carga los fragmentos de un repositorio en un pool de procesos
+
+        Cada proceso lee y construye las figuras de un fragmento; el proceso
+        llamador recibe cada fragmento ya construido junto con su ID máximo,
+        a medida que terminan, para volcarlo en su diccionario.
+
+        Args:
+            archivo (str): Archivo base del repositorio fragmentado
+            procesos (Optional[int]): Cantidad de procesos (por defecto, uno por
+                núcleo sin superar la cantidad de fragmentos)
+
+        Yields:
+            Tuple[List[Figura], int]: Figuras de un fragmento y su ID máximo
+        """
+        rutas = PersistenciaArchivos._rutas_fragmentos(archivo)
+        procesos = min(procesos or os.cpu_count() or 1, len(rutas))
+
+        if procesos <= 1:
+            for ruta in rutas:
+                yield _cargar_fragmento(ruta)
+            return
+
+        with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+            yield from ejecutor.map(_cargar_fragmento, rutas)
+
+    @staticmethod
+    def convertir_archivo(origen: str, destino: str, nivel_compresion: Optional[int] = None) -> int:
+        """
+        Convierte un archivo de figuras entre formatos sin pérdida
+
+        El formato y la compresión de origen se detectan por contenido y los
+        de destino por la extensión (por ejemplo figuras.json -> figuras.figb
+        o figuras.jsonl.xz, y viceversa). Los registros se copian en
+        streaming sin instanciar las figuras, y el resumen del destino se
+        calcula en la misma pasada.
+
+        Args:
+            origen (str): Archivo a convertir
+            destino (str): Archivo a generar
+            nivel_compresion (Optional[int]): Nivel de compresión del destino
+
+        Returns:
+            int: Cantidad de figuras convertidas
+        """
+        resumen = ResumenFiguras()
+        cantidad = PersistenciaArchivos._escribir_registros(
+            PersistenciaArchivos._resumir(PersistenciaArchivos.iterar_registros(origen), resumen),
+            destino,
+            PersistenciaArchivos._formato_por_extension(destino),
+            PersistenciaArchivos._compresion_por_extension(destino),
+            nivel_compresion
+        )
+        PersistenciaArchivos.guardar_resumen(resumen, destino)
+        return cantidad
+
+    @staticmethod
+    def exportar_intercambio(registros: Iterable[Dict[str, Any]], destino: BinaryIO,
+                             tamano_bloque: int = FormatoIntercambio.TAMANO_BLOQUE_DEFECTO) -> int:
+        """
+        Exporta registros al formato de intercambio sobre un flujo
+
+        A diferencia de convertir_archivo, el destino puede ser cualquier
+        flujo binario (un socket, una tubería hacia la aplicación Java) y se
+        elige cuántos registros viajan por bloque.
+
+        Args:
+            registros (Iterable[Dict[str, Any]]): Datos de las figuras, por ejemplo
+                iterar_registros_repositorio(archivo)
+            destino (BinaryIO): Flujo binario de salida
+            tamano_bloque (int): Registros por bloque
+
+        Returns:
+            int: Cantidad de figuras exportadas
+        """
+        return FormatoIntercambio.escribir_en_flujo(registros, destino, tamano_bloque)
 
     @staticmethod
-    def _figura_a_dict(figura: Figura) -> Dict[str, Any]:
+    def importar_intercambio(origen: BinaryIO) -> Iterator[List[Figura]]:
+        """
+        Importa figuras del formato de intercambio de a un bloque por vez
+
+        Solo reside en memoria el bloque actual, de modo que cada bloque se
+        puede almacenar (por ejemplo con almacenar_lote) antes de leer el
+        siguiente. Los registros de tipos no registrados se saltean.
+
+        Args:
+            origen (BinaryIO): Flujo binario posicionado al inicio
+
+        Yields:
+            List[Figura]: Figuras de cada bloque
+
+        Raises:
+            ValueError: Si el flujo no es de intercambio o un bloque está dañado
+        """
+        for bloque in FormatoIntercambio.iterar_bloques(origen):
+            yield [PersistenciaArchivos.dict_a_figura(datos) for datos in bloque]
+
+    @staticmethod
+    def figura_a_dict(figura: Figura, incluir_metricas: bool = False) -> Dict[str, Any]:
         """
         Convierte una figura a diccionario para serialización
 
         Args:
             figura (Figura): Figura a convertir
+            incluir_metricas (bool): Si se agregan sus métricas derivadas en 'metricas'
 
         Returns:
             Dict[str, Any]: Diccionario con datos de la figura
+
+        Raises:
+            ValueError: Si la clase de la figura no está en RegistroFiguras
         """
-        datos = {
-            'id': figura.get_id(),
-            'nombre': figura.get_nombre(),
-            'tipo': figura.get_tipo()
-        }
+        tipo = RegistroFiguras.obtener_de_figura(figura)
+        if tipo is None:
+            raise ValueError(f"Tipo de figura no registrado: {type(figura).__name__}")
 
-        # Agregar atributos específicos según el tipo
-        if hasattr(figura, 'get_radio'):
-            datos['radio'] = figura.get_radio()
-        elif hasattr(figura, 'get_lado'):
-            datos['lado'] = figura.get_lado()
+        return tipo.a_dict(figura, incluir_metricas)
 
-        return datos
+    @staticmethod
+    def metricas_de_registro(datos: Dict[str, Any]) -> Dict[str, float]:
+        """
+        Obtiene las métricas derivadas de un registro
+
+        Si el registro se guardó con sus métricas se leen tal cual, sin
+        construir la figura; si no, se construye y se calculan.
+
+        Args:
+            datos (Dict[str, Any]): Diccionario con datos de la figura
+
+        Returns:
+            Dict[str, float]: Métricas de la figura (vacío si el tipo no se conoce)
+        """
+        metricas = datos.get('metricas')
+        if metricas is not None:
+            return metricas
+
+        figura = PersistenciaArchivos.dict_a_figura(datos)
+        return figura.obtener_metricas() if figura else {}
+
+    @staticmethod
+    def filtrar_por_metrica(archivo: str, metrica: str, minimo: Optional[float] = None,
+                            maximo: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Recorre los registros de un repositorio cuya métrica cae en un rango
+
+        Con un archivo guardado con métricas el filtro no instancia figuras.
+
+        Args:
+            archivo (str): Archivo del repositorio
+            metrica (str): 'area', 'perimetro', 'volumen' o 'area_superficie'
+            minimo (Optional[float]): Cota inferior inclusiva (sin cota si es None)
+            maximo (Optional[float]): Cota superior inclusiva (sin cota si es None)
+
+        Yields:
+            Dict[str, Any]: Datos de cada figura que tiene la métrica dentro del rango
+        """
+        for datos in PersistenciaArchivos.iterar_registros_repositorio(archivo):
+            valor = PersistenciaArchivos.metricas_de_registro(datos).get(metrica)
+            if valor is None:
+                continue
+            if (minimo is None or valor >= minimo) and (maximo is None or valor <= maximo):
+                yield datos
 
     @staticmethod
-    def _dict_a_figura(datos: Dict[str, Any]) -> Figura:
+    def dict_a_figura(datos: Dict[str, Any]) -> Figura:
         """
         Convierte un diccionario a figura
 
@@ -112,31 +1128,26 @@ class PersistenciaArchivos:
             Figura: Figura creada o None si hay error
         """
         try:
-            nombre = datos['nombre'].lower()
-
-            if 'radio' in datos:
-                if nombre == 'círculo':
-                    from Circulo import Circulo
-                    figura = Circulo(datos['radio'], datos['id'])
-                elif nombre == 'esfera':
-                    from Esfera import Esfera
-                    figura = Esfera(datos['radio'], datos['id'])
-                else:
-                    return None
-            elif 'lado' in datos:
-                if nombre == 'cuadrado':
-                    from Cuadrado import Cuadrado
-                    figura = Cuadrado(datos['lado'], datos['id'])
-                elif nombre == 'cubo':
-                    from Cubo import Cubo
-                    figura = Cubo(datos['lado'], datos['id'])
-                else:
-                    return None
-            else:
+            tipo = RegistroFiguras.obtener(datos['nombre'])
+            if tipo is None:
                 return None
 
-            return figura
+            return tipo.desde_dict(datos)
 
         except Exception as e:
             print(f"Error al convertir datos a figura: {e}")
             return None
+
+
+def _cargar_fragmento(ruta: str) -> Tuple[List[Figura], int]:
+    """
+    Carga un fragmento en un proceso del pool (función de módulo para poder serializarla)
+
+    Args:
+        ruta (str): Archivo del fragmento
+
+    Returns:
+        Tuple[List[Figura], int]: Figuras del fragmento y su ID máximo
+    """
+    figuras = PersistenciaArchivos.cargar_desde_archivo(ruta)
+    return figuras, max((figura.get_id() for figura in figuras), default=0)
@@ -0,0 +1,82 @@
+"""
+Política de guardado automático del repositorio
+"""
+# pylint: disable=invalid-name
+from typing import Optional
+
+
+class PoliticaGuardado:
+    """
+    Define cuándo el repositorio vuelca a disco las modificaciones pendientes
+
+    Las condiciones se combinan: el volcado ocurre en cuanto se cumple
+    cualquiera de las configuradas (un valor 0 la desactiva).
+    """
+
+    def __init__(self, cada_operaciones: int = 0, cada_ms: int = 0, inactividad_ms: int = 0):
+        """
+        Constructor de la política
+
+        Args:
+            cada_operaciones (int): Volcar al acumular esta cantidad de modificaciones
+            cada_ms (int): Volcar a lo sumo estos milisegundos después de la
+                primera modificación pendiente
+            inactividad_ms (int): Volcar tras estos milisegundos sin modificaciones
+
+        Raises:
+            ValueError: Si algún valor es negativo
+        """
+        if cada_operaciones < 0 or cada_ms < 0 or inactividad_ms < 0:
+            raise ValueError("Los valores de la política no pueden ser negativos")
+
+        self._cada_operaciones = cada_operaciones
+        self._cada_ms = cada_ms
+        self._inactividad_ms = inactividad_ms
+
+    @staticmethod
+    def inmediata() -> 'PoliticaGuardado':
+        """Política que vuelca cada modificación en el momento (comportamiento clásico)"""
+        return PoliticaGuardado(cada_operaciones=1)
+
+    def get_cada_operaciones(self) -> int:
+        """Obtiene la cantidad de modificaciones que provoca un volcado"""
+        return self._cada_operaciones
+
+    def get_cada_ms(self) -> int:
+        """Obtiene el retardo máximo en milisegundos desde la primera modificación"""
+        return self._cada_ms
+
+    def get_inactividad_ms(self) -> int:
+        """Obtiene los milisegundos de inactividad que provocan un volcado"""
+        return self._inactividad_ms
+
+    def es_inmediata(self) -> bool:
+        """Indica si cada modificación se vuelca inmediatamente"""
+        return self._cada_operaciones == 1 or not (
+            self._cada_operaciones or self._cada_ms or self._inactividad_ms
+        )
+
+    def requiere_hilo(self) -> bool:
+        """Indica si la política necesita un hilo de volcado en segundo plano"""
+        return not self.es_inmediata() and bool(self._cada_ms or self._inactividad_ms)
+
+    def segundos_hasta_volcado(self, primera: float, ultima: float, ahora: float) -> Optional[float]:
+        """
+        Calcula cuánto falta para el próximo volcado por tiempo
+
+        Args:
+            primera (float): Instante (monotónico) de la primera modificación pendiente
+            ultima (float): Instante (monotónico) de la última modificación
+            ahora (float): Instante actual
+
+        Returns:
+            Optional[float]: Segundos restantes (<= 0 si ya corresponde) o None
+                si la política no tiene condiciones de tiempo
+        """
+        plazos = []
+        if self._cada_ms:
+            plazos.append(primera + self._cada_ms / 1000 - ahora)
+        if self._inactividad_ms:
+            plazos.append(ultima + self._inactividad_ms / 1000 - ahora)
+
+        return min(plazos) if plazos else None
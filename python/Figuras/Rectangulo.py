@@ -0,0 +1,66 @@
+"""
+Clase Rectangulo - Figura bidimensional
+"""
+# pylint: disable=invalid-name
+from Figura2d import Figura2d
+
+class Rectangulo(Figura2d):
+    """Clase que representa un rectángulo"""
+
+    def __init__(self, base: float, altura: float, id_figura: int):
+        """
+        Constructor de la clase Rectangulo
+
+        Args:
+            base (float): Base del rectángulo
+            altura (float): Altura del rectángulo
+            id_figura (int): Identificador único de la figura
+
+        Raises:
+            ValueError: Si la base o la altura son menores o iguales a cero
+        """
+        if base <= 0 or altura <= 0:
+            raise ValueError("La base y la altura deben ser mayores que cero")
+        super().__init__("Rectángulo", id_figura)
+        self._base = base
+        self._altura = altura
+
+    def calcular_area(self) -> float:
+        """Calcula el área del rectángulo"""
+        return self._base * self._altura
+
+    def calcular_perimetro(self) -> float:
+        """Calcula el perímetro del rectángulo"""
+        return 2 * (self._base + self._altura)
+
+    def get_base(self) -> float:
+        """Obtiene la base del rectángulo"""
+        return self._base
+
+    def set_base(self, base: float) -> None:
+        """Establece la base del rectángulo"""
+        if base <= 0:
+            raise ValueError("La base debe ser mayor que cero")
+        anterior = self._base
+        self._base = base
+        self._notificar_cambio('base', anterior)
+
+    def get_altura(self) -> float:
+        """Obtiene la altura del rectángulo"""
+        return self._altura
+
+    def set_altura(self, altura: float) -> None:
+        """Establece la altura del rectángulo"""
+        if altura <= 0:
+            raise ValueError("La altura debe ser mayor que cero")
+        anterior = self._altura
+        self._altura = altura
+        self._notificar_cambio('altura', anterior)
+
+    def __str__(self) -> str:
+        """Representación en cadena del rectángulo"""
+        return f"Rectángulo(id={self.get_id()}, base={self._base:.2f}, altura={self._altura:.2f})"
+
+    def __repr__(self) -> str:
+        """Representación técnica del rectángulo"""
+        return f"Rectangulo(base={self._base}, altura={self._altura}, id_figura={self.get_id()})"
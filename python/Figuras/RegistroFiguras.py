@@ -0,0 +1,140 @@
+"""
+Registro central de los tipos de figura disponibles
+"""
+# pylint: disable=invalid-name
+from typing import Dict, List, Optional, Type
+from Figura import Figura
+from TipoFigura import TipoFigura
+from Circulo import Circulo
+from Cuadrado import Cuadrado
+from Cubo import Cubo
+from Esfera import Esfera
+from Rectangulo import Rectangulo
+from Cilindro import Cilindro
+from Cono import Cono
+
+class RegistroFiguras:
+    """
+    Registro de tipos de figura, consultado con búsquedas O(1) por clase,
+    por clave o nombre y por código binario
+
+    La fábrica, la persistencia y el formateador despachan a través de este
+    registro, de modo que agregar un tipo de figura solo requiere su clase y
+    una llamada a registrar().
+    """
+
+    _por_clase: Dict[Type[Figura], TipoFigura] = {}
+    _por_nombre: Dict[str, TipoFigura] = {}
+    _por_codigo: Dict[int, TipoFigura] = {}
+    _tipos: List[TipoFigura] = []
+
+    # Forma de nombrar cada dimensión al pedirla al usuario
+    _DESCRIPCIONES_DIMENSIONES = {
+        'radio': "el radio",
+        'lado': "el lado",
+        'base': "la base",
+        'altura': "la altura",
+    }
+
+    @classmethod
+    def registrar(cls, tipo: TipoFigura) -> None:
+        """
+        Registra un tipo de figura
+
+        Args:
+            tipo (TipoFigura): Tipo a registrar
+
+        Raises:
+            ValueError: Si su clave, nombre, código o clase ya están registrados
+        """
+        claves = {tipo.get_clave().lower(), tipo.get_nombre().lower()}
+        if (tipo.get_codigo() in cls._por_codigo or tipo.get_clase() in cls._por_clase
+                or any(clave in cls._por_nombre for clave in claves)):
+            raise ValueError(f"Tipo de figura ya registrado: {tipo.get_clave()}")
+
+        cls._por_clase[tipo.get_clase()] = tipo
+        cls._por_codigo[tipo.get_codigo()] = tipo
+        for clave in claves:
+            cls._por_nombre[clave] = tipo
+        cls._tipos.append(tipo)
+
+    @classmethod
+    def obtener(cls, clave: str) -> Optional[TipoFigura]:
+        """
+        Busca un tipo por su clave o por el nombre de sus figuras
+
+        Args:
+            clave (str): Clave ('circulo') o nombre ('Círculo'), sin distinguir mayúsculas
+
+        Returns:
+            Optional[TipoFigura]: Tipo encontrado o None
+        """
+        return cls._por_nombre.get(clave.lower())
+
+    @classmethod
+    def obtener_por_codigo(cls, codigo: int) -> Optional[TipoFigura]:
+        """
+        Busca un tipo por su código binario
+
+        Args:
+            codigo (int): Código del tipo
+
+        Returns:
+            Optional[TipoFigura]: Tipo encontrado o None
+        """
+        return cls._por_codigo.get(codigo)
+
+    @classmethod
+    def obtener_de_figura(cls, figura: Figura) -> Optional[TipoFigura]:
+        """
+        Obtiene el tipo de una figura a partir de su clase
+
+        Args:
+            figura (Figura): Figura a consultar
+
+        Returns:
+            Optional[TipoFigura]: Tipo registrado para su clase o None
+        """
+        return cls._por_clase.get(type(figura))
+
+    @classmethod
+    def tipos(cls) -> List[TipoFigura]:
+        """
+        Obtiene los tipos registrados en orden de registro
+
+        Returns:
+            List[TipoFigura]: Tipos registrados
+        """
+        return list(cls._tipos)
+
+    @classmethod
+    def claves(cls) -> List[str]:
+        """
+        Obtiene las claves de los tipos registrados en orden de registro
+
+        Returns:
+            List[str]: Claves de los tipos
+        """
+        return [tipo.get_clave() for tipo in cls._tipos]
+
+    @classmethod
+    def describir_dimension(cls, dimension: str) -> str:
+        """
+        Obtiene cómo nombrar una dimensión en un mensaje ('el radio', 'la altura')
+
+        Args:
+            dimension (str): Nombre de la dimensión
+
+        Returns:
+            str: Dimensión precedida de su artículo
+        """
+        return cls._DESCRIPCIONES_DIMENSIONES.get(dimension, f"el valor de {dimension}")
+
+
+RegistroFiguras.registrar(TipoFigura("circulo", 1, Circulo, "Círculo", "2D", ("radio",)))
+RegistroFiguras.registrar(TipoFigura("cuadrado", 2, Cuadrado, "Cuadrado", "2D", ("lado",)))
+RegistroFiguras.registrar(TipoFigura("cubo", 3, Cubo, "Cubo", "3D", ("lado",)))
+RegistroFiguras.registrar(TipoFigura("esfera", 4, Esfera, "Esfera", "3D", ("radio",)))
+RegistroFiguras.registrar(TipoFigura("rectangulo", 5, Rectangulo, "Rectángulo", "2D", ("base", "altura")))
+RegistroFiguras.registrar(TipoFigura("cilindro", 6, Cilindro, "Cilindro", "3D", ("radio", "altura")))
+RegistroFiguras.registrar(TipoFigura("cono", 7, Cono, "Cono", "3D", ("radio", "altura")))
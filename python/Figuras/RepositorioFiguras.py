@@ -2,30 +2,213 @@
 Repositorio para manejar la colección de figuras
 """
 # pylint: disable=invalid-name
-from typing import Dict, List, Optional
+import heapq
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Any, ContextManager, Dict, Iterator, List, MutableMapping, Optional, Set, Tuple, Union
 from Figura import Figura
+from AgregadorMetricas import AgregadorMetricas
 from PersistenciaArchivos import PersistenciaArchivos
 from GeneradorID import GeneradorID
+from DiarioFiguras import DiarioFiguras
+from PoliticaGuardado import PoliticaGuardado
+from MapaFigurasPerezoso import MapaFigurasPerezoso
+from MapaFigurasAcotado import MapaFigurasAcotado
+from RegistroFiguras import RegistroFiguras
+from ImagenReinicio import ImagenReinicio
+from ResumenFiguras import ResumenFiguras
+from CerrojoArchivo import CerrojoArchivo
+from HistorialFiguras import HistorialFiguras
+from IndiceTipos import IndiceTipos
+from IndiceMetricas import IndiceMetricas
+from DistribucionesMetricas import DistribucionesMetricas
+from UnidadAdapter import UnidadAdapter
+from UnidadMedida import UnidadMedida
 
 class RepositorioFiguras:
     """Repositorio para gestionar la colección de figuras geométricas"""
 
-    def __init__(self, archivo_persistencia: str = "figuras.json", auto_guardar: bool = True):
+    # Métrica derivada -> categoría de las figuras que la tienen
+    CATEGORIAS_METRICAS = {'area': "2D", 'perimetro': "2D", 'volumen': "3D", 'area_superficie': "3D"}
+
+    def __init__(self, archivo_persistencia: str = "figuras.json",
+                 auto_guardar: Union[bool, PoliticaGuardado] = True,
+                 usar_diario: bool = False,
+                 umbral_compactacion: int = DiarioFiguras.UMBRAL_COMPACTACION_DEFECTO,
+                 carga_perezosa: bool = False,
+                 fragmentos: int = 0,
+                 estrategia_fragmentos: str = PersistenciaArchivos.ESTRATEGIA_HASH,
+                 nivel_compresion: Optional[int] = None,
+                 imagen_reinicio: bool = False,
+                 concurrente: bool = False,
+                 intervalo_refresco: float = 0.0,
+                 capacidad_memoria: int = 0,
+                 guardar_metricas: bool = False,
+                 historial: bool = False):
         """
         Constructor del repositorio
 
         Args:
             archivo_persistencia (str): Archivo para persistencia de datos
-            auto_guardar (bool): Si debe guardar automáticamente al modificar
+            auto_guardar (Union[bool, PoliticaGuardado]): Si debe guardar automáticamente
+                al modificar; con una PoliticaGuardado las modificaciones se agrupan y
+                se vuelcan según la política (por operaciones, tiempo o inactividad)
+            usar_diario (bool): Si cada modificación se anexa a un diario en lugar
+                de reescribir el archivo completo
+            umbral_compactacion (int): Tamaño en bytes del diario a partir del cual
+                se compacta en un nuevo snapshot
+            carga_perezosa (bool): Si las figuras se leen del archivo recién al
+                accederlas, usando un índice ID -> ubicación, en lugar de cargarlas
+                todas al iniciar
+            fragmentos (int): Si es mayor que cero, los snapshots se guardan repartidos
+                en esa cantidad de archivos, que se cargan en paralelo
+            estrategia_fragmentos (str): Reparto de IDs entre fragmentos (hash o rango)
+            nivel_compresion (Optional[int]): Nivel de compresión de los snapshots
+                cuando el archivo termina en .gz, .bz2 o .xz
+            imagen_reinicio (bool): Si al cerrar se vuelca el estado en memoria a una
+                imagen (<archivo>.imagen) desde la que se reinicia sin analizar los datos
+            concurrente (bool): Si otros procesos pueden escribir el mismo archivo. Cada
+                escritura toma un cerrojo (<archivo>.lock), incorpora lo que los demás
+                anexaron al diario desde la última lectura y recién entonces anexa lo
+                propio. Implica usar_diario. Si otro proceso ya publicó una figura con
+                el ID de una figura nueva propia, la propia se renumera al escribirla:
+                almacenar_figura devuelve el ID final cuando escribe en el momento,
+                almacenar_lote informa 'renumeradas' y obtener_id_final resuelve el
+                ID anterior en cualquier momento
+            intervalo_refresco (float): Si es mayor que cero, cada cuántos segundos un
+                hilo de fondo llama a refrescar() para incorporar lo que otros
+                procesos escribieron; las consultas esperan a que termine cada refresco
+            capacidad_memoria (int): Si es mayor que cero, cuántas figuras se mantienen
+                construidas en memoria; las menos usadas se paginan a <archivo>.paginas
+                y se vuelven a leer al pedirlas
+            guardar_metricas (bool): Si cada figura se persiste con sus métricas
+                derivadas (área, perímetro, volumen, área de superficie), para que
+                los análisis sobre el archivo no tengan que instanciar figuras
+            historial (bool): Si cada versión de cada figura (altas, cambios por sus
+                setters y bajas) se registra en <archivo>.historial para leerla
+                después con obtener_figura(id, version) u obtener_figuras_en
+
+        Raises:
+            ValueError: Si se combina la carga perezosa con la fragmentación, con
+                la imagen de reinicio o con escritores concurrentes, la memoria
+                acotada con la carga perezosa, la fragmentación o la imagen, o el
+                historial con escritores concurrentes
         """
-        self._figuras: Dict[int, Figura] = {}
+        if carga_perezosa and fragmentos:
+            raise ValueError("La carga perezosa no admite repositorios fragmentados")
+        if carga_perezosa and imagen_reinicio:
+            raise ValueError("La carga perezosa no admite imagen de reinicio")
+        if carga_perezosa and concurrente:
+            raise ValueError("La carga perezosa no admite escritores concurrentes")
+        if capacidad_memoria and (carga_perezosa or fragmentos or imagen_reinicio):
+            raise ValueError("La memoria acotada no admite carga perezosa, fragmentos ni imagen de reinicio")
+        if historial and concurrente:
+            raise ValueError("El historial no admite escritores concurrentes")
+
+        self._figuras: MutableMapping[int, Figura] = {}
+        if capacidad_memoria:
+            self._figuras = MapaFigurasAcotado(archivo_persistencia + ".paginas", capacidad_memoria)
+        # Totales por tipo mantenidos junto con las figuras (ver _poner/_quitar)
+        self._resumen = ResumenFiguras()
+        # Índice por tipo y categoría: se construye en la primera búsqueda y
+        # desde entonces se mantiene con cada cambio
+        self._indice_tipos: Optional[IndiceTipos] = None
+        self._indice_metricas: Optional[IndiceMetricas] = None
+        # Sketches de cuantiles por tipo: las altas se agregan, pero un sketch
+        # no puede olvidar valores, así que una baja o un cambio marca su tipo
+        # para rehacerlo (solo ese tipo, desde el índice) en la próxima consulta
+        self._distribuciones: Optional[DistribucionesMetricas] = None
+        self._tipos_sin_distribucion: Set[str] = set()
+        # Una vez consultadas, se guardan con cada snapshot
+        self._guardar_distribuciones = False
+        self._carga_perezosa = carga_perezosa
+        self._fragmentos = fragmentos
+        self._estrategia_fragmentos = estrategia_fragmentos
+        self._nivel_compresion = nivel_compresion
+        self._guardar_metricas = guardar_metricas
+        # Un único método ligado compartido por todas las figuras almacenadas
+        self._observador_figuras = self._figura_modificada
+        self._historial: Optional[HistorialFiguras] = None
+        if historial:
+            self._historial = HistorialFiguras(archivo_persistencia + ".historial")
         self._archivo_persistencia = archivo_persistencia
         self._persistencia = PersistenciaArchivos()
-        self._auto_guardar = auto_guardar
+        self._diario: Optional[DiarioFiguras] = None
+
+        if isinstance(auto_guardar, PoliticaGuardado):
+            self._politica: Optional[PoliticaGuardado] = auto_guardar
+        else:
+            self._politica = PoliticaGuardado.inmediata() if auto_guardar else None
+        self._auto_guardar = self._politica is not None
+
+        # Estado del volcado diferido: _cerrojo protege lo pendiente y nunca se
+        # mantiene mientras se espera _cerrojo_escritura. También lo toman las
+        # lecturas, porque los hilos de refresco y volcado modifican las figuras,
+        # el resumen, los índices y las distribuciones mientras lo mantienen
+        self._cerrojo = threading.RLock()
+        self._condicion = threading.Condition(self._cerrojo)
+        self._cerrojo_escritura = threading.RLock()
+        self._registros_sin_volcar: List[Dict[str, Any]] = []
+        self._operaciones_sin_volcar = 0
+        # Sin política de guardado nada se vuelca solo, pero refrescar debe
+        # saber si hay modificaciones que el archivo todavía no tiene
+        self._modificaciones_sin_guardar = 0
+        self._primera_modificacion = 0.0
+        self._ultima_modificacion = 0.0
+        self._cerrado = False
+        self._hilo_volcado: Optional[threading.Thread] = None
+        self._intervalo_refresco = intervalo_refresco
+        self._hilo_refresco: Optional[threading.Thread] = None
+        self._generacion = 0
+
+        # Estado de la transacción en curso
+        self._profundidad_transaccion = 0
+        self._registros_pendientes: List[Dict[str, Any]] = []
+        self._deshacer: List[Tuple[str, Any, Any]] = []
+        self._id_maximo_pendiente = 0
+        self._contador_inicial = 0
+
+        # Coordinación con otros procesos: hasta dónde se leyó el diario, qué
+        # snapshot se cargó y qué figuras nuevas aún no se publicaron
+        self._cerrojo_procesos: Optional[CerrojoArchivo] = None
+        self._posicion_diario = 0
+        self._identidad_snapshot: Tuple[Any, ...] = ()
+        self._figuras_nuevas: Dict[int, Figura] = {}
+        # ID anterior -> ID con que se renumeró una figura nueva propia
+        self._renumeradas: Dict[int, int] = {}
+        if concurrente:
+            self._cerrojo_procesos = CerrojoArchivo(archivo_persistencia + ".lock")
+        # Un lector no concurrente lo toma compartido al refrescar, para no
+        # leer a medias la compactación de un escritor concurrente
+        self._cerrojo_lectura = CerrojoArchivo(archivo_persistencia + ".lock")
+
+        if usar_diario or concurrente:
+            self._diario = DiarioFiguras(archivo_persistencia + ".diario", umbral_compactacion)
+
+        # La imagen refleja el archivo de datos, el diario y el manifiesto de fragmentos
+        self._imagen: Optional[ImagenReinicio] = None
+        if imagen_reinicio:
+            self._imagen = ImagenReinicio(archivo_persistencia + ".imagen", (
+                archivo_persistencia,
+                archivo_persistencia + ".diario",
+                self._persistencia.archivo_manifiesto(archivo_persistencia),
+            ))
 
         # Cargar figuras existentes
         self.cargar_figuras()
 
+        if self._politica is not None and self._politica.requiere_hilo():
+            self._hilo_volcado = threading.Thread(target=self._bucle_volcado,
+                                                  name="volcado-figuras", daemon=True)
+            self._hilo_volcado.start()
+
+        if intervalo_refresco > 0:
+            self._hilo_refresco = threading.Thread(target=self._bucle_refresco,
+                                                   name="refresco-figuras", daemon=True)
+            self._hilo_refresco.start()
+
     def almacenar_figura(self, figura: Figura) -> int:
         """
         Almacena una figura en el repositorio
@@ -34,30 +217,139 @@ class RepositorioFiguras:
             figura (Figura): Figura a almacenar
 
         Returns:
-            int: ID de la figura almacenada
+            int: ID de la figura almacenada; con escritores concurrentes puede
+                diferir del que traía si otro proceso ya lo usó (ver obtener_id_final)
         """
         id_figura = figura.get_id()
-        self._figuras[id_figura] = figura
 
-        # Actualizar el generador de ID si es necesario
-        GeneradorID.actualizar_si_mayor(id_figura)
+        if self._profundidad_transaccion:
+            self._deshacer.append(('figura', id_figura, self._figuras.get(id_figura)))
+            self._id_maximo_pendiente = max(self._id_maximo_pendiente, id_figura)
+
+        datos = self._persistencia.figura_a_dict(figura, self._guardar_metricas)
+        with self._cerrojo:
+            if self._cerrojo_procesos is not None and id_figura not in self._figuras:
+                self._figuras_nuevas[id_figura] = figura
+            self._poner(id_figura, figura, datos)
+
+        # Actualizar el generador de ID si es necesario (en una transacción
+        # se difiere hasta confirmarla)
+        if not self._profundidad_transaccion:
+            GeneradorID.actualizar_si_mayor(id_figura)
 
-        if self._auto_guardar:
-            self.guardar_figuras()
+        self._registrar_cambio(DiarioFiguras.registro_alta(datos))
 
-        return id_figura
+        # Si el cambio se escribió en el momento, la figura ya tiene su ID final
+        return figura.get_id()
 
-    def obtener_figura(self, figura_id: int) -> Optional[Figura]:
+    def obtener_figura(self, figura_id: int, version: Optional[int] = None) -> Optional[Figura]:
         """
         Obtiene una figura por su ID
 
         Args:
             figura_id (int): ID de la figura a buscar
+            version (Optional[int]): Si se indica, la figura tal como era en esa
+                versión del historial (una copia que no pertenece al repositorio)
 
         Returns:
-            Optional[Figura]: Figura encontrada o None
+            Optional[Figura]: Figura encontrada o None (también si la versión no
+                existe o la figura estaba eliminada en ella)
+
+        Raises:
+            ValueError: Si se pide una versión y el repositorio no guarda historial
+        """
+        if version is not None:
+            datos = self._obtener_historial().reconstruir(figura_id, version)
+            return self._persistencia.dict_a_figura(datos) if datos is not None else None
+
+        with self._cerrojo:
+            return self._vigilar(self._figuras.get(figura_id))
+
+    def obtener_versiones(self, figura_id: int) -> List[Dict[str, Any]]:
+        """
+        Describe las versiones registradas de una figura
+
+        Args:
+            figura_id (int): ID de la figura
+
+        Returns:
+            List[Dict[str, Any]]: Por versión, 'version', 'marca_tiempo' y 'eliminada'
+
+        Raises:
+            ValueError: Si el repositorio no guarda historial
+        """
+        return self._obtener_historial().versiones(figura_id)
+
+    def obtener_figuras_en(self, marca_tiempo: float) -> List[Figura]:
         """
-        return self._figuras.get(figura_id)
+        Obtiene las figuras tal como estaban en un momento dado
+
+        Args:
+            marca_tiempo (float): Momento (segundos desde la época, como time.time())
+
+        Returns:
+            List[Figura]: Copias de las figuras que existían entonces, por ID
+
+        Raises:
+            ValueError: Si el repositorio no guarda historial
+        """
+        estado = self._obtener_historial().estado_en(marca_tiempo)
+        figuras = [self._persistencia.dict_a_figura(estado[id_figura]) for id_figura in sorted(estado)]
+        return [figura for figura in figuras if figura]
+
+    def _obtener_historial(self) -> HistorialFiguras:
+        """Obtiene el historial, que debe estar habilitado"""
+        if self._historial is None:
+            raise ValueError("El repositorio no guarda historial de versiones")
+        return self._historial
+
+    def _vigilar(self, figura: Optional[Figura]) -> Optional[Figura]:
+        """
+        Asegura que el repositorio observe una figura que entrega
+
+        Los mapas perezoso y acotado reconstruyen figuras (sin observador) al
+        leerlas del archivo o del almacén de páginas.
+        """
+        if figura is not None:
+            figura.set_observador(self._observador_figuras)
+        return figura
+
+    def _figura_modificada(self, figura: Figura, atributo: str, anterior: Any) -> None:
+        """
+        Observador de las figuras almacenadas: actualiza resumen e índices y
+        persiste el cambio como un alta, igual que almacenar_figura (con
+        historial, el alta registra además la nueva versión)
+
+        Args:
+            figura (Figura): Figura que acaba de cambiar
+            atributo (str): Atributo que cambió ('nombre', 'tipo' o una dimensión)
+            anterior (Any): Valor que tenía antes
+        """
+        with self._cerrojo:
+            if self._figuras.get(figura.get_id()) is not figura:
+                return
+            if isinstance(self._figuras, MapaFigurasPerezoso):
+                self._figuras.marcar_modificada(figura.get_id())
+
+            # La versión anterior sale del resumen: con el nombre o el tipo que
+            # tenía (las métricas no cambiaron) o con la dimensión que tenía
+            datos = self._persistencia.figura_a_dict(figura)
+            metricas = figura.obtener_metricas()
+            anteriores = metricas if atributo in ('nombre', 'tipo') else None
+            self._resumen.quitar(dict(datos, **{atributo: anterior}), anteriores)
+            self._resumen.agregar(datos, metricas)
+
+            if self._indice_tipos is not None:
+                self._indice_tipos.agregar(figura.get_id(), figura.get_nombre(), figura.get_tipo())
+            if self._indice_metricas is not None:
+                self._indice_metricas.agregar(figura.get_id(), figura.get_nombre(), figura.obtener_metricas())
+            if self._distribuciones is not None:
+                self._tipos_sin_distribucion.add(figura.get_nombre().lower())
+                if atributo == 'nombre':
+                    self._tipos_sin_distribucion.add(anterior.lower())
+
+        self._registrar_cambio(DiarioFiguras.registro_alta(
+            self._persistencia.figura_a_dict(figura, self._guardar_metricas)))
 
     def obtener_todas_figuras(self) -> List[Figura]:
         """
@@ -66,7 +358,8 @@ class RepositorioFiguras:
         Returns:
             List[Figura]: Lista de todas las figuras
         """
-        return list(self._figuras.values())
+        with self._cerrojo:
+            return [self._vigilar(figura) for figura in self._figuras.values()]
 
     def eliminar_figura(self, figura_id: int) -> bool:
         """
@@ -78,15 +371,17 @@ class RepositorioFiguras:
         Returns:
             bool: True si se eliminó, False si no existía
         """
-        if figura_id in self._figuras:
-            del self._figuras[figura_id]
+        with self._cerrojo:
+            figura = self._quitar(figura_id)
+        if figura is None:
+            return False
 
-            if self._auto_guardar:
-                self.guardar_figuras()
+        if self._profundidad_transaccion:
+            self._deshacer.append(('figura', figura_id, figura))
 
-            return True
+        self._registrar_cambio(DiarioFiguras.registro_baja(figura_id))
 
-        return False
+        return True
 
     def contar_figuras(self) -> int:
         """
@@ -104,34 +399,1053 @@ class RepositorioFiguras:
         Returns:
             List[Figura]: Lista de todas las figuras almacenadas
         """
-        return list(self._figuras.values())
+        with self._cerrojo:
+            return [self._vigilar(figura) for figura in self._figuras.values()]
 
     def buscar_por_tipo(self, tipo: str) -> List[Figura]:
         """
         Busca figuras por tipo
 
+        Usa el índice por tipo: el costo depende de cuántas figuras se
+        devuelven, no de cuántas hay en el repositorio.
+
         Args:
-            tipo (str): Tipo de figura a buscar
+            tipo (str): Tipo de figura a buscar (su nombre, sin distinguir mayúsculas)
 
         Returns:
             List[Figura]: Lista de figuras del tipo especificado
         """
-        tipo_lower = tipo.lower()
-        figuras_tipo = []
+        with self._cerrojo:
+            return [self._vigilar(self._figuras[id_figura])
+                    for id_figura in self._obtener_indice_tipos().ids_por_nombre(tipo)]
+
+    def buscar_por_categoria(self, categoria: str) -> List[Figura]:
+        """
+        Busca figuras por categoría
+
+        Args:
+            categoria (str): "2D" o "3D"
+
+        Returns:
+            List[Figura]: Lista de figuras de la categoría
+        """
+        with self._cerrojo:
+            return [self._vigilar(self._figuras[id_figura])
+                    for id_figura in self._obtener_indice_tipos().ids_por_categoria(categoria)]
+
+    def contar_por_tipo(self, tipo: str) -> int:
+        """
+        Cuenta las figuras de un tipo sin construir la lista
+
+        Args:
+            tipo (str): Tipo de figura (su nombre)
+
+        Returns:
+            int: Cantidad de figuras de ese tipo
+        """
+        with self._cerrojo:
+            return self._obtener_indice_tipos().contar_por_nombre(tipo)
+
+    def contar_por_categoria(self, categoria: str) -> int:
+        """
+        Cuenta las figuras de una categoría sin construir la lista
+
+        Args:
+            categoria (str): "2D" o "3D"
+
+        Returns:
+            int: Cantidad de figuras de esa categoría
+        """
+        with self._cerrojo:
+            return self._obtener_indice_tipos().contar_por_categoria(categoria)
+
+    def buscar_por_metrica(self, metrica: str, minimo: Optional[float] = None,
+                           maximo: Optional[float] = None, unidad: UnidadMedida = UnidadMedida.METROS,
+                           tipo: Optional[str] = None) -> List[Figura]:
+        """
+        Busca las figuras cuya métrica derivada cae en un rango
+
+        Usa índices ordenados por métrica: el costo es O(log n) más la
+        cantidad de figuras devueltas.
+
+        Args:
+            metrica (str): 'area', 'perimetro', 'volumen' o 'area_superficie'
+            minimo (Optional[float]): Cota inferior inclusiva (sin cota si es None)
+            maximo (Optional[float]): Cota superior inclusiva (sin cota si es None)
+            unidad (UnidadMedida): Unidad de longitud de las cotas (se elevan al
+                cuadrado o al cubo según la métrica)
+            tipo (Optional[str]): Tipo de figura (su nombre), o None para todos
 
-        for figura in self._figuras.values():
-            if figura.get_nombre().lower() == tipo_lower:
-                figuras_tipo.append(figura)
+        Returns:
+            List[Figura]: Figuras ordenadas de menor a mayor métrica
+
+        Raises:
+            ValueError: Si la métrica no se conoce
+        """
+        if metrica not in UnidadAdapter.EXPONENTES_METRICAS:
+            raise ValueError(f"Métrica desconocida: {metrica}")
+        if minimo is not None:
+            minimo = UnidadAdapter.convertir_metrica(minimo, metrica, unidad, UnidadMedida.METROS)
+        if maximo is not None:
+            maximo = UnidadAdapter.convertir_metrica(maximo, metrica, unidad, UnidadMedida.METROS)
+
+        with self._cerrojo:
+            return [self._vigilar(self._figuras[id_figura])
+                    for _, id_figura in self._obtener_indice_metricas().rango(metrica, minimo, maximo, tipo)]
+
+    def obtener_extremos(self, metrica: str, cantidad: int, mayores: bool = True,
+                         tipo: Optional[str] = None, categoria: Optional[str] = None) -> List[Figura]:
+        """
+        Obtiene las figuras con los valores más altos (o más bajos) de una métrica
+
+        Si el índice por métricas ya existe se leen los extremos de sus listas
+        ordenadas; si no, se recorren las figuras una vez con un montículo de
+        tamaño `cantidad` (O(n log k)), sin ordenar toda la colección.
+
+        Args:
+            metrica (str): 'area', 'perimetro', 'volumen' o 'area_superficie'
+            cantidad (int): Cuántas figuras devolver como máximo
+            mayores (bool): True para las mayores, False para las menores
+            tipo (Optional[str]): Tipo de figura (su nombre), o None para todos
+            categoria (Optional[str]): "2D" o "3D", o None para ambas
+
+        Returns:
+            List[Figura]: Figuras de la más extrema a la menos extrema
+
+        Raises:
+            ValueError: Si la métrica no se conoce
+        """
+        if metrica not in self.CATEGORIAS_METRICAS:
+            raise ValueError(f"Métrica desconocida: {metrica}")
+        # Cada métrica existe solo en una categoría
+        if categoria is not None and categoria.upper() != self.CATEGORIAS_METRICAS[metrica]:
+            return []
+
+        with self._cerrojo:
+            if self._indice_metricas is not None:
+                pares = self._indice_metricas.extremos(metrica, cantidad, mayores, tipo)
+            else:
+                figuras = self._figuras.values() if tipo is None else self.buscar_por_tipo(tipo)
+                candidatos = (
+                    (metricas[metrica], figura.get_id())
+                    for metricas, figura in ((figura.obtener_metricas(), figura) for figura in figuras)
+                    if metrica in metricas
+                )
+                pares = (heapq.nlargest if mayores else heapq.nsmallest)(max(cantidad, 0), candidatos)
+
+            return [self._vigilar(self._figuras[id_figura]) for _, id_figura in pares]
+
+    def obtener_percentil(self, metrica: str, percentil: float, tipo: Optional[str] = None,
+                          unidad: UnidadMedida = UnidadMedida.METROS) -> Optional[float]:
+        """
+        Estima un percentil de una métrica sin ordenar las figuras
+
+        La estimación sale de sketches de cuantiles (ver SketchCuantiles), con
+        un error de rango cercano al 1 %. Los sketches se leen del archivo de
+        distribuciones guardado junto a los datos o se construyen en una
+        pasada en la primera consulta; las siguientes cuestan microsegundos.
+
+        Args:
+            metrica (str): 'area', 'perimetro', 'volumen' o 'area_superficie'
+            percentil (float): Entre 0 y 100 (50 es la mediana)
+            tipo (Optional[str]): Tipo de figura (su nombre), o None para todos
+            unidad (UnidadMedida): Unidad de longitud del resultado
+
+        Returns:
+            Optional[float]: Valor estimado, o None si ninguna figura tiene la métrica
+
+        Raises:
+            ValueError: Si la métrica no se conoce o el percentil está fuera de rango
+        """
+        if metrica not in UnidadAdapter.EXPONENTES_METRICAS:
+            raise ValueError(f"Métrica desconocida: {metrica}")
+        if not 0 <= percentil <= 100:
+            raise ValueError(f"El percentil debe estar entre 0 y 100: {percentil}")
 
-        return figuras_tipo
+        with self._cerrojo:
+            valor = self._obtener_distribuciones().percentil(metrica, percentil, tipo)
+        if valor is None:
+            return None
+        return UnidadAdapter.convertir_metrica(valor, metrica, UnidadMedida.METROS, unidad)
+
+    def obtener_histograma(self, metrica: str, intervalos: int = 10, tipo: Optional[str] = None,
+                           unidad: UnidadMedida = UnidadMedida.METROS) -> List[Tuple[float, float, int]]:
+        """
+        Estima el histograma de una métrica en intervalos de igual ancho
+
+        Args:
+            metrica (str): 'area', 'perimetro', 'volumen' o 'area_superficie'
+            intervalos (int): Cantidad de intervalos entre el mínimo y el máximo
+            tipo (Optional[str]): Tipo de figura (su nombre), o None para todos
+            unidad (UnidadMedida): Unidad de longitud de los límites
+
+        Returns:
+            List[Tuple[float, float, int]]: Desde, hasta y cantidad estimada de
+                figuras de cada intervalo (vacía si ninguna tiene la métrica)
+
+        Raises:
+            ValueError: Si la métrica no se conoce o los intervalos no son positivos
+        """
+        if metrica not in UnidadAdapter.EXPONENTES_METRICAS:
+            raise ValueError(f"Métrica desconocida: {metrica}")
+
+        with self._cerrojo:
+            histograma = self._obtener_distribuciones().histograma(metrica, intervalos, tipo)
+        return [
+            (UnidadAdapter.convertir_metrica(desde, metrica, UnidadMedida.METROS, unidad),
+             UnidadAdapter.convertir_metrica(hasta, metrica, UnidadMedida.METROS, unidad), cantidad)
+            for desde, hasta, cantidad in histograma
+        ]
+
+    def obtener_distribuciones(self) -> DistribucionesMetricas:
+        """
+        Obtiene los sketches de cuantiles de las métricas por tipo
+
+        Sirven para combinar la distribución de este repositorio con la de
+        otros (ver DistribucionesMetricas.combinar).
+
+        Returns:
+            DistribucionesMetricas: Copia de las distribuciones actuales
+        """
+        with self._cerrojo:
+            return self._obtener_distribuciones().copiar()
+
+    def _obtener_distribuciones(self) -> DistribucionesMetricas:
+        """
+        Obtiene las distribuciones al día (debe llamarse con _cerrojo tomado)
+
+        La primera vez se construyen en una pasada por todas las figuras;
+        después solo se rehacen los tipos con bajas o cambios, recorriendo
+        las figuras de ese tipo con el índice por tipo.
+        """
+        if self._distribuciones is None:
+            distribuciones = DistribucionesMetricas()
+            for figura in self._figuras.values():
+                distribuciones.agregar(figura.get_nombre(), figura.obtener_metricas())
+            self._distribuciones = distribuciones
+            self._tipos_sin_distribucion = set()
+
+        for nombre in self._tipos_sin_distribucion:
+            self._distribuciones.quitar_tipo(nombre)
+            for id_figura in self._obtener_indice_tipos().ids_por_nombre(nombre):
+                figura = self._figuras[id_figura]
+                self._distribuciones.agregar(figura.get_nombre(), figura.obtener_metricas())
+        self._tipos_sin_distribucion = set()
+
+        self._guardar_distribuciones = True
+        return self._distribuciones
+
+    def _obtener_indice_metricas(self) -> IndiceMetricas:
+        """Obtiene el índice por métricas, construyéndolo con una pasada si aún no existe"""
+        if self._indice_metricas is None:
+            indice = IndiceMetricas()
+            for id_figura, figura in self._figuras.items():
+                indice.agregar(id_figura, figura.get_nombre(), figura.obtener_metricas())
+            self._indice_metricas = indice
+        return self._indice_metricas
+
+    def _obtener_indice_tipos(self) -> IndiceTipos:
+        """Obtiene el índice por tipo, construyéndolo con una pasada si aún no existe"""
+        if self._indice_tipos is None:
+            indice = IndiceTipos()
+            for id_figura, figura in self._figuras.items():
+                indice.agregar(id_figura, figura.get_nombre(), figura.get_tipo())
+            self._indice_tipos = indice
+        return self._indice_tipos
 
     def limpiar_repositorio(self) -> None:
         """Elimina todas las figuras del repositorio"""
-        self._figuras.clear()
+        with self._cerrojo:
+            if self._profundidad_transaccion:
+                self._deshacer.append(('todas', None, dict(self._figuras)))
+            self._vaciar()
         GeneradorID.resetear()
 
-        if self._auto_guardar:
-            self.guardar_figuras()
+        self._registrar_cambio(DiarioFiguras.registro_limpiar())
+
+    def _poner(self, id_figura: int, figura: Figura, datos: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Guarda una figura en memoria manteniendo el resumen
+
+        Toma _cerrojo: el hilo de volcado rehace las distribuciones desde el
+        índice y las figuras mientras lo mantiene.
+
+        Args:
+            id_figura (int): ID de la figura
+            figura (Figura): Figura a guardar
+            datos (Optional[Dict[str, Any]]): Su diccionario, si ya se calculó
+        """
+        with self._cerrojo:
+            anterior = self._figuras.get(id_figura)
+            if anterior is not None:
+                self._resumen.quitar(self._persistencia.figura_a_dict(anterior), anterior.obtener_metricas())
+
+            self._figuras[id_figura] = figura
+            figura.set_observador(self._observador_figuras)
+            if self._indice_tipos is not None:
+                self._indice_tipos.agregar(id_figura, figura.get_nombre(), figura.get_tipo())
+            if self._indice_metricas is not None:
+                self._indice_metricas.agregar(id_figura, figura.get_nombre(), figura.obtener_metricas())
+            if self._distribuciones is not None:
+                if anterior is not None:
+                    self._tipos_sin_distribucion.add(anterior.get_nombre().lower())
+                # Un tipo marcado se rehace desde el índice, que ya incluye esta figura
+                if figura.get_nombre().lower() not in self._tipos_sin_distribucion:
+                    self._distribuciones.agregar(figura.get_nombre(), figura.obtener_metricas())
+            self._resumen.agregar(datos if datos is not None else self._persistencia.figura_a_dict(figura),
+                                  figura.obtener_metricas())
+
+    def _quitar(self, id_figura: int) -> Optional[Figura]:
+        """
+        Quita una figura de memoria manteniendo el resumen (toma _cerrojo, como _poner)
+
+        Args:
+            id_figura (int): ID de la figura
+
+        Returns:
+            Optional[Figura]: Figura quitada o None si no estaba
+        """
+        with self._cerrojo:
+            figura = self._figuras.pop(id_figura, None)
+            if figura is not None:
+                figura.set_observador(None)
+                if self._indice_tipos is not None:
+                    self._indice_tipos.quitar(id_figura)
+                if self._indice_metricas is not None:
+                    self._indice_metricas.quitar(id_figura)
+                if self._distribuciones is not None:
+                    self._tipos_sin_distribucion.add(figura.get_nombre().lower())
+                self._resumen.quitar(self._persistencia.figura_a_dict(figura), figura.obtener_metricas())
+        return figura
+
+    def _vaciar(self) -> None:
+        """Quita todas las figuras de memoria y reinicia el resumen (toma _cerrojo, como _poner)"""
+        with self._cerrojo:
+            self._figuras.clear()
+            self._resumen = ResumenFiguras()
+            if self._indice_tipos is not None:
+                self._indice_tipos.vaciar()
+            if self._indice_metricas is not None:
+                self._indice_metricas.vaciar()
+            if self._distribuciones is not None:
+                self._distribuciones = DistribucionesMetricas()
+                self._tipos_sin_distribucion = set()
+
+    def _registrar_cambio(self, registro: Dict[str, Any]) -> None:
+        """
+        Persiste una modificación según el modo de persistencia configurado
+
+        Args:
+            registro (Dict[str, Any]): Registro de diario que describe la modificación
+        """
+        if self._profundidad_transaccion:
+            self._registros_pendientes.append(registro)
+            return
+
+        self._encolar_registros([registro])
+
+    def _encolar_registros(self, registros: List[Dict[str, Any]]) -> bool:
+        """
+        Entrega modificaciones a la política de guardado
+
+        Con la política inmediata se persisten en el momento; con una diferida
+        se acumulan y se vuelcan juntas al cumplirse la política.
+
+        Args:
+            registros (List[Dict[str, Any]]): Registros de diario a persistir
+
+        Returns:
+            bool: True si se persistió o encoló exitosamente (o no había nada que hacer)
+        """
+        if self._historial is not None:
+            self._historial.registrar(registros)
+
+        if not registros:
+            return True
+
+        if self._politica is None:
+            with self._cerrojo:
+                self._modificaciones_sin_guardar += len(registros)
+            return True
+
+        if self._politica.es_inmediata():
+            if self._diario is None:
+                return self.guardar_figuras()
+            return self._anexar_al_diario(registros)
+
+        with self._condicion:
+            ahora = time.monotonic()
+            if not self._operaciones_sin_volcar:
+                self._primera_modificacion = ahora
+            self._ultima_modificacion = ahora
+            self._operaciones_sin_volcar += len(registros)
+            if self._diario is not None:
+                self._registros_sin_volcar.extend(registros)
+
+            cada_operaciones = self._politica.get_cada_operaciones()
+            volcar_ahora = bool(cada_operaciones) and self._operaciones_sin_volcar >= cada_operaciones
+            self._condicion.notify()
+
+        if volcar_ahora:
+            return self.volcar()
+
+        return True
+
+    def _anexar_al_diario(self, registros: List[Dict[str, Any]]) -> bool:
+        """
+        Anexa registros al diario con una sola escritura y compacta si corresponde
+
+        Args:
+            registros (List[Dict[str, Any]]): Registros de diario a persistir
+
+        Returns:
+            bool: True si se anexaron exitosamente
+        """
+        with self._cerrojo_escritura, self._exclusion_entre_procesos():
+            if self._cerrojo_procesos is not None:
+                with self._cerrojo:
+                    self._fusionar(registros)
+
+            # Sin otros escritores de por medio, lo propio no hace falta releerlo
+            al_dia = self._posicion_diario == self._diario.tamano()
+            if not self._diario.anexar(registros):
+                return False
+
+            if self._cerrojo_procesos is not None:
+                # Con el cerrojo tomado, lo recién anexado es el final del diario
+                self._posicion_diario = self._diario.tamano()
+                for registro in registros:
+                    if registro.get('op') == DiarioFiguras.OPERACION_ALTA:
+                        self._figuras_nuevas.pop(registro['figura']['id'], None)
+            elif al_dia:
+                self._posicion_diario = self._diario.tamano()
+
+            if self._diario.debe_compactar():
+                self.compactar()
+
+        return True
+
+    def _exclusion_entre_procesos(self) -> ContextManager[None]:
+        """Cerrojo exclusivo entre procesos, o un contexto vacío si no es concurrente"""
+        if self._cerrojo_procesos is None:
+            return nullcontext()
+        return self._cerrojo_procesos.exclusivo()
+
+    def _lectura_entre_procesos(self) -> ContextManager[None]:
+        """
+        Cerrojo para incorporar lo que escribieron otros procesos
+
+        Con escritores concurrentes, el exclusivo propio; si no, el compartido
+        cuando algún escritor concurrente usa el archivo (existe su cerrojo),
+        o un contexto vacío.
+        """
+        if self._cerrojo_procesos is not None:
+            return self._cerrojo_procesos.exclusivo()
+        if os.path.exists(self._cerrojo_lectura.get_archivo()):
+            return self._cerrojo_lectura.compartido()
+        return nullcontext()
+
+    def _identidad_archivos(self) -> Tuple[Any, ...]:
+        """
+        Identifica el snapshot actual en disco (archivo de datos y manifiesto)
+
+        Como los snapshots se publican con os.replace, otro inodo, tamaño o
+        fecha indican que otro proceso compactó desde la última lectura.
+
+        Returns:
+            Tuple[Any, ...]: Inodo, tamaño y mtime de cada archivo (None si no existe)
+        """
+        identidad = []
+        for archivo in (self._archivo_persistencia,
+                        self._persistencia.archivo_manifiesto(self._archivo_persistencia)):
+            try:
+                estado = os.stat(archivo)
+                identidad.append((estado.st_ino, estado.st_size, estado.st_mtime_ns))
+            except FileNotFoundError:
+                identidad.append(None)
+        return tuple(identidad)
+
+    def _fusionar(self, registros: List[Dict[str, Any]]) -> Set[int]:
+        """
+        Incorpora lo publicado por otros procesos y reaplica encima lo propio
+
+        Las operaciones son idempotentes, de modo que reaplicar las propias
+        después de las ajenas deja el estado en que quedaría si se hubieran
+        escrito en ese orden. Si otro proceso dio de alta una figura con el
+        mismo ID que una figura nueva propia, la propia recibe un ID nuevo;
+        los registros se corrigen en la lista. Debe llamarse con el cerrojo
+        entre procesos tomado.
+
+        Args:
+            registros (List[Dict[str, Any]]): Registros propios aún no publicados
+
+        Returns:
+            Set[int]: IDs que otros procesos agregaron, modificaron o eliminaron
+        """
+        ids_ajenos = self._incorporar_cambios_externos()
+        if not ids_ajenos:
+            return ids_ajenos
+
+        # El generador ya conoce los IDs ajenos, así que los nuevos no chocan
+        renumerados: Dict[int, int] = {}
+        for registro in registros:
+            if registro.get('op') == DiarioFiguras.OPERACION_ALTA:
+                id_figura = registro['figura']['id']
+                if (id_figura in ids_ajenos and id_figura in self._figuras
+                        and id_figura in self._figuras_nuevas and id_figura not in renumerados):
+                    renumerados[id_figura] = GeneradorID.obtener_siguiente_id()
+
+        for id_anterior, id_nuevo in renumerados.items():
+            figura = self._figuras_nuevas.pop(id_anterior)
+            figura.set_id(id_nuevo)
+            self._figuras_nuevas[id_nuevo] = figura
+            self._renumeradas[id_anterior] = id_nuevo
+
+        for posicion, registro in enumerate(registros):
+            operacion = registro.get('op')
+            if operacion == DiarioFiguras.OPERACION_ALTA and registro['figura']['id'] in renumerados:
+                datos = dict(registro['figura'], id=renumerados[registro['figura']['id']])
+                registro = registros[posicion] = DiarioFiguras.registro_alta(datos)
+            elif operacion == DiarioFiguras.OPERACION_BAJA and registro['id'] in renumerados:
+                registro = registros[posicion] = DiarioFiguras.registro_baja(renumerados[registro['id']])
+
+            figura = None
+            if operacion == DiarioFiguras.OPERACION_ALTA:
+                id_figura = registro['figura']['id']
+                figura = self._figuras_nuevas.get(id_figura)
+                if figura is None and id_figura not in ids_ajenos:
+                    # Nadie más la tocó: se conserva el objeto que el llamador modificó
+                    figura = self._figuras.get(id_figura)
+            self._aplicar_registro(registro, figura)
+
+        return ids_ajenos
+
+    def _incorporar_cambios_externos(self) -> Set[int]:
+        """
+        Aplica en memoria solo lo que cambió en disco desde la última lectura
+
+        Si el snapshot es el mismo se leen los registros anexados al diario
+        desde la última posición leída. Si otro proceso lo reemplazó, se
+        recorre el nuevo y se comparan sus registros con las figuras en
+        memoria: solo se reconstruyen las nuevas o modificadas y se quitan
+        las que ya no están; las demás conservan su objeto.
+
+        Returns:
+            Set[int]: IDs agregados, modificados o eliminados
+        """
+        cambiados: Set[int] = set()
+
+        identidad = self._identidad_archivos()
+        if identidad != self._identidad_snapshot:
+            if isinstance(self._figuras, MapaFigurasPerezoso):
+                # El mapa perezoso solo necesita apoyarse en el nuevo índice
+                cambiados.update(self._figuras)
+                self._vaciar()
+                self._cargar_figuras()
+                cambiados.update(self._figuras)
+                return cambiados
+
+            vistos: Set[int] = set()
+            for datos in self._persistencia.iterar_registros_repositorio(self._archivo_persistencia):
+                id_figura = datos['id']
+                vistos.add(id_figura)
+                # Una figura nueva propia con el mismo ID es otra figura aunque coincida
+                actual = self._figuras.get(id_figura)
+                if (actual is not None and id_figura not in self._figuras_nuevas
+                        and self._persistencia.figura_a_dict(actual, 'metricas' in datos) == datos):
+                    continue
+                figura = self._persistencia.dict_a_figura(datos)
+                if figura:
+                    self._poner(id_figura, figura, datos)
+                    GeneradorID.actualizar_si_mayor(id_figura)
+                    cambiados.add(id_figura)
+
+            for id_figura in [id_figura for id_figura in self._figuras if id_figura not in vistos]:
+                self._quitar(id_figura)
+                cambiados.add(id_figura)
+
+            self._identidad_snapshot = identidad
+            self._posicion_diario = 0
+
+        if self._diario is not None:
+            registros, self._posicion_diario = self._diario.leer_desde(self._posicion_diario)
+            for registro in registros:
+                operacion = registro.get('op')
+                if operacion == DiarioFiguras.OPERACION_ALTA:
+                    cambiados.add(registro['figura']['id'])
+                elif operacion == DiarioFiguras.OPERACION_BAJA:
+                    cambiados.add(registro['id'])
+                elif operacion == DiarioFiguras.OPERACION_LIMPIAR:
+                    cambiados.update(self._figuras)
+                self._aplicar_registro(registro)
+
+        return cambiados
+
+    def hay_cambios_externos(self) -> bool:
+        """
+        Indica, sin leer datos, si el archivo o el diario cambiaron desde la última lectura
+
+        Returns:
+            bool: True si refrescar() tendría algo que incorporar
+        """
+        if self._identidad_archivos() != self._identidad_snapshot:
+            return True
+        return self._diario is not None and self._diario.tamano() > self._posicion_diario
+
+    def refrescar(self) -> int:
+        """
+        Incorpora lo que otros procesos escribieron en el repositorio
+
+        Primero compara inodo, tamaño y fecha del archivo y el tamaño del
+        diario con lo último leído, así que sin cambios cuesta un par de
+        llamadas a stat. Con cambios se aplica solo la diferencia (ver
+        _incorporar_cambios_externos) y las modificaciones propias aún no
+        volcadas se reaplican encima, con el cerrojo de los escritores
+        concurrentes tomado si los hay: una compactación a medias dejaría la
+        posición leída del diario más allá de su nuevo final. Sin diario, o sin política de guardado
+        (auto_guardar=False), mientras haya modificaciones sin guardar no se
+        refresca, porque el archivo las pisaría: hay que guardarlas primero.
+
+        Returns:
+            int: Cantidad de IDs agregados, modificados o eliminados
+        """
+        if not self.hay_cambios_externos():
+            return 0
+
+        with self._cerrojo_escritura, self._lectura_entre_procesos():
+            with self._cerrojo:
+                sin_guardar = self._modificaciones_sin_guardar or (
+                    self._diario is None and self._operaciones_sin_volcar)
+                if sin_guardar:
+                    return 0
+                cambiados = self._fusionar(self._registros_sin_volcar)
+                if cambiados:
+                    self._generacion += 1
+
+        return len(cambiados)
+
+    def get_generacion(self) -> int:
+        """
+        Obtiene cuántas veces refrescar() incorporó cambios externos
+
+        Sirve para saber, sin comparar figuras, si hay que volver a mostrarlas.
+
+        Returns:
+            int: Generación actual
+        """
+        return self._generacion
+
+    def _bucle_refresco(self) -> None:
+        """Hilo de fondo que refresca el repositorio cada intervalo_refresco segundos"""
+        while True:
+            with self._condicion:
+                if self._cerrado:
+                    return
+                self._condicion.wait(self._intervalo_refresco)
+                if self._cerrado:
+                    return
+
+            try:
+                self.refrescar()
+            except Exception as e:
+                print(f"Error al refrescar figuras: {e}")
+
+    def volcar(self) -> bool:
+        """
+        Vuelca a disco las modificaciones acumuladas por la política de guardado
+
+        Returns:
+            bool: True si se volcaron exitosamente (o no había nada pendiente)
+        """
+        with self._cerrojo:
+            if not self._operaciones_sin_volcar:
+                return True
+
+        if self._diario is None:
+            return self.guardar_figuras()
+
+        with self._cerrojo:
+            registros = self._registros_sin_volcar
+            operaciones = self._operaciones_sin_volcar
+            self._registros_sin_volcar = []
+            self._operaciones_sin_volcar = 0
+
+        if self._anexar_al_diario(registros):
+            return True
+
+        # Reencolar lo que no se pudo escribir para el próximo intento
+        with self._cerrojo:
+            self._registros_sin_volcar[:0] = registros
+            self._operaciones_sin_volcar += operaciones
+        return False
+
+    def _bucle_volcado(self) -> None:
+        """Hilo de fondo que vuelca las modificaciones pendientes según la política"""
+        while True:
+            with self._condicion:
+                if self._cerrado:
+                    return
+
+                if not self._operaciones_sin_volcar:
+                    self._condicion.wait()
+                    continue
+
+                espera = self._politica.segundos_hasta_volcado(
+                    self._primera_modificacion, self._ultima_modificacion, time.monotonic()
+                )
+                if espera is None or espera > 0:
+                    self._condicion.wait(espera)
+                    continue
+
+            # Un error no debe terminar el hilo: lo pendiente queda para el próximo intento
+            try:
+                self.volcar()
+            except Exception as e:
+                print(f"Error al volcar figuras: {e}")
+
+    def cerrar(self) -> bool:
+        """
+        Detiene el hilo de volcado y persiste cualquier modificación pendiente
+
+        Sin política de guardado (auto_guardar=False) no se guarda nada: las
+        modificaciones posteriores al último guardar_figuras se pierden.
+
+        Returns:
+            bool: True si no quedó nada sin guardar
+        """
+        with self._condicion:
+            self._cerrado = True
+            self._condicion.notify_all()
+
+        if self._hilo_volcado is not None:
+            self._hilo_volcado.join()
+            self._hilo_volcado = None
+
+        if self._hilo_refresco is not None:
+            self._hilo_refresco.join()
+            self._hilo_refresco = None
+
+        guardado = self.volcar()
+        with self._cerrojo:
+            guardado = guardado and not self._modificaciones_sin_guardar
+
+        # Tras volcar con guardado automático la memoria coincide con el disco
+        if guardado and self._auto_guardar and self._imagen is not None:
+            self.guardar_imagen()
+
+        # El almacén de páginas no hace falta una vez persistido lo pendiente
+        if guardado and isinstance(self._figuras, MapaFigurasAcotado):
+            self._figuras.cerrar()
+
+        return guardado
+
+    def guardar_imagen(self) -> bool:
+        """
+        Vuelca el estado en memoria a la imagen de reinicio
+
+        Debe llamarse cuando la memoria coincide con lo persistido (por
+        ejemplo tras guardar_figuras): la imagen se asocia al estado actual
+        de los archivos y se usa mientras estos no cambien.
+
+        Returns:
+            bool: True si se guardó la imagen
+        """
+        if self._imagen is None:
+            return False
+
+        with self._cerrojo_escritura, self._cerrojo:
+            return self._imagen.guardar(self._estado_imagen())
+
+    def _estado_imagen(self) -> Dict[str, Any]:
+        """Reúne lo que se guarda en la imagen de reinicio (con _cerrojo tomado)"""
+        estado = {
+            'figuras': dict(self._figuras),
+            'contador_id': GeneradorID.obtener_contador_actual(),
+            'resumen': self._resumen,
+        }
+        # Las distribuciones ya construidas evitan rehacerlas tras reiniciar
+        if self._distribuciones is not None:
+            estado['distribuciones'] = self._obtener_distribuciones()
+        return estado
+
+    def _restaurar_imagen(self) -> bool:
+        """
+        Restaura el estado desde la imagen de reinicio si es válida
+
+        Returns:
+            bool: True si se restauró; False si no hay imagen vigente
+        """
+        estado = self._imagen.cargar()
+        if estado is None:
+            return False
+
+        if self._figuras or 'resumen' not in estado:
+            for id_figura, figura in estado['figuras'].items():
+                self._poner(id_figura, figura)
+        else:
+            self._figuras = estado['figuras']
+            self._resumen = estado['resumen']
+            self._distribuciones = estado.get('distribuciones')
+            self._guardar_distribuciones = self._distribuciones is not None
+        GeneradorID.actualizar_si_mayor(estado['contador_id'])
+        return True
+
+    @contextmanager
+    def transaccion(self) -> Iterator['RepositorioFiguras']:
+        """
+        Agrupa varias modificaciones en una transacción con un único volcado
+
+        Dentro del bloque las modificaciones se aplican en memoria; al salir se
+        persisten de una sola vez y se actualiza el generador de IDs. Si el
+        bloque lanza una excepción o el volcado falla, se revierten las
+        modificaciones en memoria. Las transacciones anidadas se integran en
+        la más externa.
+
+        Yields:
+            RepositorioFiguras: El propio repositorio
+
+        Raises:
+            IOError: Si no se pudieron persistir las modificaciones
+        """
+        if self._profundidad_transaccion:
+            self._profundidad_transaccion += 1
+            try:
+                yield self
+            finally:
+                self._profundidad_transaccion -= 1
+            return
+
+        self._profundidad_transaccion = 1
+        self._registros_pendientes = []
+        self._deshacer = []
+        self._id_maximo_pendiente = 0
+        self._contador_inicial = GeneradorID.obtener_contador_actual()
+
+        try:
+            yield self
+        except BaseException:
+            self._revertir_transaccion()
+            raise
+
+        self._profundidad_transaccion = 0
+        registros = self._registros_pendientes
+        self._registros_pendientes = []
+
+        if not self._encolar_registros(registros):
+            self._profundidad_transaccion = 1
+            self._revertir_transaccion()
+            raise IOError("No se pudo confirmar la transacción")
+
+        GeneradorID.actualizar_si_mayor(self._id_maximo_pendiente)
+        self._deshacer = []
+
+    def _revertir_transaccion(self) -> None:
+        """Deshace en memoria las modificaciones de la transacción en curso"""
+        for operacion, id_figura, anterior in reversed(self._deshacer):
+            if operacion == 'todas':
+                self._vaciar()
+                for id_anterior, figura in anterior.items():
+                    self._poner(id_anterior, figura)
+            elif anterior is None:
+                self._quitar(id_figura)
+                self._figuras_nuevas.pop(id_figura, None)
+            else:
+                self._poner(id_figura, anterior)
+
+        # Si la transacción limpió el repositorio, el contador no debe retroceder
+        GeneradorID.actualizar_si_mayor(self._contador_inicial)
+
+        self._deshacer = []
+        self._registros_pendientes = []
+        self._profundidad_transaccion = 0
+
+    def almacenar_lote(self, figuras: List[Figura]) -> Dict[str, Any]:
+        """
+        Almacena varias figuras en una sola transacción
+
+        Las figuras que no se pueden almacenar se informan sin abortar el lote.
+
+        Args:
+            figuras (List[Figura]): Figuras a almacenar
+
+        Returns:
+            Dict[str, Any]: 'almacenadas' con los IDs almacenados (los finales),
+                'fallidas' con pares (posición, mensaje), 'confirmado' indicando si
+                se persistió y 'renumeradas' con {ID anterior: ID final} de las
+                figuras que otro proceso concurrente obligó a renumerar
+        """
+        almacenadas: List[int] = []
+        fallidas: List[Tuple[int, str]] = []
+
+        try:
+            with self.transaccion():
+                for posicion, figura in enumerate(figuras):
+                    if not isinstance(figura, Figura):
+                        fallidas.append((posicion, f"No es una figura: {figura!r}"))
+                        continue
+                    try:
+                        almacenadas.append(self.almacenar_figura(figura))
+                    except Exception as e:
+                        fallidas.append((posicion, str(e)))
+        except IOError as e:
+            print(f"Error al almacenar lote: {e}")
+            return {'almacenadas': [], 'fallidas': fallidas, 'confirmado': False, 'renumeradas': {}}
+
+        # Los IDs se renumeran al confirmar, cuando el lote se escribe
+        renumeradas = {id_figura: self.obtener_id_final(id_figura) for id_figura in almacenadas
+                       if self.obtener_id_final(id_figura) != id_figura}
+        return {
+            'almacenadas': [renumeradas.get(id_figura, id_figura) for id_figura in almacenadas],
+            'fallidas': fallidas,
+            'confirmado': True,
+            'renumeradas': renumeradas,
+        }
+
+    def obtener_id_final(self, figura_id: int) -> int:
+        """
+        Obtiene el ID con que quedó una figura nueva propia tras escribirla
+
+        Con escritores concurrentes, una figura nueva cuyo ID otro proceso ya
+        publicó se renumera al escribirla (ver el parámetro concurrente).
+
+        Args:
+            figura_id (int): ID con que se almacenó la figura
+
+        Returns:
+            int: ID final (el mismo si no se renumeró o aún no se escribió)
+        """
+        with self._cerrojo:
+            # Una figura renumerada puede volver a chocar en una escritura posterior
+            while figura_id in self._renumeradas:
+                figura_id = self._renumeradas[figura_id]
+        return figura_id
+
+    def eliminar_lote(self, figura_ids: List[int]) -> Dict[str, Any]:
+        """
+        Elimina varias figuras en una sola transacción
+
+        Args:
+            figura_ids (List[int]): IDs de las figuras a eliminar
+
+        Returns:
+            Dict[str, Any]: 'eliminadas' con los IDs eliminados, 'fallidas' con
+                pares (ID, mensaje) y 'confirmado' indicando si se persistió
+        """
+        eliminadas: List[int] = []
+        fallidas: List[Tuple[int, str]] = []
+
+        try:
+            with self.transaccion():
+                for figura_id in figura_ids:
+                    if self.eliminar_figura(figura_id):
+                        eliminadas.append(figura_id)
+                    else:
+                        fallidas.append((figura_id, "No existe una figura con ese ID"))
+        except IOError as e:
+            print(f"Error al eliminar lote: {e}")
+            return {'eliminadas': [], 'fallidas': fallidas, 'confirmado': False}
+
+        return {'eliminadas': eliminadas, 'fallidas': fallidas, 'confirmado': True}
+
+    def compactar(self) -> bool:
+        """
+        Escribe un nuevo snapshot con el estado actual y vacía el diario
+
+        Returns:
+            bool: True si se compactó exitosamente
+        """
+        with self._cerrojo_escritura, self._exclusion_entre_procesos():
+            # El snapshot debe incluir lo que otros procesos anexaron al diario
+            if self._cerrojo_procesos is not None:
+                with self._cerrojo:
+                    self._fusionar(self._registros_sin_volcar)
+
+            if not self._guardar_snapshot():
+                return False
+
+            if self._diario is not None:
+                self._diario.truncar()
+            self._posicion_diario = 0
+            self._figuras_nuevas.clear()
+
+        return True
+
+    def _guardar_snapshot(self) -> bool:
+        """
+        Escribe el archivo de persistencia con una copia del estado actual
+
+        La copia se toma junto con el descarte de lo pendiente, de modo que
+        todo lo acumulado hasta ese momento queda incluido en el snapshot.
+
+        Returns:
+            bool: True si se guardó exitosamente
+        """
+        with self._cerrojo_escritura:
+            with self._cerrojo:
+                # En modo perezoso o acotado se recorre el mapa directamente: las
+                # figuras no residentes se leen de su archivo sin retenerse
+                if isinstance(self._figuras, (MapaFigurasPerezoso, MapaFigurasAcotado)):
+                    figuras = self._figuras
+                else:
+                    figuras = dict(self._figuras)
+                operaciones = self._operaciones_sin_volcar
+                registros = self._registros_sin_volcar
+                sin_guardar = self._modificaciones_sin_guardar
+                distribuciones = None
+                # Los tipos pendientes se rehacen desde el índice; con el mapa
+                # perezoso o acotado eso leería figuras con el cerrojo tomado
+                if self._distribuciones is not None and (
+                        isinstance(figuras, dict) or not self._tipos_sin_distribucion):
+                    distribuciones = self._obtener_distribuciones().copiar()
+                self._operaciones_sin_volcar = 0
+                self._registros_sin_volcar = []
+                self._modificaciones_sin_guardar = 0
+
+            if distribuciones is None and self._guardar_distribuciones and isinstance(figuras, dict):
+                # Tras una recarga se rehacen desde la copia, que ya está en memoria
+                distribuciones = DistribucionesMetricas()
+                for figura in figuras.values():
+                    distribuciones.agregar(figura.get_nombre(), figura.obtener_metricas())
+
+            if self._escribir_snapshot(figuras):
+                if distribuciones is not None and not self._fragmentos:
+                    self._persistencia.guardar_distribuciones(distribuciones, self._archivo_persistencia)
+                # El snapshot propio no cuenta como cambio externo al refrescar
+                self._identidad_snapshot = self._identidad_archivos()
+                if isinstance(self._figuras, MapaFigurasPerezoso):
+                    self._figuras.reabrir()
+                return True
+
+            with self._cerrojo:
+                self._registros_sin_volcar[:0] = registros
+                self._operaciones_sin_volcar += operaciones
+                self._modificaciones_sin_guardar += sin_guardar
+            return False
+
+    def _escribir_snapshot(self, figuras: MutableMapping[int, Figura]) -> bool:
+        """
+        Escribe las figuras en un único archivo o repartidas en fragmentos
+
+        Args:
+            figuras (MutableMapping[int, Figura]): Figuras a escribir
+
+        Returns:
+            bool: True si se escribió exitosamente
+        """
+        if self._fragmentos:
+            return self._persistencia.guardar_en_fragmentos(
+                figuras, self._archivo_persistencia, self._fragmentos, self._estrategia_fragmentos,
+                self._nivel_compresion, self._guardar_metricas
+            )
+
+        if not self._persistencia.guardar_en_archivo(figuras, self._archivo_persistencia,
+                                                     self._nivel_compresion, self._guardar_metricas):
+            return False
+
+        # Un manifiesto anterior haría que se cargaran fragmentos desactualizados
+        self._persistencia.eliminar_fragmentos(self._archivo_persistencia)
+
+        return True
 
     def guardar_figuras(self) -> bool:
         """
@@ -140,21 +1454,98 @@ class RepositorioFiguras:
         Returns:
             bool: True si se guardó exitosamente
         """
-        return self._persistencia.guardar_en_archivo(self._figuras, self._archivo_persistencia)
+        if self._diario is not None:
+            return self.compactar()
+
+        return self._guardar_snapshot()
 
     def cargar_figuras(self) -> bool:
         """
         Carga las figuras desde el archivo de persistencia
 
+        Returns:
+            bool: True si se cargó exitosamente
+        """
+        cerrojo = self._cerrojo_procesos or self._cerrojo_lectura
+        if self._cerrojo_procesos is not None or os.path.exists(cerrojo.get_archivo()):
+            # Ningún escritor concurrente compacta ni anexa mientras se lee
+            with cerrojo.compartido():
+                return self._cargar_figuras()
+
+        return self._cargar_figuras()
+
+    def _cargar_figuras(self) -> bool:
+        """
+        Lee el snapshot y el diario sobre las figuras en memoria
+
         Returns:
             bool: True si se cargó exitosamente
         """
         try:
-            figuras_cargadas = self._persistencia.cargar_desde_archivo(self._archivo_persistencia)
+            self._posicion_diario = 0
+            self._identidad_snapshot = self._identidad_archivos()
+            # Algunos caminos de carga llenan el mapa directamente: los índices se rehacen al usarlos
+            self._indice_tipos = None
+            self._indice_metricas = None
+            self._distribuciones = None
+            self._tipos_sin_distribucion = set()
 
-            for figura in figuras_cargadas:
-                self._figuras[figura.get_id()] = figura
-                GeneradorID.actualizar_si_mayor(figura.get_id())
+            # Una imagen vigente ya incluye el diario: no hay nada más que leer
+            if self._imagen is not None and self._restaurar_imagen():
+                if self._diario is not None:
+                    self._posicion_diario = self._diario.tamano()
+                return True
+
+            # El resumen guardado junto a los datos sirve si se carga sobre un repositorio vacío
+            sobre_vacio = not self._figuras
+            resumen = self._persistencia.leer_resumen(self._archivo_persistencia) if sobre_vacio else None
+
+            if self._carga_perezosa:
+                # Solo se abren el índice y el resumen; las figuras se leen al accederlas
+                if isinstance(self._figuras, MapaFigurasPerezoso):
+                    self._figuras.cerrar()
+                self._figuras = MapaFigurasPerezoso(self._archivo_persistencia)
+                self._resumen = self._persistencia.obtener_resumen(self._archivo_persistencia)
+                GeneradorID.actualizar_si_mayor(self._resumen.get_id_maximo())
+            elif self._persistencia.esta_fragmentado(self._archivo_persistencia):
+                # Cada fragmento se analiza en otro proceso y aquí solo se combinan;
+                # el ID máximo parte del que el manifiesto registró al guardar
+                id_maximo = self._persistencia.leer_manifiesto(self._archivo_persistencia)['id_maximo']
+                fragmentos = self._persistencia.cargar_fragmentos_en_paralelo(self._archivo_persistencia)
+                for figuras_fragmento, id_maximo_fragmento in fragmentos:
+                    for figura in figuras_fragmento:
+                        if resumen is None:
+                            self._poner(figura.get_id(), figura)
+                        else:
+                            self._figuras[figura.get_id()] = figura
+                    id_maximo = max(id_maximo, id_maximo_fragmento)
+                if resumen is not None:
+                    self._resumen = resumen
+                GeneradorID.actualizar_si_mayor(id_maximo)
+            elif resumen is not None:
+                # Con el resumen vigente, conteos e ID máximo ya se conocen
+                for figura in self._persistencia.iterar_desde_archivo(self._archivo_persistencia):
+                    self._figuras[figura.get_id()] = figura
+                self._resumen = resumen
+                GeneradorID.actualizar_si_mayor(resumen.get_id_maximo())
+            else:
+                # Las figuras se insertan a medida que se leen, sin lista intermedia
+                for datos in self._persistencia.iterar_registros(self._archivo_persistencia):
+                    figura = self._persistencia.dict_a_figura(datos)
+                    if figura:
+                        self._poner(figura.get_id(), figura, datos)
+                        GeneradorID.actualizar_si_mayor(figura.get_id())
+
+                if self._figuras and os.path.exists(self._archivo_persistencia):
+                    self._persistencia.guardar_resumen(self._resumen, self._archivo_persistencia)
+
+            # Igual que el resumen, las distribuciones guardadas valen sobre un repositorio vacío
+            if sobre_vacio:
+                self._distribuciones = self._persistencia.leer_distribuciones(self._archivo_persistencia)
+                self._guardar_distribuciones = self._distribuciones is not None
+
+            if self._diario is not None:
+                self._reproducir_diario()
 
             return True
 
@@ -162,24 +1553,105 @@ class RepositorioFiguras:
             print(f"Error al cargar figuras: {e}")
             return False
 
-    def obtener_estadisticas(self) -> Dict[str, int]:
+    def _reproducir_diario(self) -> None:
+        """Aplica sobre las figuras cargadas las operaciones anotadas en el diario"""
+        registros, self._posicion_diario = self._diario.leer_desde(self._posicion_diario)
+        for registro in registros:
+            self._aplicar_registro(registro)
+
+    def _aplicar_registro(self, registro: Dict[str, Any], figura: Optional[Figura] = None) -> None:
+        """
+        Aplica en memoria una operación del diario
+
+        Args:
+            registro (Dict[str, Any]): Registro del diario
+            figura (Optional[Figura]): Figura ya construida para un alta; si no
+                se indica, se reconstruye desde el registro
+        """
+        operacion = registro.get('op')
+
+        if operacion == DiarioFiguras.OPERACION_ALTA:
+            if figura is None:
+                figura = self._persistencia.dict_a_figura(registro['figura'])
+            if figura:
+                self._poner(figura.get_id(), figura, registro['figura'])
+                GeneradorID.actualizar_si_mayor(figura.get_id())
+        elif operacion == DiarioFiguras.OPERACION_BAJA:
+            self._quitar(registro['id'])
+        elif operacion == DiarioFiguras.OPERACION_LIMPIAR:
+            self._vaciar()
+
+    def obtener_estadisticas(self) -> Dict[str, Any]:
         """
         Obtiene estadísticas del repositorio
 
+        Los conteos y las sumas de métricas se mantienen en el resumen con
+        cada alta, baja, limpieza o cambio de dimensión: no se recorren (ni
+        materializan) figuras, así que el costo no depende de cuántas hay.
+
         Returns:
-            Dict[str, int]: Diccionario con estadísticas
+            Dict[str, Any]: 'total', la cantidad de cada tipo (nombre en
+                minúsculas) y en 'metricas' la suma de cada métrica por tipo
         """
-        estadisticas = {
-            'total': len(self._figuras),
-            'círculo': 0,
-            'cuadrado': 0,
-            'cubo': 0,
-            'esfera': 0
-        }
+        with self._cerrojo:
+            estadisticas: Dict[str, Any] = {'total': len(self._figuras)}
+            metricas = {}
+            for tipo in RegistroFiguras.tipos():
+                nombre = tipo.get_nombre().lower()
+                estadisticas[nombre] = 0
+                metricas[nombre] = self._resumen.get_metricas(nombre)
 
-        for figura in self._figuras.values():
-            nombre = figura.get_nombre().lower()
-            if nombre in estadisticas:
-                estadisticas[nombre] += 1
+            estadisticas.update(self._resumen.cantidad_por_tipo())
+            estadisticas['metricas'] = metricas
 
         return estadisticas
+
+    def obtener_agregados(self) -> Dict[str, Any]:
+        """
+        Agrega cada métrica derivada por tipo y por categoría en una pasada
+
+        Las figuras se recorren una a una (en los modos perezoso y acotado no
+        quedan todas en memoria). Para agregar un archivo sin abrir un
+        repositorio, ver AgregadorMetricas.desde_archivo.
+
+        Returns:
+            Dict[str, Any]: 'por_tipo' y 'por_categoria', cada uno {grupo:
+                {métrica: {'cantidad', 'suma', 'media', 'minimo', 'maximo', 'varianza'}}}
+        """
+        with self._cerrojo:
+            return AgregadorMetricas.desde_figuras(self._figuras.values())
+
+    def obtener_resumen(self) -> ResumenFiguras:
+        """
+        Obtiene el resumen del repositorio: conteos, ID máximo y mínimo,
+        máximo y suma de cada dimensión por tipo
+
+        Si al eliminar figuras quedaron cotas por recalcular, se recorren
+        solo las figuras de esos tipos.
+
+        Returns:
+            ResumenFiguras: Copia del resumen actual
+        """
+        with self._cerrojo:
+            for nombre in self._resumen.tipos_con_cotas_pendientes():
+                self._resumen.recalcular_cotas(nombre, (
+                    self._persistencia.figura_a_dict(figura) for figura in self._figuras.values()
+                    if figura.get_nombre().lower() == nombre
+                ))
+
+            copia = ResumenFiguras()
+            copia.combinar(self._resumen)
+            return copia
+
+    def obtener_estadisticas_cache(self) -> Optional[Dict[str, int]]:
+        """
+        Obtiene los contadores del caché de figuras en modo de memoria acotada
+
+        Returns:
+            Optional[Dict[str, int]]: Aciertos, fallos, desalojos, residentes y
+                capacidad, o None si todas las figuras residen en memoria
+        """
+        with self._cerrojo:
+            if isinstance(self._figuras, MapaFigurasAcotado):
+                return self._figuras.estadisticas_cache()
+        return None
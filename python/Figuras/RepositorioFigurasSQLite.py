@@ -0,0 +1,256 @@
+"""
+Repositorio de figuras respaldado por una base de datos SQLite
+"""
+# pylint: disable=invalid-name
+import json
+import sqlite3
+from typing import Any, Dict, List, Optional
+from Figura import Figura
+from PersistenciaArchivos import PersistenciaArchivos
+from GeneradorID import GeneradorID
+from RegistroFiguras import RegistroFiguras
+from UnidadAdapter import UnidadAdapter
+
+class RepositorioFigurasSQLite:
+    """
+    Repositorio con la misma interfaz pública que RepositorioFiguras, pero
+    que consulta las figuras directamente en SQLite en lugar de cargarlas
+    todas en memoria al iniciar
+    """
+
+    # Una columna por métrica derivada (NULL si la figura no la tiene), para
+    # que las estadísticas las sumen en SQL sin reconstruir figuras
+    _METRICAS = tuple(UnidadAdapter.EXPONENTES_METRICAS)
+
+    _ESQUEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS figuras (
+            id INTEGER PRIMARY KEY,
+            nombre TEXT NOT NULL,
+            nombre_clave TEXT NOT NULL,
+            tipo TEXT NOT NULL,
+            datos TEXT NOT NULL,
+            perimetro REAL,
+            area REAL,
+            area_superficie REAL,
+            volumen REAL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_figuras_nombre ON figuras (nombre_clave)",
+    )
+
+    def __init__(self, archivo_base_datos: str = "figuras.db", auto_guardar: bool = True):
+        """
+        Constructor del repositorio SQLite
+
+        Args:
+            archivo_base_datos (str): Archivo de la base de datos
+            auto_guardar (bool): Si debe confirmar cada modificación al hacerla;
+                si es False se confirman al llamar a guardar_figuras
+        """
+        self._archivo_base_datos = archivo_base_datos
+        self._auto_guardar = auto_guardar
+        self._persistencia = PersistenciaArchivos()
+
+        self._conexion = sqlite3.connect(archivo_base_datos)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute("PRAGMA synchronous=NORMAL")
+        for sentencia in self._ESQUEMA:
+            self._conexion.execute(sentencia)
+        self._agregar_columnas_metricas()
+        self._conexion.commit()
+
+        # El id (INTEGER PRIMARY KEY) está indexado: MAX(id) no recorre la tabla
+        id_maximo = self._conexion.execute("SELECT MAX(id) FROM figuras").fetchone()[0]
+        if id_maximo is not None:
+            GeneradorID.actualizar_si_mayor(id_maximo)
+
+    def _agregar_columnas_metricas(self) -> None:
+        """Agrega las columnas de métricas a una base anterior y las calcula una vez"""
+        columnas = {fila[1] for fila in self._conexion.execute("PRAGMA table_info(figuras)")}
+        faltantes = [metrica for metrica in self._METRICAS if metrica not in columnas]
+        if not faltantes:
+            return
+
+        for metrica in faltantes:
+            self._conexion.execute(f"ALTER TABLE figuras ADD COLUMN {metrica} REAL")
+        filas = self._conexion.execute("SELECT id, datos FROM figuras").fetchall()
+        self._conexion.executemany(
+            f"UPDATE figuras SET {', '.join(f'{metrica} = ?' for metrica in self._METRICAS)} WHERE id = ?",
+            [(*self._valores_metricas(PersistenciaArchivos.metricas_de_registro(json.loads(datos))), id_figura)
+             for id_figura, datos in filas]
+        )
+
+    @classmethod
+    def _valores_metricas(cls, metricas: Dict[str, float]) -> tuple:
+        """Valores de las columnas de métricas, en el orden de _METRICAS"""
+        return tuple(metricas.get(metrica) for metrica in cls._METRICAS)
+
+    def cerrar(self) -> None:
+        """Confirma los cambios pendientes y cierra la conexión"""
+        self._conexion.commit()
+        self._conexion.close()
+
+    def _confirmar_si_corresponde(self) -> None:
+        """Confirma la modificación en curso si el guardado es automático"""
+        if self._auto_guardar:
+            self._conexion.commit()
+
+    def almacenar_figura(self, figura: Figura) -> int:
+        """
+        Almacena una figura en el repositorio
+
+        Args:
+            figura (Figura): Figura a almacenar
+
+        Returns:
+            int: ID de la figura almacenada
+        """
+        id_figura = figura.get_id()
+        datos = self._persistencia.figura_a_dict(figura)
+
+        self._conexion.execute(
+            f"INSERT OR REPLACE INTO figuras (id, nombre, nombre_clave, tipo, datos, {', '.join(self._METRICAS)}) "
+            f"VALUES (?, ?, ?, ?, ?{', ?' * len(self._METRICAS)})",
+            (id_figura, figura.get_nombre(), figura.get_nombre().lower(), figura.get_tipo(),
+             json.dumps(datos, ensure_ascii=False, separators=(',', ':')),
+             *self._valores_metricas(figura.obtener_metricas()))
+        )
+        GeneradorID.actualizar_si_mayor(id_figura)
+        self._confirmar_si_corresponde()
+
+        return id_figura
+
+    def _fila_a_figura(self, fila: tuple) -> Optional[Figura]:
+        """Reconstruye una figura a partir de la columna de datos"""
+        return self._persistencia.dict_a_figura(json.loads(fila[0]))
+
+    def _consultar_figuras(self, consulta: str, parametros: tuple = ()) -> List[Figura]:
+        """Ejecuta una consulta sobre la columna de datos y reconstruye las figuras"""
+        figuras = []
+        for fila in self._conexion.execute(consulta, parametros):
+            figura = self._fila_a_figura(fila)
+            if figura:
+                figuras.append(figura)
+        return figuras
+
+    def obtener_figura(self, figura_id: int) -> Optional[Figura]:
+        """
+        Obtiene una figura por su ID
+
+        Args:
+            figura_id (int): ID de la figura a buscar
+
+        Returns:
+            Optional[Figura]: Figura encontrada o None
+        """
+        fila = self._conexion.execute("SELECT datos FROM figuras WHERE id = ?", (figura_id,)).fetchone()
+        if fila is None:
+            return None
+        return self._fila_a_figura(fila)
+
+    def obtener_todas_figuras(self) -> List[Figura]:
+        """
+        Obtiene todas las figuras del repositorio
+
+        Returns:
+            List[Figura]: Lista de todas las figuras
+        """
+        return self._consultar_figuras("SELECT datos FROM figuras ORDER BY id")
+
+    def eliminar_figura(self, figura_id: int) -> bool:
+        """
+        Elimina una figura del repositorio
+
+        Args:
+            figura_id (int): ID de la figura a eliminar
+
+        Returns:
+            bool: True si se eliminó, False si no existía
+        """
+        cursor = self._conexion.execute("DELETE FROM figuras WHERE id = ?", (figura_id,))
+        self._confirmar_si_corresponde()
+        return cursor.rowcount > 0
+
+    def contar_figuras(self) -> int:
+        """
+        Cuenta el número total de figuras
+
+        Returns:
+            int: Número de figuras en el repositorio
+        """
+        return self._conexion.execute("SELECT COUNT(*) FROM figuras").fetchone()[0]
+
+    def listar_figuras(self) -> List[Figura]:
+        """
+        Lista todas las figuras en el repositorio
+
+        Returns:
+            List[Figura]: Lista de todas las figuras almacenadas
+        """
+        return self.obtener_todas_figuras()
+
+    def buscar_por_tipo(self, tipo: str) -> List[Figura]:
+        """
+        Busca figuras por tipo usando el índice por nombre
+
+        Args:
+            tipo (str): Tipo de figura a buscar
+
+        Returns:
+            List[Figura]: Lista de figuras del tipo especificado
+        """
+        return self._consultar_figuras(
+            "SELECT datos FROM figuras WHERE nombre_clave = ? ORDER BY id", (tipo.lower(),)
+        )
+
+    def limpiar_repositorio(self) -> None:
+        """Elimina todas las figuras del repositorio"""
+        self._conexion.execute("DELETE FROM figuras")
+        GeneradorID.resetear()
+        self._confirmar_si_corresponde()
+
+    def guardar_figuras(self) -> bool:
+        """
+        Confirma las modificaciones pendientes
+
+        Returns:
+            bool: True si se confirmó exitosamente
+        """
+        try:
+            self._conexion.commit()
+            return True
+        except sqlite3.Error as e:
+            print(f"Error al guardar figuras: {e}")
+            return False
+
+    def obtener_estadisticas(self) -> Dict[str, Any]:
+        """
+        Obtiene estadísticas del repositorio con una agregación GROUP BY
+
+        Conteos y sumas de métricas salen de la misma consulta, sobre las
+        columnas de métricas: no se reconstruye ninguna figura.
+
+        Returns:
+            Dict[str, Any]: 'total', la cantidad de cada tipo (nombre en
+                minúsculas) y en 'metricas' la suma de cada métrica por tipo,
+                como RepositorioFiguras.obtener_estadisticas
+        """
+        estadisticas: Dict[str, Any] = {'total': 0}
+        metricas: Dict[str, Dict[str, float]] = {}
+        for tipo in RegistroFiguras.tipos():
+            estadisticas[tipo.get_nombre().lower()] = 0
+            metricas[tipo.get_nombre().lower()] = {}
+
+        sumas = ", ".join(f"SUM({metrica})" for metrica in self._METRICAS)
+        consulta = f"SELECT nombre_clave, COUNT(*), {sumas} FROM figuras GROUP BY nombre_clave"
+        for nombre, cantidad, *totales in self._conexion.execute(consulta):
+            estadisticas['total'] += cantidad
+            if nombre in estadisticas:
+                estadisticas[nombre] += cantidad
+                # SUM de una columna sin valores es NULL: el tipo no tiene esa métrica
+                metricas[nombre] = {metrica: total for metrica, total in zip(self._METRICAS, totales)
+                                    if total is not None}
+
+        estadisticas['metricas'] = metricas
+        return estadisticas
@@ -0,0 +1,274 @@
+"""
+Resumen agregado de una colección de figuras
+"""
+# pylint: disable=invalid-name
+from typing import Any, Dict, Iterable, List, Optional, Set
+from RegistroFiguras import RegistroFiguras
+from TipoFigura import TipoFigura
+
+
+class ResumenFiguras:
+    """
+    Totales de una colección de figuras: cantidad por tipo, mayor ID, por
+    cada dimensión de cada tipo mínimo, máximo y suma, y por cada tipo la
+    suma de cada métrica derivada (área y perímetro, o volumen y área de
+    superficie)
+
+    Se alimenta con los diccionarios serializados de las figuras, por lo que
+    puede construirse mientras se escribe o se lee un archivo. Solo se
+    instancia una figura para calcular sus métricas si no se reciben junto
+    con ella ni están guardadas en su diccionario. Al quitar una figura los conteos y sumas se ajustan de forma
+    exacta; si la figura tenía el mínimo o el máximo de una dimensión, las
+    cotas de su tipo quedan pendientes hasta que se recalculen.
+    """
+
+    VERSION = 2
+
+    def __init__(self):
+        """Crea un resumen vacío"""
+        self._total = 0
+        self._id_maximo = 0
+        # nombre del tipo en minúsculas -> {'cantidad': int, 'dimensiones': {dimensión: cotas},
+        #                                   'metricas': {métrica: suma}}
+        self._tipos: Dict[str, Dict[str, Any]] = {}
+        self._cotas_pendientes: Set[str] = set()
+
+    def get_total(self) -> int:
+        """Obtiene la cantidad total de figuras"""
+        return self._total
+
+    def get_id_maximo(self) -> int:
+        """Obtiene el mayor ID visto (no disminuye al quitar figuras)"""
+        return self._id_maximo
+
+    def cantidad_por_tipo(self) -> Dict[str, int]:
+        """
+        Obtiene la cantidad de figuras de cada tipo presente
+
+        Returns:
+            Dict[str, int]: Nombre del tipo en minúsculas -> cantidad
+        """
+        return {nombre: tipo['cantidad'] for nombre, tipo in self._tipos.items() if tipo['cantidad']}
+
+    def get_dimension(self, nombre: str, dimension: str) -> Optional[Dict[str, float]]:
+        """
+        Obtiene mínimo, máximo y suma de una dimensión de un tipo
+
+        Args:
+            nombre (str): Nombre del tipo ('círculo', 'cilindro', ...)
+            dimension (str): Nombre de la dimensión
+
+        Returns:
+            Optional[Dict[str, float]]: {'minimo', 'maximo', 'suma'} o None si no hay figuras
+        """
+        tipo = self._tipos.get(nombre.lower())
+        if not tipo or not tipo['cantidad']:
+            return None
+        cotas = tipo['dimensiones'].get(dimension)
+        return dict(cotas) if cotas is not None else None
+
+    def get_metricas(self, nombre: str) -> Dict[str, float]:
+        """
+        Obtiene la suma de cada métrica derivada de un tipo
+
+        Args:
+            nombre (str): Nombre del tipo ('círculo', 'cilindro', ...)
+
+        Returns:
+            Dict[str, float]: Métrica -> suma (vacío si no hay figuras)
+        """
+        tipo = self._tipos.get(nombre.lower())
+        if not tipo or not tipo['cantidad']:
+            return {}
+        return dict(tipo['metricas'])
+
+    @staticmethod
+    def _metricas_de(tipo_figura: TipoFigura, datos: Dict[str, Any],
+                     metricas: Optional[Dict[str, float]]) -> Dict[str, float]:
+        """Métricas de una figura: las recibidas, las guardadas o las calculadas"""
+        if metricas is not None:
+            return metricas
+        if 'metricas' in datos:
+            return datos['metricas']
+        return tipo_figura.desde_dict(datos).obtener_metricas()
+
+    def tipos_con_cotas_pendientes(self) -> Set[str]:
+        """Obtiene los tipos cuyas cotas deben recalcularse con recalcular_cotas"""
+        return set(self._cotas_pendientes)
+
+    def agregar(self, datos: Dict[str, Any], metricas: Optional[Dict[str, float]] = None) -> None:
+        """
+        Suma una figura al resumen
+
+        Args:
+            datos (Dict[str, Any]): Diccionario serializado de la figura
+            metricas (Optional[Dict[str, float]]): Sus métricas, si ya se conocen
+        """
+        self._total += 1
+        self._id_maximo = max(self._id_maximo, datos['id'])
+
+        tipo_figura = RegistroFiguras.obtener(datos['nombre'])
+        if tipo_figura is None:
+            return
+
+        nombre = tipo_figura.get_nombre().lower()
+        tipo = self._tipos.get(nombre)
+        if tipo is None:
+            tipo = self._tipos[nombre] = {'cantidad': 0, 'dimensiones': {}, 'metricas': {}}
+        tipo['cantidad'] += 1
+
+        sumas = tipo['metricas']
+        for metrica, valor in self._metricas_de(tipo_figura, datos, metricas).items():
+            sumas[metrica] = sumas.get(metrica, 0.0) + valor
+
+        for dimension in tipo_figura.get_dimensiones():
+            # Una figura renombrada puede no tener las dimensiones de su nuevo tipo
+            valor = datos.get(dimension)
+            if valor is None:
+                continue
+            cotas = tipo['dimensiones'].get(dimension)
+            if cotas is None or tipo['cantidad'] == 1:
+                tipo['dimensiones'][dimension] = {'minimo': valor, 'maximo': valor, 'suma': valor}
+                continue
+            cotas['suma'] += valor
+            if valor < cotas['minimo']:
+                cotas['minimo'] = valor
+            if valor > cotas['maximo']:
+                cotas['maximo'] = valor
+
+    def quitar(self, datos: Dict[str, Any], metricas: Optional[Dict[str, float]] = None) -> None:
+        """
+        Resta una figura del resumen
+
+        Args:
+            datos (Dict[str, Any]): Diccionario serializado de la figura
+            metricas (Optional[Dict[str, float]]): Sus métricas, si ya se conocen
+        """
+        self._total -= 1
+
+        tipo_figura = RegistroFiguras.obtener(datos['nombre'])
+        if tipo_figura is None:
+            return
+
+        nombre = tipo_figura.get_nombre().lower()
+        tipo = self._tipos.get(nombre)
+        if tipo is None:
+            return
+        tipo['cantidad'] -= 1
+        if not tipo['cantidad']:
+            tipo['dimensiones'] = {}
+            tipo['metricas'] = {}
+            self._cotas_pendientes.discard(nombre)
+            return
+
+        sumas = tipo['metricas']
+        for metrica, valor in self._metricas_de(tipo_figura, datos, metricas).items():
+            sumas[metrica] = sumas.get(metrica, 0.0) - valor
+
+        for dimension in tipo_figura.get_dimensiones():
+            valor = datos.get(dimension)
+            cotas = tipo['dimensiones'].get(dimension)
+            if valor is None or cotas is None:
+                continue
+            cotas['suma'] -= valor
+            if valor <= cotas['minimo'] or valor >= cotas['maximo']:
+                self._cotas_pendientes.add(nombre)
+
+    def recalcular_cotas(self, nombre: str, registros: Iterable[Dict[str, Any]]) -> None:
+        """
+        Recalcula mínimos y máximos de un tipo a partir de sus figuras
+
+        Args:
+            nombre (str): Nombre del tipo
+            registros (Iterable[Dict[str, Any]]): Diccionarios de todas las figuras de ese tipo
+        """
+        tipo = self._tipos.get(nombre.lower())
+        self._cotas_pendientes.discard(nombre.lower())
+        if not tipo:
+            return
+
+        nuevas: Dict[str, List[float]] = {}
+        for registro in registros:
+            for dimension in tipo['dimensiones']:
+                valor = registro.get(dimension)
+                if valor is None:
+                    continue
+                cotas = nuevas.get(dimension)
+                if cotas is None:
+                    nuevas[dimension] = [valor, valor]
+                else:
+                    cotas[0] = min(cotas[0], valor)
+                    cotas[1] = max(cotas[1], valor)
+
+        for dimension, (minimo, maximo) in nuevas.items():
+            tipo['dimensiones'][dimension]['minimo'] = minimo
+            tipo['dimensiones'][dimension]['maximo'] = maximo
+
+    def combinar(self, otro: 'ResumenFiguras') -> None:
+        """
+        Acumula otro resumen (por ejemplo, el de otro fragmento)
+
+        Args:
+            otro (ResumenFiguras): Resumen a sumar a este
+        """
+        self._total += otro._total
+        self._id_maximo = max(self._id_maximo, otro._id_maximo)
+        self._cotas_pendientes |= otro._cotas_pendientes
+
+        for nombre, tipo_otro in otro._tipos.items():
+            if not tipo_otro['cantidad']:
+                continue
+            tipo = self._tipos.get(nombre)
+            if not tipo or not tipo['cantidad']:
+                self._tipos[nombre] = {
+                    'cantidad': tipo_otro['cantidad'],
+                    'dimensiones': {d: dict(c) for d, c in tipo_otro['dimensiones'].items()},
+                    'metricas': dict(tipo_otro['metricas']),
+                }
+                continue
+
+            tipo['cantidad'] += tipo_otro['cantidad']
+            for metrica, suma in tipo_otro['metricas'].items():
+                tipo['metricas'][metrica] = tipo['metricas'].get(metrica, 0.0) + suma
+            for dimension, cotas_otro in tipo_otro['dimensiones'].items():
+                cotas = tipo['dimensiones'][dimension]
+                cotas['suma'] += cotas_otro['suma']
+                cotas['minimo'] = min(cotas['minimo'], cotas_otro['minimo'])
+                cotas['maximo'] = max(cotas['maximo'], cotas_otro['maximo'])
+
+    def a_dict(self) -> Dict[str, Any]:
+        """
+        Convierte el resumen a diccionario para serialización
+
+        Returns:
+            Dict[str, Any]: Versión, totales y detalle por tipo
+        """
+        return {
+            'version': self.VERSION,
+            'total': self._total,
+            'id_maximo': self._id_maximo,
+            'tipos': {nombre: tipo for nombre, tipo in self._tipos.items() if tipo['cantidad']},
+        }
+
+    @classmethod
+    def desde_dict(cls, datos: Dict[str, Any]) -> 'ResumenFiguras':
+        """
+        Reconstruye un resumen serializado con a_dict
+
+        Args:
+            datos (Dict[str, Any]): Diccionario del resumen
+
+        Returns:
+            ResumenFiguras: Resumen reconstruido
+
+        Raises:
+            ValueError: Si la versión no es compatible
+        """
+        if datos.get('version') != cls.VERSION:
+            raise ValueError(f"Versión de resumen no soportada: {datos.get('version')}")
+
+        resumen = cls()
+        resumen._total = datos['total']
+        resumen._id_maximo = datos['id_maximo']
+        resumen._tipos = datos['tipos']
+        return resumen
@@ -0,0 +1,276 @@
+"""
+Sketch de cuantiles KLL, acotado en memoria y combinable
+"""
+# pylint: disable=invalid-name
+import bisect
+import itertools
+import pickle
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class SketchCuantiles:
+    """
+    Resumen aproximado de la distribución de una serie de valores (KLL)
+
+    Los valores se guardan en niveles (compactadores); un valor del nivel h
+    representa 2^h valores originales. Cuando el sketch excede su capacidad,
+    el nivel lleno más bajo se ordena y la mitad de sus valores (los de
+    posición par o impar, alternando) sube al nivel siguiente. La capacidad
+    de cada nivel decrece geométricamente hacia los inferiores, así que el
+    sketch retiene O(k) valores sin importar cuántos recibió, y el error de
+    rango de un cuantil es de alrededor de 1,7/k (k = 200: cerca del 1 %).
+    Cantidad, mínimo y máximo son exactos.
+
+    Dos sketches se combinan juntando sus niveles y compactando, con la
+    misma cota de error, de modo que cada archivo puede resumirse por
+    separado. Las consultas ordenan los valores retenidos una vez y luego se
+    resuelven con búsqueda binaria. Con el protocolo 5 de pickle, los valores
+    de cada nivel se serializan como un arreglo contiguo fuera de banda.
+    """
+
+    K_DEFECTO = 200
+
+    _FACTOR_CAPACIDAD = 2 / 3
+
+    def __init__(self, k: int = K_DEFECTO):
+        """
+        Crea un sketch vacío
+
+        Args:
+            k (int): Capacidad del nivel superior; mayor k, menor error y más memoria
+
+        Raises:
+            ValueError: Si k es menor que 2
+        """
+        if k < 2:
+            raise ValueError("El parámetro k del sketch debe ser al menos 2")
+
+        self._k = k
+        self._cantidad = 0
+        self._minimo: Optional[float] = None
+        self._maximo: Optional[float] = None
+        self._niveles: List[List[float]] = [[]]
+        self._retenidos = 0
+        # Por nivel, qué mitad sube en su próxima compactación
+        self._alternancia: List[int] = [0]
+        self._capacidad_total = self._calcular_capacidad_total()
+        # Valores retenidos ordenados y pesos acumulados, hasta el próximo cambio
+        self._ordenados: Optional[Tuple[List[float], List[int]]] = None
+
+    def get_cantidad(self) -> int:
+        """Obtiene la cantidad de valores recibidos"""
+        return self._cantidad
+
+    def get_minimo(self) -> Optional[float]:
+        """Obtiene el menor valor recibido (None si está vacío)"""
+        return self._minimo
+
+    def get_maximo(self) -> Optional[float]:
+        """Obtiene el mayor valor recibido (None si está vacío)"""
+        return self._maximo
+
+    def agregar(self, valor: float) -> None:
+        """
+        Agrega un valor al sketch
+
+        Args:
+            valor (float): Valor a agregar
+        """
+        self._cantidad += 1
+        self._minimo = valor if self._minimo is None else min(self._minimo, valor)
+        self._maximo = valor if self._maximo is None else max(self._maximo, valor)
+        self._niveles[0].append(valor)
+        self._retenidos += 1
+        self._ordenados = None
+        if self._retenidos > self._capacidad_total:
+            self._compactar()
+
+    def combinar(self, otro: 'SketchCuantiles') -> None:
+        """
+        Incorpora los valores resumidos por otro sketch
+
+        Args:
+            otro (SketchCuantiles): Sketch a combinar con este (no se modifica)
+        """
+        if not otro._cantidad:
+            return
+
+        while len(self._niveles) < len(otro._niveles):
+            self._agregar_nivel()
+        for nivel, valores in enumerate(otro._niveles):
+            self._niveles[nivel].extend(valores)
+        self._retenidos += otro._retenidos
+
+        self._cantidad += otro._cantidad
+        self._minimo = otro._minimo if self._minimo is None else min(self._minimo, otro._minimo)
+        self._maximo = otro._maximo if self._maximo is None else max(self._maximo, otro._maximo)
+        self._ordenados = None
+        self._compactar()
+
+    def _capacidad(self, nivel: int) -> int:
+        """Cantidad de valores que admite un nivel antes de compactarse"""
+        profundidad = len(self._niveles) - 1 - nivel
+        return max(2, int(self._k * self._FACTOR_CAPACIDAD ** profundidad))
+
+    def _calcular_capacidad_total(self) -> int:
+        """Cantidad de valores que admite el sketch con sus niveles actuales"""
+        return sum(self._capacidad(nivel) for nivel in range(len(self._niveles)))
+
+    def _agregar_nivel(self) -> None:
+        """Agrega un nivel superior, lo que amplía la capacidad de los demás"""
+        self._niveles.append([])
+        self._alternancia.append(0)
+        self._capacidad_total = self._calcular_capacidad_total()
+
+    def _compactar(self) -> None:
+        """Mientras se excede la capacidad total, compacta el nivel lleno más bajo"""
+        while self._retenidos > self._capacidad_total:
+            nivel = next(nivel for nivel, valores in enumerate(self._niveles)
+                         if len(valores) >= self._capacidad(nivel))
+            if nivel + 1 == len(self._niveles):
+                self._agregar_nivel()
+
+            valores = sorted(self._niveles[nivel])
+            # Con cantidad impar, el último valor se queda en su nivel
+            sobrante = valores[-1:] if len(valores) % 2 else []
+            pares = valores[:len(valores) - len(sobrante)]
+            self._niveles[nivel + 1].extend(pares[self._alternancia[nivel]::2])
+            self._alternancia[nivel] ^= 1
+            self._retenidos -= len(pares) - len(pares) // 2
+            self._niveles[nivel] = sobrante
+
+    def _preparar(self) -> Tuple[List[float], List[int]]:
+        """Ordena los valores retenidos junto con sus pesos acumulados"""
+        if self._ordenados is None:
+            ponderados = sorted(
+                (valor, 1 << nivel) for nivel, valores in enumerate(self._niveles) for valor in valores
+            )
+            self._ordenados = (
+                [valor for valor, _ in ponderados],
+                list(itertools.accumulate(peso for _, peso in ponderados)),
+            )
+        return self._ordenados
+
+    def cuantil(self, fraccion: float) -> Optional[float]:
+        """
+        Estima el valor bajo el cual queda una fracción de los valores
+
+        Args:
+            fraccion (float): Entre 0 (mínimo) y 1 (máximo); 0.5 es la mediana
+
+        Returns:
+            Optional[float]: Valor estimado, o None si el sketch está vacío
+        """
+        if not self._cantidad:
+            return None
+        if fraccion <= 0:
+            return self._minimo
+        if fraccion >= 1:
+            return self._maximo
+
+        valores, acumulados = self._preparar()
+        posicion = bisect.bisect_left(acumulados, fraccion * acumulados[-1])
+        return valores[min(posicion, len(valores) - 1)]
+
+    def rango(self, valor: float) -> int:
+        """
+        Estima cuántos valores recibidos son menores o iguales que uno dado
+
+        Args:
+            valor (float): Valor de referencia
+
+        Returns:
+            int: Cantidad estimada
+        """
+        if not self._cantidad:
+            return 0
+        if valor >= self._maximo:
+            return self._cantidad
+
+        valores, acumulados = self._preparar()
+        posicion = bisect.bisect_right(valores, valor)
+        return acumulados[posicion - 1] if posicion else 0
+
+    def histograma(self, intervalos: int) -> List[Tuple[float, float, int]]:
+        """
+        Estima cuántos valores caen en cada intervalo de igual ancho entre mínimo y máximo
+
+        Args:
+            intervalos (int): Cantidad de intervalos
+
+        Returns:
+            List[Tuple[float, float, int]]: Desde, hasta y cantidad estimada de
+                cada intervalo (el primero incluye el mínimo); vacía si no hay valores
+
+        Raises:
+            ValueError: Si la cantidad de intervalos no es positiva
+        """
+        if intervalos < 1:
+            raise ValueError("La cantidad de intervalos debe ser al menos 1")
+        if not self._cantidad:
+            return []
+
+        ancho = (self._maximo - self._minimo) / intervalos
+        limites = [self._minimo + ancho * posicion for posicion in range(intervalos)] + [self._maximo]
+        rangos = [0] + [self.rango(limite) for limite in limites[1:]]
+        return [
+            (limites[posicion], limites[posicion + 1], rangos[posicion + 1] - rangos[posicion])
+            for posicion in range(intervalos)
+        ]
+
+    def a_dict(self) -> Dict[str, Any]:
+        """
+        Convierte el sketch a diccionario para serialización
+
+        Returns:
+            Dict[str, Any]: Parámetro k, cantidad, extremos y valores de cada nivel
+        """
+        return {
+            'k': self._k,
+            'cantidad': self._cantidad,
+            'minimo': self._minimo,
+            'maximo': self._maximo,
+            'niveles': self._niveles,
+            'alternancia': self._alternancia,
+        }
+
+    @classmethod
+    def desde_dict(cls, datos: Dict[str, Any]) -> 'SketchCuantiles':
+        """
+        Reconstruye un sketch serializado con a_dict
+
+        Args:
+            datos (Dict[str, Any]): Diccionario del sketch
+
+        Returns:
+            SketchCuantiles: Sketch reconstruido
+        """
+        sketch = cls(datos['k'])
+        sketch._cantidad = datos['cantidad']
+        sketch._minimo = datos['minimo']
+        sketch._maximo = datos['maximo']
+        sketch._niveles = [list(valores) for valores in datos['niveles']]
+        sketch._retenidos = sum(map(len, sketch._niveles))
+        sketch._alternancia = list(datos['alternancia'])
+        sketch._capacidad_total = sketch._calcular_capacidad_total()
+        return sketch
+
+    def __reduce_ex__(self, protocolo: int) -> Tuple[Any, ...]:
+        """
+        Serializa el sketch para pickle
+
+        Con el protocolo 5 cada nivel va como un arreglo float64 envuelto en
+        pickle.PickleBuffer, que puede viajar fuera de banda.
+        """
+        if protocolo < 5:
+            return SketchCuantiles.desde_dict, (self.a_dict(),)
+        datos = self.a_dict()
+        datos['niveles'] = [pickle.PickleBuffer(array('d', valores)) for valores in self._niveles]
+        return SketchCuantiles._desde_buffers, (datos,)
+
+    @classmethod
+    def _desde_buffers(cls, datos: Dict[str, Any]) -> 'SketchCuantiles':
+        """Reconstruye un sketch serializado con el protocolo 5 de pickle"""
+        datos['niveles'] = [memoryview(nivel).cast('B').cast('d').tolist() for nivel in datos['niveles']]
+        return cls.desde_dict(datos)
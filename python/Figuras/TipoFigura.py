@@ -0,0 +1,165 @@
+"""
+Descripción de un tipo de figura para el registro de tipos
+"""
+# pylint: disable=invalid-name
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Type
+from Figura import Figura
+from UnidadMedida import UnidadMedida
+from UnidadAdapter import UnidadAdapter
+
+class TipoFigura:
+    """
+    Reúne lo necesario para tratar un tipo de figura sin inspeccionarla:
+    su clase, su código binario, sus dimensiones (que definen cómo se
+    serializa) y cómo se muestran
+
+    La clase debe recibir las dimensiones en el orden declarado seguidas del
+    ID, y exponer un get_<dimension>() por cada una.
+    """
+
+    def __init__(self, clave: str, codigo: int, clase: Type[Figura], nombre: str,
+                 categoria: str, dimensiones: Sequence[str],
+                 formateador: Optional[Callable[[Figura, UnidadMedida], List[str]]] = None):
+        """
+        Constructor del tipo de figura
+
+        Args:
+            clave (str): Clave usada por la fábrica y los menús (por ejemplo 'circulo')
+            codigo (int): Código del tipo en el formato binario (1-255)
+            clase (Type[Figura]): Clase que implementa la figura
+            nombre (str): Nombre de la figura tal como lo devuelve get_nombre()
+            categoria (str): "2D" o "3D"
+            dimensiones (Sequence[str]): Nombres de las dimensiones, en el orden del constructor
+            formateador (Optional[Callable[[Figura, UnidadMedida], List[str]]]): Líneas con
+                las dimensiones para mostrar; por defecto una línea por dimensión
+
+        Raises:
+            ValueError: Si el código está fuera de rango o no hay dimensiones
+        """
+        if not 1 <= codigo <= 255:
+            raise ValueError(f"Código de tipo fuera de rango: {codigo}")
+        if not dimensiones:
+            raise ValueError("Un tipo de figura necesita al menos una dimensión")
+
+        self._clave = clave
+        self._codigo = codigo
+        self._clase = clase
+        self._nombre = nombre
+        self._categoria = categoria
+        self._dimensiones = tuple(dimensiones)
+        self._formateador = formateador or self._formatear_dimensiones
+        # Métodos get_<dimension> resueltos una sola vez
+        self._lectores = tuple(getattr(clase, f"get_{dimension}") for dimension in self._dimensiones)
+
+    def get_clave(self) -> str:
+        """Obtiene la clave del tipo"""
+        return self._clave
+
+    def get_codigo(self) -> int:
+        """Obtiene el código binario del tipo"""
+        return self._codigo
+
+    def get_clase(self) -> Type[Figura]:
+        """Obtiene la clase que implementa el tipo"""
+        return self._clase
+
+    def get_nombre(self) -> str:
+        """Obtiene el nombre de las figuras de este tipo"""
+        return self._nombre
+
+    def get_categoria(self) -> str:
+        """Obtiene la categoría (2D o 3D) del tipo"""
+        return self._categoria
+
+    def get_dimensiones(self) -> Tuple[str, ...]:
+        """Obtiene los nombres de las dimensiones del tipo"""
+        return self._dimensiones
+
+    def crear(self, valores: Sequence[float], id_figura: int) -> Figura:
+        """
+        Construye una figura de este tipo
+
+        Args:
+            valores (Sequence[float]): Una dimensión por cada nombre de get_dimensiones()
+            id_figura (int): ID de la figura
+
+        Returns:
+            Figura: Figura creada
+
+        Raises:
+            ValueError: Si la cantidad de dimensiones no corresponde
+        """
+        if len(valores) != len(self._dimensiones):
+            raise ValueError(f"{self._nombre} requiere {len(self._dimensiones)} dimensiones "
+                             f"({', '.join(self._dimensiones)}), se recibieron {len(valores)}")
+        return self._clase(*valores, id_figura)
+
+    def valores(self, figura: Figura) -> Tuple[float, ...]:
+        """
+        Obtiene las dimensiones de una figura en el orden declarado
+
+        Args:
+            figura (Figura): Figura de este tipo
+
+        Returns:
+            Tuple[float, ...]: Valor de cada dimensión
+        """
+        return tuple(lector(figura) for lector in self._lectores)
+
+    def a_dict(self, figura: Figura, incluir_metricas: bool = False) -> Dict[str, Any]:
+        """
+        Serializa una figura de este tipo
+
+        Args:
+            figura (Figura): Figura a convertir
+            incluir_metricas (bool): Si se agregan sus métricas derivadas en 'metricas'
+
+        Returns:
+            Dict[str, Any]: Diccionario con id, nombre, tipo y una clave por dimensión
+        """
+        datos = {
+            'id': figura.get_id(),
+            'nombre': figura.get_nombre(),
+            'tipo': figura.get_tipo()
+        }
+        for dimension, lector in zip(self._dimensiones, self._lectores):
+            datos[dimension] = lector(figura)
+        if incluir_metricas:
+            datos['metricas'] = figura.obtener_metricas()
+        return datos
+
+    def desde_dict(self, datos: Dict[str, Any]) -> Figura:
+        """
+        Reconstruye una figura de este tipo a partir de su diccionario
+
+        Args:
+            datos (Dict[str, Any]): Diccionario producido por a_dict
+
+        Returns:
+            Figura: Figura reconstruida
+
+        Raises:
+            KeyError: Si falta alguna dimensión
+        """
+        return self._clase(*[datos[dimension] for dimension in self._dimensiones], datos['id'])
+
+    def formatear(self, figura: Figura, unidad: UnidadMedida) -> List[str]:
+        """
+        Obtiene las líneas que describen las dimensiones de una figura
+
+        Args:
+            figura (Figura): Figura de este tipo
+            unidad (UnidadMedida): Unidad en que se muestran
+
+        Returns:
+            List[str]: Líneas formateadas
+        """
+        return self._formateador(figura, unidad)
+
+    def _formatear_dimensiones(self, figura: Figura, unidad: UnidadMedida) -> List[str]:
+        """Formateador por defecto: una línea '<Dimensión>: <valor> <unidad>' por dimensión"""
+        lineas = []
+        for dimension, valor in zip(self._dimensiones, self.valores(figura)):
+            convertido = UnidadAdapter.convertir(valor, UnidadMedida.METROS, unidad)
+            lineas.append(f"   {dimension.capitalize()}: {UnidadAdapter.formatear_con_unidad(convertido, unidad)}")
+        return lineas
@@ -7,6 +7,9 @@ from UnidadMedida import UnidadMedida
 class UnidadAdapter:
     """Adaptador para conversión entre diferentes unidades de medida"""
 
+    # Potencia de la unidad de longitud en que se expresa cada métrica derivada
+    EXPONENTES_METRICAS = {'perimetro': 1, 'area': 2, 'area_superficie': 2, 'volumen': 3}
+
     @staticmethod
     def convertir(valor: float, desde: UnidadMedida, hacia: UnidadMedida) -> float:
         """
@@ -32,6 +35,31 @@ class UnidadAdapter:
 
         return valor_convertido
 
+    @staticmethod
+    def convertir_metrica(valor: float, metrica: str, desde: UnidadMedida, hacia: UnidadMedida) -> float:
+        """
+        Convierte el valor de una métrica derivada (unidad, unidad² o unidad³)
+
+        Args:
+            valor (float): Valor a convertir
+            metrica (str): 'perimetro', 'area', 'area_superficie' o 'volumen'
+            desde (UnidadMedida): Unidad de longitud de origen
+            hacia (UnidadMedida): Unidad de longitud de destino
+
+        Returns:
+            float: Valor convertido
+
+        Raises:
+            ValueError: Si la métrica no se conoce
+        """
+        exponente = UnidadAdapter.EXPONENTES_METRICAS.get(metrica)
+        if exponente is None:
+            raise ValueError(f"Métrica desconocida: {metrica}")
+        if desde == hacia:
+            return valor
+
+        return valor * (desde.get_factor_conversion() / hacia.get_factor_conversion()) ** exponente
+
     @staticmethod
     def formatear_con_unidad(valor: float, unidad: UnidadMedida) -> str:
         """
@@ -79,9 +79,9 @@ def before_scenario(context: Any, scenario: Any) -> None:
     # Cambiar al directorio temporal para archivos de prueba
     os.chdir(context.temp_dir)
     
-    # Limpiar archivos de prueba anteriores
+    # Limpiar archivos de prueba anteriores (datos y archivos auxiliares)
     for file in os.listdir(context.temp_dir):
-        if file.endswith('.json'):
+        if file.endswith('.json') or file.startswith('test_'):
             os.remove(os.path.join(context.temp_dir, file))
     
     # Inicializar variables de contexto para el escenario
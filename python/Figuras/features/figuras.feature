@@ -27,6 +27,19 @@ Característica: Sistema de Figuras Geométricas
       | cubo    | 3.0       | Cubo          |
       | esfera  | 6.0       | Esfera        |
 
+  Esquema del escenario: Crear figuras de varias dimensiones usando FiguraFactory
+    Dado que quiero crear una figura de tipo "<tipo>"
+    Cuando creo la figura con dimensiones "<dimensiones>"
+    Entonces la figura debe ser creada exitosamente
+    Y debe tener el tipo "<tipo_esperado>"
+    Y su medida principal debe ser aproximadamente <medida>
+
+    Ejemplos:
+      | tipo       | dimensiones | tipo_esperado | medida |
+      | rectangulo | 3.0;4.0     | Rectángulo    | 12.0   |
+      | cilindro   | 1.0;2.0     | Cilindro      | 6.28   |
+      | cono       | 3.0;4.0     | Cono          | 37.70  |
+
   Escenario: Calcular propiedades de un círculo
     Dado que tengo un círculo con radio 5.0
     Cuando calculo el área del círculo
@@ -81,4 +94,487 @@ Característica: Sistema de Figuras Geométricas
       | cubo     | 3.0       |
     Entonces el repositorio debe contener 3 figuras
     Y puedo listar todas las figuras almacenadas
-    Y cada figura debe tener un ID único diferente
\ No newline at end of file
+    Y cada figura debe tener un ID único diferente
+  Escenario: Persistir modificaciones en un diario de solo anexado
+    Dado que tengo un repositorio con diario en "test_diario.json"
+    Cuando creo y almaceno múltiples figuras:
+      | tipo     | dimension |
+      | circulo  | 1.0       |
+      | cuadrado | 2.0       |
+      | esfera   | 3.0       |
+    Y elimino la primera figura almacenada
+    Entonces el diario debe contener 4 registros
+    Y al reabrir el repositorio con diario debe contener 2 figuras
+
+  Escenario: Compactar el diario al superar el umbral
+    Dado que tengo un repositorio con diario en "test_compactado.json" y umbral de 1 bytes
+    Cuando creo y almaceno múltiples figuras:
+      | tipo     | dimension |
+      | cubo     | 1.0       |
+      | cuadrado | 2.0       |
+    Entonces el diario debe contener 0 registros
+    Y al reabrir el repositorio con diario debe contener 2 figuras
+
+  Escenario: Almacenar un lote de figuras con un único volcado
+    Dado que tengo un repositorio con diario en "test_lote.json"
+    Cuando almaceno en lote las figuras:
+      | tipo     | dimension |
+      | circulo  | 1.0       |
+      | invalida | 0.0       |
+      | cubo     | 2.0       |
+    Entonces el lote debe informar 2 figuras almacenadas y 1 fallida
+    Y el diario debe contener 2 registros
+    Y al reabrir el repositorio con diario debe contener 2 figuras
+
+  Escenario: Revertir una transacción que falla
+    Dado que tengo un repositorio de figuras
+    Y que creo un círculo con radio 2.5
+    Cuando almaceno la figura en el repositorio
+    Y una transacción elimina la figura y luego falla
+    Entonces el repositorio debe contener 1 figuras
+
+  Escenario: Cargar en streaming un archivo con una figura por línea
+    Dado que tengo un repositorio con guardado automático en "test_figuras.jsonl"
+    Cuando creo y almaceno múltiples figuras:
+      | tipo     | dimension |
+      | circulo  | 1.0       |
+      | cuadrado | 2.0       |
+      | esfera   | 3.0       |
+    Entonces el archivo del repositorio debe tener 3 líneas
+    Y al reabrir el repositorio debe contener 3 figuras
+
+  Escenario: Convertir el repositorio al formato binario de ancho fijo y de vuelta
+    Dado que tengo un repositorio con guardado automático en "test_binario.json"
+    Cuando creo y almaceno múltiples figuras:
+      | tipo     | dimension |
+      | circulo  | 1.5       |
+      | cubo     | 2.25      |
+      | esfera   | 0.5       |
+    Y convierto el archivo del repositorio a "test_binario.figb"
+    Entonces el registro binario en la posición 1 debe ser un "Cubo" con lado 2.25
+    Y al convertir "test_binario.figb" a JSON se obtienen las mismas figuras
+
+  Escenario: Guardar figuras de varias dimensiones en JSON y en binario
+    Dado que tengo un repositorio con guardado automático en "test_multidimension.json"
+    Cuando creo y almaceno múltiples figuras:
+      | tipo       | dimension |
+      | rectangulo | 2.0;3.0   |
+      | cilindro   | 1.5;4.0   |
+      | cono       | 0.5;2.5   |
+      | circulo    | 1.0       |
+    Y convierto el archivo del repositorio a "test_multidimension.figb"
+    Entonces al convertir "test_multidimension.figb" a JSON se obtienen las mismas figuras
+    Y al reabrir el repositorio debe contener 4 figuras
+    Y las estadísticas deben indicar 1 figuras de tipo "rectángulo"
+
+  Esquema del escenario: Guardar y cargar un repositorio comprimido
+    Dado que tengo un repositorio con guardado automático en "<archivo>"
+    Cuando creo y almaceno múltiples figuras:
+      | tipo     | dimension |
+      | circulo  | 1.0       |
+      | cuadrado | 2.0       |
+      | esfera   | 3.0       |
+    Entonces el archivo del repositorio debe estar comprimido con "<compresion>"
+    Y al reabrir el repositorio debe contener 3 figuras
+
+    Ejemplos:
+      | archivo                   | compresion |
+      | test_comprimido.json.gz   | gzip       |
+      | test_comprimido.jsonl.bz2 | bz2        |
+      | test_comprimido.figb.xz   | lzma       |
+
+  Escenario: Consultar figuras en un repositorio SQLite
+    Dado que tengo un repositorio SQLite en "test_figuras.db"
+    Cuando creo y almaceno múltiples figuras:
+      | tipo     | dimension |
+      | circulo  | 1.0       |
+      | circulo  | 2.0       |
+      | cubo     | 3.0       |
+    Entonces la búsqueda por tipo "Círculo" debe devolver 2 figuras
+    Y las estadísticas deben indicar 1 figuras de tipo "cubo"
+    Y las estadísticas deben sumar 27.0 de "volumen" para "cubo" sin recalcular figuras
+    Y las estadísticas deben sumar 0.0 de "volumen" para "círculo" sin recalcular figuras
+    Y al eliminar la figura de tipo "cubo" el repositorio debe contener 2 figuras
+
+  Escenario: Agrupar volcados con una política de guardado por operaciones
+    Dado que tengo un repositorio en "test_politica.json" con volcado cada 3 operaciones
+    Cuando creo y almaceno múltiples figuras:
+      | tipo     | dimension |
+      | circulo  | 1.0       |
+      | cuadrado | 2.0       |
+    Entonces el archivo del repositorio debe contener 0 figuras
+    Cuando creo y almaceno múltiples figuras:
+      | tipo     | dimension |
+      | cubo     | 3.0       |
+    Entonces el archivo del repositorio debe contener 3 figuras
+
+  Escenario: Volcar en segundo plano tras un período de inactividad
+    Dado que tengo un repositorio en "test_inactividad.json" con volcado tras 20 ms de inactividad
+    Cuando creo y almaceno múltiples figuras:
+      | tipo     | dimension |
+      | circulo  | 1.0       |
+      | esfera   | 2.0       |
+    Entonces en menos de 2 segundos el archivo del repositorio debe contener 2 figuras
+    Y al cerrar el repositorio no debe quedar nada pendiente
+
+  Escenario: El hilo de volcado sigue vivo tras un error al volcar
+    Dado que tengo un repositorio en "test_volcado_error.json" con volcado tras 20 ms de inactividad
+    Y que el primer volcado del repositorio lanza una excepción
+    Cuando creo y almaceno múltiples figuras:
+      | tipo     | dimension |
+      | circulo  | 1.0       |
+    Entonces en menos de 2 segundos el archivo del repositorio debe contener 1 figuras
+    Y el volcado debe haber fallado una vez
+    Y al cerrar el repositorio no debe quedar nada pendiente
+
+  Escenario: Abrir un repositorio en modo perezoso sin materializar figuras
+    Dado que tengo un repositorio con guardado automático en "test_perezoso.json"
+    Cuando creo y almaceno múltiples figuras:
+      | tipo     | dimension |
+      | circulo  | 1.0       |
+      | cuadrado | 2.0       |
+      | cubo     | 3.0       |
+    Y abro el repositorio en modo perezoso
+    Entonces el repositorio perezoso debe contener 3 figuras y 0 materializadas
+    Y al obtener dos veces la primera figura se debe recibir el mismo objeto
+    Y el repositorio perezoso debe tener 1 figuras materializadas
+    Cuando le cambio el lado a 5.0 a la figura almacenada en la posición 2 sin volver a almacenarla
+    Entonces la figura almacenada en la posición 2 debe tener lado 5.0
+    Y el repositorio perezoso debe tener 2 figuras materializadas
+
+  Escenario: Guardar el repositorio en fragmentos y cargarlos en paralelo
+    Dado que tengo un repositorio en "test_fragmentado.json" fragmentado en 2 archivos por "rango"
+    Cuando creo y almaceno múltiples figuras:
+      | tipo     | dimension |
+      | circulo  | 1.0       |
+      | cuadrado | 2.0       |
+      | cubo     | 3.0       |
+      | esfera   | 4.0       |
+    Y guardo el repositorio
+    Entonces deben existir 2 archivos de fragmentos
+    Cuando elimino la primera figura almacenada
+    Y guardo el repositorio
+    Entonces deben existir 2 archivos de fragmentos
+    Y solo deben quedar en disco los fragmentos del manifiesto
+    Y al reabrir el repositorio debe contener 3 figuras
+    Y el generador de IDs debe conocer el mayor ID almacenado
+
+  Escenario: Reiniciar el repositorio desde una imagen de reinicio
+    Dado que tengo un repositorio con imagen de reinicio en "test_imagen.json"
+    Cuando creo y almaceno múltiples figuras:
+      | tipo     | dimension |
+      | circulo  | 1.0       |
+      | cilindro | 1.0;2.0   |
+      | cubo     | 3.0       |
+    Entonces el percentil 100 de "volumen" debe ser 27.0
+    Cuando cierro el repositorio
+    Entonces la imagen de reinicio debe contener 3 figuras
+    Y la imagen de reinicio debe llevar las distribuciones en buffers fuera de banda
+    Y al reabrir el repositorio con imagen debe contener 3 figuras
+    Y al reabrir el repositorio con imagen el percentil 100 de "volumen" debe ser 27.0 sin reconstruir figuras
+
+  Escenario: Descartar una imagen de reinicio desactualizada
+    Dado que tengo un repositorio con imagen de reinicio en "test_imagen_vieja.json"
+    Cuando creo y almaceno múltiples figuras:
+      | tipo     | dimension |
+      | circulo  | 1.0       |
+      | esfera   | 2.0       |
+    Y cierro el repositorio
+    Y otro repositorio sin imagen elimina la primera figura almacenada
+    Entonces la imagen de reinicio debe estar desactualizada
+    Y al reabrir el repositorio con imagen debe contener 1 figuras
+
+  Escenario: Consultar el resumen de un archivo sin cargar sus figuras
+    Dado que tengo un repositorio con guardado automático en "test_resumen.json"
+    Cuando creo y almaceno múltiples figuras:
+      | tipo     | dimension |
+      | circulo  | 1.0       |
+      | cilindro | 1.0;2.0   |
+      | cilindro | 1.0;5.0   |
+      | cilindro | 1.0;3.0   |
+    Y elimino la figura almacenada en la posición 3
+    Entonces el resumen del archivo debe indicar 2 figuras de tipo "cilindro"
+    Y el resumen del repositorio debe tener la altura de "cilindro" entre 2.0 y 3.0
+    Y el resumen del archivo debe estar desactualizado
+    Y al reabrir el repositorio debe contener 3 figuras
+
+  Escenario: Dos escritores concurrentes con el mismo ID no se pisan
+    Dado que dos procesos abren el repositorio concurrente "test_concurrente.json"
+    Cuando cada proceso almacena un "circulo" con el ID 500
+    Entonces la figura del segundo proceso debe haber recibido otro ID
+    Y el primer proceso debe ver ambas figuras al almacenar otra
+    Y al reabrir el repositorio con diario debe contener 3 figuras
+    Y si el primer proceso usa el ID 600 el lote del segundo debe informar su renumeración
+
+  Escenario: Varios procesos escriben el mismo repositorio sin perder figuras
+    Cuando 4 procesos almacenan 30 figuras cada uno en "test_procesos.json"
+    Entonces al reabrir el repositorio con diario debe contener 120 figuras
+
+  Escenario: Refrescar un lector aplicando solo los cambios del archivo
+    Dado que tengo un repositorio con guardado automático en "test_refresco.json"
+    Cuando creo y almaceno múltiples figuras:
+      | tipo     | dimension |
+      | circulo  | 1.0       |
+      | cuadrado | 2.0       |
+      | cubo     | 3.0       |
+    Y un lector abre el mismo repositorio
+    Y elimino la primera figura almacenada
+    Y el escritor almacena un "esfera" con dimensión 4.0
+    Entonces al refrescar el lector debe incorporar 2 cambios y contener 3 figuras
+    Y el lector debe conservar los objetos de las figuras que no cambiaron
+
+  Escenario: Un repositorio sin guardado automático no se refresca sobre sus cambios
+    Dado que tengo un repositorio con guardado automático en "test_refresco_sin_guardar.json"
+    Cuando creo y almaceno múltiples figuras:
+      | tipo     | dimension |
+      | circulo  | 1.0       |
+      | cuadrado | 2.0       |
+    Y un lector abre el mismo repositorio
+    Y el lector almacena un "cubo" con dimensión 3.0
+    Y elimino la primera figura almacenada
+    Entonces al refrescar el lector no debe incorporar cambios y debe contener 3 figuras
+    Y al cerrar el lector debe informar que quedaron modificaciones sin guardar
+
+  Escenario: Un lector con diario se refresca desde un hilo de fondo
+    Dado que tengo un repositorio con diario en "test_refresco_diario.json"
+    Cuando creo y almaceno múltiples figuras:
+      | tipo     | dimension |
+      | circulo  | 1.0       |
+      | cuadrado | 2.0       |
+    Y un lector que se refresca cada 0.02 segundos abre el mismo repositorio
+    Y el escritor almacena un "esfera" con dimensión 2.0
+    Entonces el lector debe contener 3 figuras antes de 2.0 segundos
+
+  Escenario: Consultar un lector desde varios hilos mientras se refresca en segundo plano
+    Dado que tengo un repositorio con diario en "test_refresco_hilos.json"
+    Cuando un lector que se refresca cada 0.001 segundos abre el mismo repositorio
+    Y 2 hilos consultan el lector mientras otro proceso almacena 300 figuras
+    Entonces ninguna consulta de los hilos debe haber fallado
+    Y el lector debe contener 300 figuras antes de 5.0 segundos
+
+  Escenario: Repositorio con memoria acotada que pagina figuras a disco
+    Dado que tengo un repositorio con capacidad para 2 figuras en "test_acotado.json"
+    Cuando creo y almaceno múltiples figuras:
+      | tipo       | dimension |
+      | circulo    | 1.0       |
+      | cuadrado   | 2.0       |
+      | rectangulo | 2.0;3.0   |
+      | esfera     | 4.0       |
+      | cono       | 1.0;2.0   |
+    Y consulto dos veces la primera figura almacenada
+    Entonces el caché debe registrar 1 acierto y 1 fallo con 2 figuras residentes
+    Y el repositorio acotado debe listar 5 figuras
+    Cuando cierro el repositorio
+    Entonces al reabrir el repositorio debe contener 5 figuras
+    Y no deben quedar páginas del repositorio en disco
+
+  Escenario: Exportar e importar por bloques en el formato de intercambio
+    Dado que tengo un repositorio con guardado automático en "test_intercambio.json"
+    Cuando creo y almaceno múltiples figuras:
+      | tipo       | dimension |
+      | circulo    | 1.5       |
+      | rectangulo | 2.0;3.0   |
+      | cono       | 1.0;4.0   |
+      | cubo       | 2.5       |
+      | esfera     | 0.5       |
+    Y exporto el repositorio al formato de intercambio en bloques de 2 figuras
+    Entonces el flujo de intercambio debe empezar con la magia "FIGX" y el primer ID en big-endian
+    Y al importar el flujo de intercambio se obtienen 3 bloques con las mismas figuras
+    Y un bloque de intercambio dañado debe rechazarse
+
+  Escenario: Usar el formato de intercambio como archivo del repositorio
+    Dado que tengo un repositorio con guardado automático en "test_intercambio.json"
+    Cuando creo y almaceno múltiples figuras:
+      | tipo     | dimension |
+      | cilindro | 1.0;2.0   |
+      | cuadrado | 3.0       |
+    Y convierto el archivo del repositorio a "test_intercambio.figx.gz"
+    Entonces al convertir "test_intercambio.figx.gz" a JSON se obtienen las mismas figuras
+
+  Escenario: Fusión de tres vías de dos copias de un repositorio
+    Dado que la copia "base.json" contiene las figuras:
+      | id | tipo     | dimension |
+      | 5  | circulo  | 1.0       |
+      | 1  | cuadrado | 2.0       |
+      | 3  | esfera   | 3.0       |
+      | 2  | cubo     | 4.0       |
+      | 4  | circulo  | 5.0       |
+    Y que la copia "izquierda.json" contiene las figuras:
+      | id | tipo     | dimension |
+      | 1  | cuadrado | 2.5       |
+      | 2  | cubo     | 4.0       |
+      | 3  | esfera   | 3.5       |
+      | 5  | circulo  | 1.0       |
+      | 6  | circulo  | 6.0       |
+    Y que la copia "derecha.json" contiene las figuras:
+      | id | tipo     | dimension |
+      | 6  | cuadrado | 7.0       |
+      | 5  | circulo  | 1.0       |
+      | 4  | circulo  | 5.0       |
+      | 3  | esfera   | 9.0       |
+      | 1  | cuadrado | 2.0       |
+    Cuando fusiono "izquierda.json" y "derecha.json" desde "base.json" en "fusion.json" prefiriendo la derecha
+    Entonces la fusión debe informar 2 agregadas, 2 eliminadas, 1 modificadas y 1 sin cambios
+    Y la fusión debe informar el conflicto del ID 3 resuelto con un "esfera" de dimensión 9.0
+    Y el ID 6 agregado por la derecha debe renumerarse por encima de 6
+
+  Escenario: Persistir las métricas derivadas junto a cada figura
+    Dado que tengo un repositorio que guarda métricas en "test_metricas.json"
+    Cuando creo y almaceno múltiples figuras:
+      | tipo       | dimension |
+      | cuadrado   | 2.0       |
+      | circulo    | 1.0       |
+      | rectangulo | 2.0;5.0   |
+      | cubo       | 3.0       |
+    Y cambio el lado de la figura almacenada en la posición 1 a 4.0
+    Entonces cada registro del archivo debe tener métricas coherentes con sus dimensiones
+    Y al filtrar por "area" entre 10.0 y 20.0 se obtienen las figuras en las posiciones 1,3
+    Y al filtrar por "volumen" entre 0.0 y 100.0 se obtienen las figuras en las posiciones 4
+
+  Escenario: Historial de versiones con lectura en el pasado
+    Dado que tengo un repositorio con historial en "test_historial.json"
+    Cuando creo y almaceno múltiples figuras:
+      | tipo     | dimension |
+      | cuadrado | 2.0       |
+      | circulo  | 1.0       |
+    Y anoto el momento actual
+    Y le cambio el lado a 3.0 a la figura almacenada en la posición 1 sin volver a almacenarla
+    Y le cambio el lado a 4.0 a la figura almacenada en la posición 1 sin volver a almacenarla
+    Entonces otro repositorio abierto sobre el mismo archivo debe ver la figura en la posición 1 con lado 4.0
+    Cuando elimino la figura almacenada en la posición 2
+    Entonces la figura almacenada en la posición 1 debe tener 3 versiones
+    Y la versión 1 de la figura en la posición 1 debe tener lado 2.0
+    Y la versión 2 de la figura en la posición 1 debe tener lado 3.0
+    Y en el momento anotado el repositorio tenía 2 figuras con la primera de lado 2.0
+    Y al reabrir el repositorio la figura en la posición 2 figura eliminada en su última versión
+
+  Escenario: Índice por tipo y categoría mantenido con cada cambio
+    Dado que tengo un repositorio con guardado automático en "test_indice_tipos.json"
+    Cuando creo y almaceno múltiples figuras:
+      | tipo     | dimension |
+      | circulo  | 1.0       |
+      | cuadrado | 2.0       |
+      | esfera   | 3.0       |
+      | circulo  | 4.0       |
+    Entonces debe haber 2 figuras de tipo "Círculo" y 1 de categoría "3d"
+    Cuando creo y almaceno múltiples figuras:
+      | tipo     | dimension |
+      | cubo     | 1.0       |
+      | circulo  | 2.0       |
+    Y renombro la figura almacenada en la posición 2 como "Cuadrado"
+    Y elimino la figura almacenada en la posición 1
+    Entonces debe haber 2 figuras de tipo "círculo" y 1 de categoría "3D"
+    Y debe haber 2 figuras de tipo "cuadrado" y 4 de categoría "2D"
+    Cuando limpio el repositorio
+    Entonces debe haber 0 figuras de tipo "cubo" y 0 de categoría "3D"
+
+  Escenario: Estadísticas con sumas de métricas mantenidas en cada cambio
+    Dado que tengo un repositorio con guardado automático en "test_contadores.json"
+    Cuando creo y almaceno múltiples figuras:
+      | tipo     | dimension |
+      | cuadrado | 2.0       |
+      | cuadrado | 3.0       |
+      | cubo     | 2.0       |
+    Entonces las estadísticas deben sumar 13.0 de "area" para "cuadrado" sin recalcular figuras
+    Y las estadísticas deben sumar 20.0 de "perimetro" para "cuadrado" sin recalcular figuras
+    Cuando elimino la figura almacenada en la posición 2
+    Y le cambio el lado a 3.0 a la figura almacenada en la posición 3 sin volver a almacenarla
+    Entonces las estadísticas deben sumar 4.0 de "area" para "cuadrado" sin recalcular figuras
+    Y las estadísticas deben sumar 27.0 de "volumen" para "cubo" sin recalcular figuras
+    Y las estadísticas deben sumar 54.0 de "area_superficie" para "cubo" sin recalcular figuras
+    Cuando renombro la figura almacenada en la posición 1 como "Cubo"
+    Entonces las estadísticas deben indicar 2 figuras de tipo "cubo"
+    Y las estadísticas deben sumar 4.0 de "area" para "cubo" sin recalcular figuras
+    Cuando elimino la figura almacenada en la posición 1
+    Entonces las estadísticas deben indicar 1 figuras de tipo "cubo"
+    Y las estadísticas deben sumar 0.0 de "area" para "cubo" sin recalcular figuras
+    Y las estadísticas deben sumar 27.0 de "volumen" para "cubo" sin recalcular figuras
+    Cuando limpio el repositorio
+    Entonces las estadísticas deben sumar 0.0 de "volumen" para "cubo" sin recalcular figuras
+
+  Escenario: Búsquedas por rango de métricas con índices ordenados
+    Dado que tengo un repositorio con guardado automático en "test_indice_metricas.json"
+    Cuando creo y almaceno múltiples figuras:
+      | tipo       | dimension |
+      | circulo    | 1.0       |
+      | cuadrado   | 2.0       |
+      | rectangulo | 2.0;5.0   |
+      | esfera     | 1.0       |
+      | cubo       | 2.0       |
+      | esfera     | 2.0       |
+    Entonces la búsqueda por "area" entre 3.0 y 10.0 m debe devolver las posiciones 1,2,3
+    Y la búsqueda por "area" entre 30000.0 y 50000.0 cm debe devolver las posiciones 1,2
+    Y la búsqueda de "esfera" con "volumen" desde 4.0 debe devolver las posiciones 4,6
+    Cuando le cambio el lado a 4.0 a la figura almacenada en la posición 2 sin volver a almacenarla
+    Y elimino la figura almacenada en la posición 4
+    Entonces la búsqueda por "area" entre 3.0 y 10.0 m debe devolver las posiciones 1,3
+    Y la búsqueda por "volumen" entre 5.0 y 50.0 m debe devolver las posiciones 5,6
+
+  Escenario: Figuras de mayor y menor métrica sin ordenar la colección
+    Dado que tengo un repositorio con guardado automático en "test_extremos_metricas.json"
+    Cuando creo y almaceno múltiples figuras:
+      | tipo       | dimension |
+      | circulo    | 1.0       |
+      | cuadrado   | 2.0       |
+      | rectangulo | 2.0;5.0   |
+      | cuadrado   | 3.0       |
+      | esfera     | 1.0       |
+      | cubo       | 2.0       |
+      | esfera     | 2.0       |
+    Entonces las 2 figuras de mayor "area" deben ser las posiciones 3,4
+    Y las 2 figuras de menor "area" deben ser las posiciones 1,2
+    Y entre las figuras "cuadrado" las 1 de menor "area" deben ser las posiciones 2
+    Y entre las figuras "3D" las 2 de mayor "volumen" deben ser las posiciones 7,6
+    Y entre las figuras "2D" las 2 de mayor "volumen" deben ser las posiciones ninguna
+    Y la búsqueda por "area" entre 3.0 y 10.0 m debe devolver las posiciones 1,2,4,3
+    Y las 2 figuras de mayor "area" deben ser las posiciones 3,4
+    Y entre las figuras "esfera" las 3 de menor "volumen" deben ser las posiciones 5,7
+    Cuando le cambio el lado a 5.0 a la figura almacenada en la posición 2 sin volver a almacenarla
+    Entonces las 2 figuras de mayor "area" deben ser las posiciones 2,3
+    Y entre las figuras "2D" las 2 de menor "area" deben ser las posiciones 1,4
+
+  Escenario: Agregación de métricas por tipo y categoría en una pasada
+    Dado que tengo un repositorio con guardado automático en "test_agregacion_metricas.json"
+    Cuando creo y almaceno múltiples figuras:
+      | tipo       | dimension |
+      | cuadrado   | 1.0       |
+      | cuadrado   | 2.0       |
+      | cuadrado   | 3.0       |
+      | rectangulo | 2.0;3.0   |
+      | cubo       | 2.0       |
+    Entonces la agregación de "area" para "cuadrado" debe dar 3 valores, suma 14.0, media 4.6667, mínimo 1.0, máximo 9.0 y varianza 10.8889
+    Y la agregación de "area" para "2D" debe dar 4 valores, suma 20.0, media 5.0, mínimo 1.0, máximo 9.0 y varianza 8.5
+    Y la agregación de "volumen" para "3D" debe dar 1 valores, suma 8.0, media 8.0, mínimo 8.0, máximo 8.0 y varianza 0.0
+    Y la agregación leída del archivo debe coincidir con la del repositorio
+    Y los agregados formateados deben incluir "• 2D"
+    Y los agregados formateados deben incluir "• Cuadrado"
+    Y los agregados formateados deben incluir "area: n=4, suma=20.00 m², media=5.00 m², mín=1.00 m², máx=9.00 m², varianza=8.50 m⁴"
+
+  Escenario: Percentiles e histogramas con sketches de cuantiles combinables
+    Dado que tengo un repositorio con guardado automático en "test_cuantiles_otro.json"
+    Cuando creo y almaceno múltiples figuras:
+      | tipo     | dimension |
+      | cuadrado | 11.0      |
+      | cuadrado | 12.0      |
+    Dado que tengo un repositorio con guardado automático en "test_cuantiles.json"
+    Cuando creo y almaceno múltiples figuras:
+      | tipo     | dimension |
+      | cuadrado | 1.0       |
+      | cuadrado | 2.0       |
+      | cuadrado | 3.0       |
+      | cuadrado | 4.0       |
+      | cuadrado | 5.0       |
+      | cuadrado | 6.0       |
+      | cuadrado | 7.0       |
+      | cuadrado | 8.0       |
+      | cuadrado | 9.0       |
+      | cuadrado | 10.0      |
+      | cubo     | 2.0       |
+    Entonces el percentil 50 de "area" debe ser 25.0
+    Y entre las figuras "cuadrado" el percentil 90 de "area" debe ser 81.0
+    Y el percentil 100 de "volumen" debe ser 8.0
+    Y el histograma de "area" en 3 intervalos debe contar 5,3,2
+    Cuando elimino la figura almacenada en la posición 10
+    Entonces el percentil 100 de "area" debe ser 81.0 sin recalcular las métricas de los cubos
+    Y al reabrir el repositorio el percentil 50 de "area" debe ser 25.0 sin reconstruir las distribuciones
+    Y combinando las distribuciones con las de "test_cuantiles_otro.json" el percentil 100 de "area" debe ser 144.0
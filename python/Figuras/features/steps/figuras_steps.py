@@ -7,8 +7,15 @@ Framework: behave
 
 import sys
 import os
+import glob
+import io
+import json
 import math
+import multiprocessing
+import threading
+import time
 import pytest
+from unittest import mock
 from behave import given, when, then, step
 from typing import Dict, Any
 
@@ -29,6 +36,16 @@ try:
     from Cubo import Cubo
     from Esfera import Esfera
     from GeneradorID import GeneradorID
+    from PersistenciaArchivos import PersistenciaArchivos
+    from AgregadorMetricas import AgregadorMetricas
+    from FormateadorSalida import FormateadorSalida
+    from DistribucionesMetricas import DistribucionesMetricas
+    from ArchivoBinarioFiguras import ArchivoBinarioFiguras
+    from RepositorioFigurasSQLite import RepositorioFigurasSQLite
+    from PoliticaGuardado import PoliticaGuardado
+    from ImagenReinicio import ImagenReinicio
+    from RegistroFiguras import RegistroFiguras
+    from FusionFiguras import FusionFiguras
 except ImportError as e:
     print(f"Error importando módulos: {e}")
     sys.exit(1)
@@ -81,6 +98,19 @@ def step_crear_figura_dimension(context, dimension):
         print(f"Error al crear figura: {e}")
 
 
+@when('creo la figura con dimensiones "{dimensiones}"')
+def step_crear_figura_dimensiones(context, dimensiones):
+    """Crea una figura de varias dimensiones separadas por ';'"""
+    valores = [float(valor) for valor in dimensiones.split(';')]
+    try:
+        context.ultima_figura = context.factory.crear_figura(context.tipo_figura, valores)
+        context.figuras_creadas.append(context.ultima_figura)
+        print(f"Figura {context.tipo_figura} creada con dimensiones {valores}")
+    except Exception as e:
+        context.excepcion_capturada = e
+        print(f"Error al crear figura: {e}")
+
+
 @then('la figura debe ser creada exitosamente')
 def step_figura_creada_exitosamente(context):
     """Verifica que la figura fue creada exitosamente"""
@@ -107,6 +137,19 @@ def step_verificar_id_unico(context):
     print(f"ID único verificado: {figura_id}")
 
 
+@then('su medida principal debe ser aproximadamente {valor_esperado:f}')
+def step_verificar_medida_principal(context, valor_esperado):
+    """Verifica el área de una figura 2D o el volumen de una figura 3D"""
+    figura = context.ultima_figura
+    if figura.get_tipo() == "2D":
+        medida = figura.calcular_area()
+    else:
+        medida = figura.calcular_volumen()
+    assert abs(medida - valor_esperado) < 0.01, \
+        f"Medida esperada: {valor_esperado}, obtenida: {medida}"
+    print(f"Medida principal verificada: {medida:.2f}")
+
+
 # =============================================================================
 # STEPS PARA FIGURAS ESPECÍFICAS
 # =============================================================================
@@ -413,7 +456,9 @@ def step_crear_multiples_figuras(context):
     
     for row in context.table:
         tipo = row['tipo']
-        dimension = float(row['dimension'])
+        # Las figuras de varias dimensiones las separan con ';'
+        valores = [float(valor) for valor in row['dimension'].split(';')]
+        dimension = valores[0] if len(valores) == 1 else valores
         
         # Crear la figura
         figura = context.factory.crear_figura(tipo, dimension)
@@ -459,6 +504,1199 @@ def step_verificar_ids_unicos(context):
     print(f"IDs únicos verificados: {context.ids_multiples}")
 
 
+# =============================================================================
+# STEPS PARA EL DIARIO DE OPERACIONES
+# =============================================================================
+
+@given('que tengo un repositorio con diario en "{archivo}"')
+def step_repositorio_con_diario(context, archivo):
+    """Crea un repositorio que persiste sus cambios en un diario"""
+    context.archivo_repositorio = archivo
+    context.repositorio = RepositorioFiguras(archivo, auto_guardar=True, usar_diario=True)
+    print(f"Repositorio con diario creado en {archivo}")
+
+
+@given('que tengo un repositorio con diario en "{archivo}" y umbral de {umbral:d} bytes')
+def step_repositorio_con_diario_umbral(context, archivo, umbral):
+    """Crea un repositorio con diario y un umbral de compactación específico"""
+    context.archivo_repositorio = archivo
+    context.repositorio = RepositorioFiguras(archivo, auto_guardar=True, usar_diario=True,
+                                             umbral_compactacion=umbral)
+    print(f"Repositorio con diario creado en {archivo} (umbral {umbral} bytes)")
+
+
+@when('elimino la primera figura almacenada')
+def step_eliminar_primera_figura(context):
+    """Elimina la primera figura almacenada en el escenario"""
+    assert context.ids_multiples, "No hay figuras almacenadas"
+    assert context.repositorio.eliminar_figura(context.ids_multiples[0]), \
+        "No se pudo eliminar la figura"
+    print(f"Figura {context.ids_multiples[0]} eliminada")
+
+
+@then('el diario debe contener {cantidad:d} registros')
+def step_verificar_registros_diario(context, cantidad):
+    """Verifica la cantidad de registros anotados en el diario"""
+    archivo_diario = context.archivo_repositorio + ".diario"
+    registros = 0
+    if os.path.exists(archivo_diario):
+        with open(archivo_diario, 'r', encoding='utf-8') as f:
+            registros = sum(1 for linea in f if linea.strip())
+    assert registros == cantidad, \
+        f"Registros esperados: {cantidad}, encontrados: {registros}"
+    print(f"Registros del diario verificados: {registros}")
+
+
+@then('al reabrir el repositorio con diario debe contener {cantidad:d} figuras')
+def step_reabrir_repositorio_con_diario(context, cantidad):
+    """Reabre el repositorio y verifica el estado reconstruido"""
+    repositorio = RepositorioFiguras(context.archivo_repositorio, auto_guardar=True, usar_diario=True)
+    assert repositorio.contar_figuras() == cantidad, \
+        f"Cantidad esperada: {cantidad}, actual: {repositorio.contar_figuras()}"
+    print(f"Repositorio reabierto con {cantidad} figuras")
+
+
+# =============================================================================
+# STEPS PARA POLÍTICAS DE GUARDADO
+# =============================================================================
+
+@given('que tengo un repositorio en "{archivo}" con volcado cada {operaciones:d} operaciones')
+def step_repositorio_politica_operaciones(context, archivo, operaciones):
+    """Crea un repositorio que vuelca a disco cada cierta cantidad de operaciones"""
+    context.archivo_repositorio = archivo
+    context.repositorio = RepositorioFiguras(archivo, PoliticaGuardado(cada_operaciones=operaciones))
+    print(f"Repositorio con volcado cada {operaciones} operaciones creado en {archivo}")
+
+
+@given('que tengo un repositorio en "{archivo}" con volcado tras {milisegundos:d} ms de inactividad')
+def step_repositorio_politica_inactividad(context, archivo, milisegundos):
+    """Crea un repositorio que vuelca a disco tras un período sin modificaciones"""
+    context.archivo_repositorio = archivo
+    context.repositorio = RepositorioFiguras(archivo, PoliticaGuardado(inactividad_ms=milisegundos))
+    print(f"Repositorio con volcado por inactividad ({milisegundos} ms) creado en {archivo}")
+
+
+@given('que el primer volcado del repositorio lanza una excepción')
+def step_primer_volcado_falla(context):
+    """Hace que el primer volcado del repositorio lance una excepción"""
+    guardar = context.repositorio.guardar_figuras
+    context.fallos_volcado = 0
+
+    def guardar_con_fallo():
+        if not context.fallos_volcado:
+            context.fallos_volcado += 1
+            raise OSError("Disco no disponible")
+        return guardar()
+
+    context.repositorio.guardar_figuras = guardar_con_fallo
+    print("El primer volcado fallará")
+
+
+@then('el volcado debe haber fallado una vez')
+def step_verificar_fallo_volcado(context):
+    """Verifica que el volcado que siguió al error fue el que escribió el archivo"""
+    assert context.fallos_volcado == 1, f"Fallos de volcado: {context.fallos_volcado}"
+    print("El hilo de volcado se recuperó del error")
+
+
+@then('el archivo del repositorio debe contener {cantidad:d} figuras')
+def step_verificar_figuras_en_archivo(context, cantidad):
+    """Verifica cuántas figuras hay guardadas en el archivo del repositorio"""
+    figuras = PersistenciaArchivos.cargar_desde_archivo(context.archivo_repositorio)
+    assert len(figuras) == cantidad, f"Figuras esperadas en archivo: {cantidad}, encontradas: {len(figuras)}"
+    print(f"Figuras en archivo verificadas: {len(figuras)}")
+
+
+@then('en menos de {segundos:d} segundos el archivo del repositorio debe contener {cantidad:d} figuras')
+def step_esperar_figuras_en_archivo(context, segundos, cantidad):
+    """Espera a que el hilo de volcado escriba las figuras en el archivo"""
+    limite = time.monotonic() + segundos
+    figuras = []
+    while time.monotonic() < limite:
+        figuras = PersistenciaArchivos.cargar_desde_archivo(context.archivo_repositorio)
+        if len(figuras) == cantidad:
+            break
+        time.sleep(0.01)
+    assert len(figuras) == cantidad, f"Figuras esperadas en archivo: {cantidad}, encontradas: {len(figuras)}"
+    print(f"Figuras volcadas en segundo plano: {len(figuras)}")
+
+
+@then('al cerrar el repositorio no debe quedar nada pendiente')
+def step_cerrar_repositorio(context):
+    """Cierra el repositorio y verifica que no quede nada sin guardar"""
+    assert context.repositorio.cerrar(), "Quedaron modificaciones sin guardar"
+    print("Repositorio cerrado sin modificaciones pendientes")
+
+
+# =============================================================================
+# STEPS PARA LOTES Y TRANSACCIONES
+# =============================================================================
+
+@when('almaceno en lote las figuras')
+def step_almacenar_lote(context):
+    """Almacena en lote las figuras de la tabla; los tipos desconocidos se envían sin crear"""
+    figuras = []
+    for row in context.table:
+        try:
+            figuras.append(context.factory.crear_figura(row['tipo'], float(row['dimension'])))
+        except ValueError:
+            figuras.append(row['tipo'])
+    context.resultado_lote = context.repositorio.almacenar_lote(figuras)
+    print(f"Resultado del lote: {context.resultado_lote}")
+
+
+@when('almaceno en lote las figuras:')
+def step_almacenar_lote_tabla(context):
+    """Almacena en lote las figuras de la tabla (versión con dos puntos)"""
+    step_almacenar_lote(context)
+
+
+@then('el lote debe informar {almacenadas:d} figuras almacenadas y {fallidas:d} fallida')
+def step_verificar_resultado_lote(context, almacenadas, fallidas):
+    """Verifica el resultado informado por el lote"""
+    resultado = context.resultado_lote
+    assert resultado['confirmado'], "El lote no fue confirmado"
+    assert len(resultado['almacenadas']) == almacenadas, \
+        f"Almacenadas esperadas: {almacenadas}, obtenidas: {resultado['almacenadas']}"
+    assert len(resultado['fallidas']) == fallidas, \
+        f"Fallidas esperadas: {fallidas}, obtenidas: {resultado['fallidas']}"
+    print(f"Resultado del lote verificado: {resultado}")
+
+
+@when('una transacción elimina la figura y luego falla')
+def step_transaccion_fallida(context):
+    """Ejecuta una transacción que elimina la figura y lanza una excepción"""
+    try:
+        with context.repositorio.transaccion():
+            context.repositorio.eliminar_figura(context.ultimo_id)
+            raise RuntimeError("Fallo simulado")
+    except RuntimeError as e:
+        context.excepcion_capturada = e
+    print("Transacción fallida ejecutada")
+
+
+# =============================================================================
+# STEPS PARA FORMATOS DE ARCHIVO
+# =============================================================================
+
+@given('que tengo un repositorio con guardado automático en "{archivo}"')
+def step_repositorio_guardado_automatico(context, archivo):
+    """Crea un repositorio que guarda automáticamente en el archivo indicado"""
+    context.archivo_repositorio = archivo
+    context.repositorio = RepositorioFiguras(archivo, auto_guardar=True)
+    print(f"Repositorio con guardado automático creado en {archivo}")
+
+
+@then('el archivo del repositorio debe tener {cantidad:d} líneas')
+def step_verificar_lineas_archivo(context, cantidad):
+    """Verifica la cantidad de líneas no vacías del archivo del repositorio"""
+    with open(context.archivo_repositorio, 'r', encoding='utf-8') as f:
+        lineas = sum(1 for linea in f if linea.strip())
+    assert lineas == cantidad, f"Líneas esperadas: {cantidad}, encontradas: {lineas}"
+    print(f"Líneas del archivo verificadas: {lineas}")
+
+
+@then('al reabrir el repositorio debe contener {cantidad:d} figuras')
+def step_reabrir_repositorio(context, cantidad):
+    """Reabre el repositorio desde su archivo y verifica la cantidad de figuras"""
+    repositorio = RepositorioFiguras(context.archivo_repositorio, auto_guardar=False)
+    assert repositorio.contar_figuras() == cantidad, \
+        f"Cantidad esperada: {cantidad}, actual: {repositorio.contar_figuras()}"
+    print(f"Repositorio reabierto con {cantidad} figuras")
+
+
+@when('convierto el archivo del repositorio a "{destino}"')
+def step_convertir_archivo(context, destino):
+    """Convierte el archivo del repositorio a otro formato"""
+    cantidad = PersistenciaArchivos.convertir_archivo(context.archivo_repositorio, destino)
+    context.archivo_convertido = destino
+    print(f"{cantidad} figuras convertidas a {destino}")
+
+
+@then('el registro binario en la posición {posicion:d} debe ser un "{nombre}" con lado {lado:f}')
+def step_verificar_registro_binario(context, posicion, nombre, lado):
+    """Verifica un registro leído directamente por posición del archivo binario"""
+    with ArchivoBinarioFiguras(context.archivo_convertido) as binario:
+        datos = binario.leer_registro(posicion)
+    assert datos['nombre'] == nombre, f"Nombre esperado: {nombre}, obtenido: {datos['nombre']}"
+    assert datos['lado'] == lado, f"Lado esperado: {lado}, obtenido: {datos['lado']}"
+    print(f"Registro binario verificado: {datos}")
+
+
+@then('al convertir "{origen}" a JSON se obtienen las mismas figuras')
+def step_verificar_conversion_inversa(context, origen):
+    """Convierte el archivo binario a JSON y lo compara con el original"""
+    destino = origen + ".json"
+    PersistenciaArchivos.convertir_archivo(origen, destino)
+    originales = list(PersistenciaArchivos.iterar_registros(context.archivo_repositorio))
+    convertidos = list(PersistenciaArchivos.iterar_registros(destino))
+    assert originales == convertidos, f"Registros distintos: {originales} != {convertidos}"
+    print(f"Conversión inversa verificada: {len(convertidos)} figuras")
+
+
+@then('el archivo del repositorio debe estar comprimido con "{compresion}"')
+def step_verificar_compresion(context, compresion):
+    """Verifica el códec detectado por los bytes mágicos del archivo"""
+    detectada = PersistenciaArchivos.detectar_compresion(context.archivo_repositorio)
+    assert detectada == compresion, f"Compresión esperada: {compresion}, detectada: {detectada}"
+    print(f"Compresión verificada: {detectada}")
+
+
+# =============================================================================
+# STEPS PARA REPOSITORIOS ALTERNATIVOS
+# =============================================================================
+
+@given('que tengo un repositorio SQLite en "{archivo}"')
+def step_repositorio_sqlite(context, archivo):
+    """Crea un repositorio respaldado por SQLite"""
+    context.repositorio = RepositorioFigurasSQLite(archivo)
+    print(f"Repositorio SQLite creado en {archivo}")
+
+
+@then('la búsqueda por tipo "{tipo}" debe devolver {cantidad:d} figuras')
+def step_verificar_busqueda_tipo(context, tipo, cantidad):
+    """Verifica la cantidad de figuras devueltas por buscar_por_tipo"""
+    figuras = context.repositorio.buscar_por_tipo(tipo)
+    assert len(figuras) == cantidad, f"Cantidad esperada: {cantidad}, obtenida: {len(figuras)}"
+    assert all(figura.get_nombre() == tipo for figura in figuras), f"Tipos incorrectos: {figuras}"
+    print(f"Búsqueda por tipo {tipo} verificada: {len(figuras)} figuras")
+
+
+@then('las estadísticas deben indicar {cantidad:d} figuras de tipo "{tipo}"')
+def step_verificar_estadisticas_tipo(context, cantidad, tipo):
+    """Verifica el conteo por tipo en las estadísticas"""
+    estadisticas = context.repositorio.obtener_estadisticas()
+    assert estadisticas[tipo] == cantidad, \
+        f"Cantidad esperada de {tipo}: {cantidad}, obtenida: {estadisticas[tipo]}"
+    print(f"Estadísticas verificadas: {estadisticas}")
+
+
+@then('al eliminar la figura de tipo "{tipo}" el repositorio debe contener {cantidad:d} figuras')
+def step_eliminar_por_tipo(context, tipo, cantidad):
+    """Elimina la primera figura del tipo indicado y verifica la cantidad restante"""
+    figura = context.repositorio.buscar_por_tipo(tipo)[0]
+    assert context.repositorio.eliminar_figura(figura.get_id()), "No se pudo eliminar la figura"
+    assert context.repositorio.contar_figuras() == cantidad, \
+        f"Cantidad esperada: {cantidad}, actual: {context.repositorio.contar_figuras()}"
+    print(f"Figura {figura.get_id()} eliminada; quedan {cantidad}")
+
+
+@when('abro el repositorio en modo perezoso')
+def step_abrir_repositorio_perezoso(context):
+    """Reabre el archivo del repositorio en modo de carga perezosa"""
+    context.repositorio = RepositorioFiguras(context.archivo_repositorio, auto_guardar=False,
+                                             carga_perezosa=True)
+    print(f"Repositorio perezoso abierto sobre {context.archivo_repositorio}")
+
+
+@then('el repositorio perezoso debe contener {cantidad:d} figuras y {materializadas:d} materializadas')
+def step_verificar_repositorio_perezoso(context, cantidad, materializadas):
+    """Verifica la cantidad de figuras y cuántas se construyeron"""
+    assert context.repositorio.contar_figuras() == cantidad, \
+        f"Cantidad esperada: {cantidad}, actual: {context.repositorio.contar_figuras()}"
+    step_verificar_materializadas(context, materializadas)
+
+
+@then('el repositorio perezoso debe tener {materializadas:d} figuras materializadas')
+def step_verificar_materializadas(context, materializadas):
+    """Verifica cuántas figuras están construidas en memoria"""
+    actuales = context.repositorio._figuras.cantidad_materializadas()
+    assert actuales == materializadas, \
+        f"Materializadas esperadas: {materializadas}, actuales: {actuales}"
+    print(f"Figuras materializadas verificadas: {actuales}")
+
+
+@then('la figura almacenada en la posición {posicion:d} debe tener lado {lado:f}')
+def step_verificar_lado_almacenado(context, posicion, lado):
+    """Vuelve a obtener una figura del repositorio y verifica su lado"""
+    figura = context.repositorio.obtener_figura(context.ids_multiples[posicion - 1])
+    assert figura is not None, "No se encontró la figura"
+    assert abs(figura.get_lado() - lado) < 1e-9, f"Lado esperado: {lado}, actual: {figura.get_lado()}"
+    print(f"La figura {figura.get_id()} tiene lado {lado}")
+
+
+@then('al obtener dos veces la primera figura se debe recibir el mismo objeto')
+def step_verificar_mapa_identidad(context):
+    """Verifica que el mapa de identidad devuelva siempre el mismo objeto"""
+    context.figura_recuperada = context.repositorio.obtener_figura(context.ids_multiples[0])
+    assert context.figura_recuperada is not None, "No se pudo recuperar la figura"
+    assert context.repositorio.obtener_figura(context.ids_multiples[0]) is context.figura_recuperada, \
+        "Se recibieron objetos distintos para el mismo ID"
+    print(f"Mapa de identidad verificado para ID {context.ids_multiples[0]}")
+
+
+@given('que tengo un repositorio en "{archivo}" fragmentado en {cantidad:d} archivos por "{estrategia}"')
+def step_repositorio_fragmentado(context, archivo, cantidad, estrategia):
+    """Crea un repositorio que guarda sus snapshots en fragmentos"""
+    context.archivo_repositorio = archivo
+    context.repositorio = RepositorioFiguras(archivo, auto_guardar=False, fragmentos=cantidad,
+                                             estrategia_fragmentos=estrategia)
+    print(f"Repositorio fragmentado en {cantidad} archivos ({estrategia}) creado en {archivo}")
+
+
+@when('guardo el repositorio')
+def step_guardar_repositorio(context):
+    """Guarda explícitamente el repositorio"""
+    assert context.repositorio.guardar_figuras(), "No se pudo guardar el repositorio"
+    print("Repositorio guardado")
+
+
+@then('deben existir {cantidad:d} archivos de fragmentos')
+def step_verificar_fragmentos(context, cantidad):
+    """Verifica los archivos listados en el manifiesto de fragmentos"""
+    with open(PersistenciaArchivos.archivo_manifiesto(context.archivo_repositorio), 'r', encoding='utf-8') as f:
+        archivos = json.load(f)['archivos']
+    assert len(archivos) == cantidad, f"Fragmentos esperados: {cantidad}, encontrados: {archivos}"
+    assert all(os.path.exists(archivo) for archivo in archivos), f"Faltan fragmentos: {archivos}"
+    print(f"Fragmentos verificados: {archivos}")
+
+
+@then('solo deben quedar en disco los fragmentos del manifiesto')
+def step_verificar_fragmentos_anteriores_borrados(context):
+    """Verifica que un nuevo guardado borró los fragmentos de la generación anterior"""
+    archivos = PersistenciaArchivos.leer_manifiesto(context.archivo_repositorio)['archivos']
+    raiz = os.path.splitext(context.archivo_repositorio)[0]
+    en_disco = glob.glob(f"{raiz}.*frag[0-9]*.json")
+    assert sorted(en_disco) == sorted(archivos), f"Fragmentos en disco: {en_disco}, en el manifiesto: {archivos}"
+    print(f"Solo quedan los fragmentos {archivos}")
+
+
+@then('el generador de IDs debe conocer el mayor ID almacenado')
+def step_verificar_generador_id(context):
+    """Verifica que el generador de IDs no reutilice IDs ya almacenados"""
+    assert GeneradorID.obtener_contador_actual() >= max(context.ids_multiples), \
+        f"Contador {GeneradorID.obtener_contador_actual()} menor que {max(context.ids_multiples)}"
+    print(f"Generador de IDs verificado: {GeneradorID.obtener_contador_actual()}")
+
+
+# =============================================================================
+# STEPS PARA LA IMAGEN DE REINICIO
+# =============================================================================
+
+@given('que tengo un repositorio con imagen de reinicio en "{archivo}"')
+def step_repositorio_con_imagen(context, archivo):
+    """Crea un repositorio que vuelca una imagen de reinicio al cerrarse"""
+    context.archivo_repositorio = archivo
+    context.repositorio = RepositorioFiguras(archivo, auto_guardar=True, imagen_reinicio=True)
+    print(f"Repositorio con imagen de reinicio creado en {archivo}")
+
+
+@when('cierro el repositorio')
+def step_cierro_repositorio(context):
+    """Cierra el repositorio persistiendo lo pendiente"""
+    assert context.repositorio.cerrar(), "Quedaron modificaciones sin guardar"
+    print("Repositorio cerrado")
+
+
+@when('otro repositorio sin imagen elimina la primera figura almacenada')
+def step_modificar_sin_imagen(context):
+    """Modifica el archivo de datos por fuera de la imagen"""
+    repositorio = RepositorioFiguras(context.archivo_repositorio, auto_guardar=True)
+    assert repositorio.eliminar_figura(context.ids_multiples[0]), "No se pudo eliminar la figura"
+    repositorio.cerrar()
+    print(f"Figura {context.ids_multiples[0]} eliminada sin actualizar la imagen")
+
+
+@then('la imagen de reinicio debe contener {cantidad:d} figuras')
+def step_verificar_imagen(context, cantidad):
+    """Verifica el contenido de la imagen vigente"""
+    estado = ImagenReinicio(context.archivo_repositorio + ".imagen", (
+        context.archivo_repositorio,
+        context.archivo_repositorio + ".diario",
+        PersistenciaArchivos.archivo_manifiesto(context.archivo_repositorio),
+    )).cargar()
+    assert estado is not None, "La imagen de reinicio no es válida"
+    assert len(estado['figuras']) == cantidad, \
+        f"Figuras esperadas en la imagen: {cantidad}, encontradas: {len(estado['figuras'])}"
+    assert all(isinstance(figura, Figura) for figura in estado['figuras'].values()), \
+        "Las figuras de la imagen no se restauraron como objetos"
+    print(f"Imagen de reinicio verificada con {cantidad} figuras")
+
+
+@then('la imagen de reinicio debe llevar las distribuciones en buffers fuera de banda')
+def step_verificar_distribuciones_imagen(context):
+    """Verifica que los sketches de cuantiles viajan fuera del pickle"""
+    with open(context.archivo_repositorio + ".imagen", 'rb') as f:
+        buffers = ImagenReinicio._CABECERA.unpack(f.read(ImagenReinicio._CABECERA.size))[2]
+    assert buffers > 0, "La imagen no tiene buffers fuera de banda"
+    print(f"La imagen lleva {buffers} buffers fuera de banda")
+
+
+@then('al reabrir el repositorio con imagen el percentil {percentil:d} de "{metrica}" debe ser {valor:f} '
+      'sin reconstruir figuras')
+def step_percentil_desde_imagen(context, percentil, metrica, valor):
+    """Reabre desde la imagen y consulta un percentil sin construir ni recorrer figuras"""
+    with mock.patch.object(Figura, '__init__', side_effect=AssertionError("Se construyó una figura")):
+        repositorio = RepositorioFiguras(context.archivo_repositorio, auto_guardar=False, imagen_reinicio=True)
+    with mock.patch.object(Figura, 'obtener_metricas', side_effect=AssertionError("Se recorrieron las figuras")):
+        obtenido = repositorio.obtener_percentil(metrica, percentil)
+    assert abs(obtenido - valor) < 1e-9, f"Percentil {percentil} esperado: {valor}, obtenido: {obtenido}"
+    print(f"Percentil {percentil} de {metrica} leído de la imagen: {obtenido}")
+
+
+@then('la imagen de reinicio debe estar desactualizada')
+def step_verificar_imagen_desactualizada(context):
+    """Verifica que la imagen se rechaza porque el archivo de datos cambió"""
+    imagen = ImagenReinicio(context.archivo_repositorio + ".imagen", (
+        context.archivo_repositorio,
+        context.archivo_repositorio + ".diario",
+        PersistenciaArchivos.archivo_manifiesto(context.archivo_repositorio),
+    ))
+    assert os.path.exists(imagen.get_archivo()), "No se generó la imagen"
+    assert imagen.cargar() is None, "Se aceptó una imagen desactualizada"
+    print("Imagen desactualizada rechazada")
+
+
+@then('al reabrir el repositorio con imagen debe contener {cantidad:d} figuras')
+def step_reabrir_con_imagen(context, cantidad):
+    """Reabre el repositorio usando la imagen si está vigente"""
+    repositorio = RepositorioFiguras(context.archivo_repositorio, auto_guardar=False, imagen_reinicio=True)
+    assert repositorio.contar_figuras() == cantidad, \
+        f"Cantidad esperada: {cantidad}, actual: {repositorio.contar_figuras()}"
+    print(f"Repositorio reabierto con imagen y {cantidad} figuras")
+
+
+# =============================================================================
+# STEPS PARA EL RESUMEN DEL REPOSITORIO
+# =============================================================================
+
+@when('elimino la figura almacenada en la posición {posicion:d}')
+def step_eliminar_figura_en_posicion(context, posicion):
+    """Elimina una de las figuras almacenadas en el paso anterior"""
+    id_figura = context.ids_multiples[posicion - 1]
+    assert context.repositorio.eliminar_figura(id_figura), "No se pudo eliminar la figura"
+    print(f"Figura {id_figura} eliminada")
+
+
+@then('el resumen del archivo debe indicar {cantidad:d} figuras de tipo "{tipo}"')
+def step_verificar_resumen_archivo(context, cantidad, tipo):
+    """Verifica el resumen guardado junto al archivo sin cargar las figuras"""
+    resumen = PersistenciaArchivos.leer_resumen(context.archivo_repositorio)
+    assert resumen is not None, "No hay un resumen vigente del archivo"
+    nombre = RegistroFiguras.obtener(tipo).get_nombre().lower()
+    encontradas = resumen.cantidad_por_tipo().get(nombre, 0)
+    assert encontradas == cantidad, f"Figuras esperadas: {cantidad}, en el resumen: {encontradas}"
+    assert resumen.get_id_maximo() == max(context.ids_multiples), "El resumen no conoce el mayor ID"
+    print(f"Resumen verificado: {cantidad} figuras de tipo {tipo}")
+
+
+@then('el resumen del archivo debe estar desactualizado')
+def step_verificar_resumen_desactualizado(context):
+    """Verifica que el resumen se descarta si el archivo cambió sin él"""
+    with open(context.archivo_repositorio, 'a', encoding='utf-8') as f:
+        f.write("\n")
+    assert os.path.exists(PersistenciaArchivos.archivo_resumen(context.archivo_repositorio)), \
+        "No se generó el resumen"
+    assert PersistenciaArchivos.leer_resumen(context.archivo_repositorio) is None, \
+        "Se aceptó un resumen desactualizado"
+    print("Resumen desactualizado rechazado")
+
+
+@then('el resumen del repositorio debe tener la altura de "{tipo}" entre {minimo:f} y {maximo:f}')
+def step_verificar_cotas_resumen(context, tipo, minimo, maximo):
+    """Verifica las cotas de la altura tras eliminar figuras"""
+    resumen = context.repositorio.obtener_resumen()
+    cotas = resumen.get_dimension(RegistroFiguras.obtener(tipo).get_nombre(), 'altura')
+    assert cotas is not None, f"No hay figuras de tipo {tipo} en el resumen"
+    assert abs(cotas['minimo'] - minimo) < 1e-9 and abs(cotas['maximo'] - maximo) < 1e-9, \
+        f"Cotas esperadas: {minimo}-{maximo}, actuales: {cotas['minimo']}-{cotas['maximo']}"
+    print(f"Altura de {tipo} entre {minimo} y {maximo}")
+
+
+# =============================================================================
+# STEPS PARA ESCRITORES CONCURRENTES
+# =============================================================================
+
+def _escritor_concurrente(archivo, cantidad):
+    """Proceso que almacena figuras en un repositorio compartido"""
+    repositorio = RepositorioFiguras(archivo, auto_guardar=True, concurrente=True,
+                                     umbral_compactacion=2048)
+    for i in range(cantidad):
+        repositorio.almacenar_figura(FiguraFactory.crear_figura("circulo", 1.0 + i))
+    repositorio.cerrar()
+
+
+@given('que dos procesos abren el repositorio concurrente "{archivo}"')
+def step_dos_repositorios_concurrentes(context, archivo):
+    """Abre dos instancias del mismo archivo como si fueran procesos distintos"""
+    context.archivo_repositorio = archivo
+    context.repositorio = RepositorioFiguras(archivo, auto_guardar=True, concurrente=True)
+    context.otro_repositorio = RepositorioFiguras(archivo, auto_guardar=True, concurrente=True)
+    print(f"Dos repositorios concurrentes abiertos sobre {archivo}")
+
+
+@when('cada proceso almacena un "{tipo}" con el ID {id_figura:d}')
+def step_almacenar_con_mismo_id(context, tipo, id_figura):
+    """Almacena en cada instancia una figura nueva con el mismo ID"""
+    context.figura = RegistroFiguras.obtener(tipo).crear([1.0], id_figura)
+    context.otra_figura = RegistroFiguras.obtener(tipo).crear([2.0], id_figura)
+    context.repositorio.almacenar_figura(context.figura)
+    context.id_devuelto = context.otro_repositorio.almacenar_figura(context.otra_figura)
+    context.id_original = id_figura
+    print(f"Dos figuras nuevas almacenadas con el ID {id_figura}")
+
+
+@then('la figura del segundo proceso debe haber recibido otro ID')
+def step_verificar_renumeracion(context):
+    """Verifica que la colisión de IDs se resolvió renumerando la segunda figura"""
+    assert context.otra_figura.get_id() != context.figura.get_id(), "No se renumeró la figura"
+    assert context.otro_repositorio.obtener_figura(context.otra_figura.get_id()) is context.otra_figura, \
+        "La figura renumerada no está bajo su nuevo ID"
+    assert context.id_devuelto == context.otra_figura.get_id(), \
+        f"almacenar_figura devolvió {context.id_devuelto} en lugar del ID final {context.otra_figura.get_id()}"
+    assert context.otro_repositorio.obtener_id_final(context.id_original) == context.otra_figura.get_id(), \
+        "obtener_id_final no resuelve la renumeración"
+    print(f"Figura renumerada como {context.otra_figura.get_id()}")
+
+
+@then('si el primer proceso usa el ID {id_figura:d} el lote del segundo debe informar su renumeración')
+def step_verificar_renumeracion_lote(context, id_figura):
+    """Verifica que almacenar_lote informa los IDs finales de las figuras renumeradas"""
+    context.repositorio.almacenar_figura(RegistroFiguras.obtener("cuadrado").crear([1.0], id_figura))
+    figura = RegistroFiguras.obtener("cuadrado").crear([2.0], id_figura)
+    resultado = context.otro_repositorio.almacenar_lote([figura])
+    assert resultado['confirmado'], "El lote no fue confirmado"
+    assert resultado['renumeradas'] == {id_figura: figura.get_id()} and figura.get_id() != id_figura, \
+        f"Renumeración informada: {resultado['renumeradas']}, ID de la figura: {figura.get_id()}"
+    assert resultado['almacenadas'] == [figura.get_id()], f"IDs almacenados: {resultado['almacenadas']}"
+    print(f"El lote informó la figura {id_figura} renumerada como {figura.get_id()}")
+
+
+@then('el primer proceso debe ver ambas figuras al almacenar otra')
+def step_verificar_fusion(context):
+    """Verifica que al escribir se incorporan las figuras del otro proceso"""
+    context.repositorio.almacenar_figura(FiguraFactory.crear_figura("cuadrado", 3.0))
+    assert context.repositorio.obtener_figura(context.otra_figura.get_id()) is not None, \
+        "No se incorporó la figura del otro proceso"
+    assert context.repositorio.contar_figuras() == 3, \
+        f"Cantidad esperada: 3, actual: {context.repositorio.contar_figuras()}"
+    print("Figuras del otro proceso incorporadas")
+
+
+@when('{procesos:d} procesos almacenan {cantidad:d} figuras cada uno en "{archivo}"')
+def step_procesos_concurrentes(context, procesos, cantidad, archivo):
+    """Lanza varios procesos que escriben a la vez el mismo repositorio"""
+    context.archivo_repositorio = archivo
+    contexto = multiprocessing.get_context("fork")
+    escritores = [contexto.Process(target=_escritor_concurrente, args=(archivo, cantidad))
+                  for _ in range(procesos)]
+    for escritor in escritores:
+        escritor.start()
+    for escritor in escritores:
+        escritor.join()
+        assert escritor.exitcode == 0, f"Un proceso terminó con código {escritor.exitcode}"
+    print(f"{procesos} procesos almacenaron {cantidad} figuras cada uno")
+
+
+# =============================================================================
+# STEPS PARA EL REFRESCO EN CALIENTE
+# =============================================================================
+
+@when('un lector abre el mismo repositorio')
+def step_abrir_lector(context):
+    """Abre otra instancia de solo lectura sobre el mismo archivo"""
+    context.lector = RepositorioFiguras(context.archivo_repositorio, auto_guardar=False)
+    context.objetos_lector = {figura.get_id(): figura for figura in context.lector.listar_figuras()}
+    print(f"Lector abierto con {context.lector.contar_figuras()} figuras")
+
+
+@when('un lector que se refresca cada {segundos:f} segundos abre el mismo repositorio')
+def step_abrir_lector_con_refresco(context, segundos):
+    """Abre un lector con diario que se refresca desde un hilo de fondo"""
+    context.lector = RepositorioFiguras(context.archivo_repositorio, auto_guardar=False,
+                                        usar_diario=True, intervalo_refresco=segundos)
+    print(f"Lector con refresco cada {segundos} s abierto")
+
+
+@when('el escritor almacena un "{tipo}" con dimensión {dimension:f}')
+def step_escritor_almacena(context, tipo, dimension):
+    """Almacena una figura nueva desde el repositorio escritor"""
+    context.repositorio.almacenar_figura(FiguraFactory.crear_figura(tipo, dimension))
+    print(f"El escritor almacenó un {tipo}")
+
+
+@then('al refrescar el lector debe incorporar {cambios:d} cambios y contener {cantidad:d} figuras')
+def step_refrescar_lector(context, cambios, cantidad):
+    """Refresca el lector y verifica el delta aplicado"""
+    generacion = context.lector.get_generacion()
+    aplicados = context.lector.refrescar()
+    assert aplicados == cambios, f"Cambios esperados: {cambios}, aplicados: {aplicados}"
+    assert context.lector.contar_figuras() == cantidad, \
+        f"Cantidad esperada: {cantidad}, actual: {context.lector.contar_figuras()}"
+    assert context.lector.get_generacion() == generacion + 1, "No avanzó la generación"
+    assert context.lector.refrescar() == 0, "Un segundo refresco no debería encontrar cambios"
+    print(f"Lector refrescado con {aplicados} cambios")
+
+
+@when('el lector almacena un "{tipo}" con dimensión {dimension:f}')
+def step_lector_almacena(context, tipo, dimension):
+    """Almacena una figura en el lector, que no tiene guardado automático"""
+    context.lector.almacenar_figura(FiguraFactory.crear_figura(tipo, dimension))
+    print(f"El lector almacenó un {tipo} sin guardarlo")
+
+
+@then('al refrescar el lector no debe incorporar cambios y debe contener {cantidad:d} figuras')
+def step_refrescar_lector_sin_guardar(context, cantidad):
+    """Verifica que el refresco no pisa las modificaciones sin guardar del lector"""
+    assert context.lector.refrescar() == 0, "El refresco pisó modificaciones sin guardar"
+    assert context.lector.contar_figuras() == cantidad, \
+        f"Cantidad esperada: {cantidad}, actual: {context.lector.contar_figuras()}"
+    print(f"El lector conservó sus modificaciones y contiene {cantidad} figuras")
+
+
+@then('al cerrar el lector debe informar que quedaron modificaciones sin guardar')
+def step_cerrar_lector_sin_guardar(context):
+    """Verifica que cerrar no informa éxito si sin guardado automático quedó algo por guardar"""
+    assert not context.lector.cerrar(), "cerrar informó que no quedó nada sin guardar"
+    assert context.lector.guardar_figuras(), "No se pudieron guardar las modificaciones"
+    assert context.lector.cerrar(), "cerrar debería informar éxito tras guardar"
+    print("cerrar informó las modificaciones sin guardar")
+
+
+@then('el lector debe conservar los objetos de las figuras que no cambiaron')
+def step_verificar_objetos_conservados(context):
+    """Verifica que el refresco no reconstruye las figuras sin cambios"""
+    conservadas = [id_figura for id_figura, figura in context.objetos_lector.items()
+                   if context.lector.obtener_figura(id_figura) is figura]
+    assert len(conservadas) == context.lector.contar_figuras() - 1, \
+        f"Figuras conservadas: {len(conservadas)} de {context.lector.contar_figuras()}"
+    print(f"{len(conservadas)} figuras conservaron su objeto")
+
+
+@when('{hilos:d} hilos consultan el lector mientras otro proceso almacena {cantidad:d} figuras')
+def step_consultar_lector_desde_hilos(context, hilos, cantidad):
+    """Recorre el lector desde varios hilos mientras su hilo de refresco incorpora otro proceso"""
+    context.errores_lectores = []
+    terminar = threading.Event()
+
+    def consultar():
+        while not terminar.is_set():
+            try:
+                context.lector.listar_figuras()
+                context.lector.obtener_agregados()
+                context.lector.buscar_por_tipo("circulo")
+                context.lector.obtener_percentil("area", 50)
+                context.lector.obtener_resumen()
+            except Exception as e:
+                context.errores_lectores.append(repr(e))
+                return
+
+    lectores = [threading.Thread(target=consultar) for _ in range(hilos)]
+    for lector in lectores:
+        lector.start()
+    escritor = multiprocessing.get_context("fork").Process(
+        target=_escritor_concurrente, args=(context.archivo_repositorio, cantidad))
+    escritor.start()
+    escritor.join()
+    # Que los hilos alcancen también el último refresco
+    time.sleep(0.1)
+    terminar.set()
+    for lector in lectores:
+        lector.join()
+    assert escritor.exitcode == 0, f"El proceso escritor terminó con código {escritor.exitcode}"
+    print(f"{hilos} hilos consultaron el lector mientras se almacenaban {cantidad} figuras")
+
+
+@then('ninguna consulta de los hilos debe haber fallado')
+def step_verificar_consultas_hilos(context):
+    """Verifica que las consultas concurrentes con el refresco no lanzaron excepciones"""
+    assert not context.errores_lectores, f"Consultas fallidas: {context.errores_lectores}"
+    print("Ninguna consulta falló")
+
+
+@then('el lector debe contener {cantidad:d} figuras antes de {segundos:f} segundos')
+def step_esperar_refresco(context, cantidad, segundos):
+    """Espera a que el hilo de refresco incorpore los cambios"""
+    limite = time.monotonic() + segundos
+    while context.lector.contar_figuras() != cantidad and time.monotonic() < limite:
+        time.sleep(0.01)
+    context.lector.cerrar()
+    assert context.lector.contar_figuras() == cantidad, \
+        f"Cantidad esperada: {cantidad}, actual: {context.lector.contar_figuras()}"
+    print(f"El lector incorporó los cambios y contiene {cantidad} figuras")
+
+
+# =============================================================================
+# STEPS PARA LA MEMORIA ACOTADA
+# =============================================================================
+
+@given('que tengo un repositorio con capacidad para {capacidad:d} figuras en "{archivo}"')
+def step_repositorio_acotado(context, capacidad, archivo):
+    """Crea un repositorio que mantiene en memoria solo algunas figuras"""
+    context.archivo_repositorio = archivo
+    context.repositorio = RepositorioFiguras(archivo, auto_guardar=True, capacidad_memoria=capacidad)
+    print(f"Repositorio con capacidad para {capacidad} figuras creado en {archivo}")
+
+
+@when('consulto dos veces la primera figura almacenada')
+def step_consultar_dos_veces(context):
+    """Obtiene dos veces la misma figura del repositorio"""
+    context.figura_consultada = context.repositorio.obtener_figura(context.ids_multiples[0])
+    assert context.figura_consultada is not None, "No se encontró la figura"
+    assert context.repositorio.obtener_figura(context.ids_multiples[0]) is context.figura_consultada, \
+        "La segunda consulta no devolvió la figura residente"
+    print(f"Figura {context.ids_multiples[0]} consultada dos veces")
+
+
+@then('el caché debe registrar {aciertos:d} acierto y {fallos:d} fallo con {residentes:d} figuras residentes')
+def step_verificar_cache(context, aciertos, fallos, residentes):
+    """Verifica los contadores del caché de figuras"""
+    estadisticas = context.repositorio.obtener_estadisticas_cache()
+    assert estadisticas is not None, "El repositorio no tiene memoria acotada"
+    assert (estadisticas['aciertos'], estadisticas['fallos'], estadisticas['residentes']) == \
+        (aciertos, fallos, residentes), f"Estadísticas del caché: {estadisticas}"
+    print(f"Caché verificado: {estadisticas}")
+
+
+@then('el repositorio acotado debe listar {cantidad:d} figuras')
+def step_listar_acotado(context, cantidad):
+    """Verifica que se listan también las figuras paginadas a disco"""
+    ids = sorted(figura.get_id() for figura in context.repositorio.listar_figuras())
+    assert ids == sorted(context.ids_multiples), f"IDs listados: {ids}"
+    assert len(ids) == cantidad, f"Cantidad esperada: {cantidad}, actual: {len(ids)}"
+    print(f"El repositorio acotado lista {cantidad} figuras")
+
+
+@then('no deben quedar páginas del repositorio en disco')
+def step_sin_paginas(context):
+    """Verifica que cerrar el repositorio acotado borró su almacén de páginas"""
+    paginas = glob.glob(f"{context.archivo_repositorio}.paginas*")
+    assert not paginas, f"Quedaron páginas en disco: {paginas}"
+    print("No quedaron páginas del repositorio en disco")
+
+
+# =============================================================================
+# STEPS PARA EL FORMATO DE INTERCAMBIO
+# =============================================================================
+
+@when('exporto el repositorio al formato de intercambio en bloques de {tamano:d} figuras')
+def step_exportar_intercambio(context, tamano):
+    """Exporta el repositorio a un flujo en memoria en formato de intercambio"""
+    context.flujo_intercambio = io.BytesIO()
+    cantidad = PersistenciaArchivos.exportar_intercambio(
+        PersistenciaArchivos.iterar_registros_repositorio(context.archivo_repositorio),
+        context.flujo_intercambio, tamano
+    )
+    print(f"{cantidad} figuras exportadas en bloques de {tamano}")
+
+
+@then('el flujo de intercambio debe empezar con la magia "{magia}" y el primer ID en big-endian')
+def step_verificar_cabecera_intercambio(context, magia):
+    """Verifica la cabecera y el orden de bytes del primer registro"""
+    contenido = context.flujo_intercambio.getvalue()
+    assert contenido[:4] == magia.encode('ascii'), f"Magia encontrada: {contenido[:4]!r}"
+    # Cabecera (8) + cabecera del bloque (12) -> id del primer registro
+    primer_id = int.from_bytes(contenido[20:28], 'big', signed=True)
+    assert primer_id == context.ids_multiples[0], f"Primer ID leído: {primer_id}"
+    print(f"Cabecera de intercambio verificada, primer ID {primer_id}")
+
+
+@then('al importar el flujo de intercambio se obtienen {bloques:d} bloques con las mismas figuras')
+def step_importar_intercambio(context, bloques):
+    """Importa el flujo bloque a bloque y lo compara con el repositorio"""
+    context.flujo_intercambio.seek(0)
+    importados = list(PersistenciaArchivos.importar_intercambio(context.flujo_intercambio))
+    assert len(importados) == bloques, f"Bloques esperados: {bloques}, importados: {len(importados)}"
+    figuras = [PersistenciaArchivos.figura_a_dict(figura) for bloque in importados for figura in bloque]
+    originales = list(PersistenciaArchivos.iterar_registros(context.archivo_repositorio))
+    assert figuras == originales, f"Figuras distintas: {figuras} != {originales}"
+    print(f"{len(figuras)} figuras importadas en {bloques} bloques")
+
+
+@then('un bloque de intercambio dañado debe rechazarse')
+def step_verificar_bloque_danado(context):
+    """Verifica que el CRC detecta un bloque alterado"""
+    contenido = bytearray(context.flujo_intercambio.getvalue())
+    contenido[30] ^= 0xFF
+    try:
+        list(PersistenciaArchivos.importar_intercambio(io.BytesIO(bytes(contenido))))
+    except ValueError as e:
+        print(f"Bloque dañado rechazado: {e}")
+        return
+    assert False, "Se aceptó un bloque dañado"
+
+
+# =============================================================================
+# STEPS PARA LA FUSIÓN DE TRES VÍAS
+# =============================================================================
+
+@given('que la copia "{archivo}" contiene las figuras')
+def step_escribir_copia(context, archivo):
+    """Escribe un archivo de figuras con los IDs indicados en la tabla"""
+    registros = []
+    for row in context.table:
+        valores = [float(valor) for valor in row['dimension'].split(';')]
+        figura = context.factory.crear_figura(row['tipo'], valores[0] if len(valores) == 1 else valores)
+        registros.append(dict(PersistenciaArchivos.figura_a_dict(figura), id=int(row['id'])))
+
+    cantidad = PersistenciaArchivos.guardar_registros(registros, archivo)
+    print(f"Copia {archivo} con {cantidad} figuras")
+
+
+@given('que la copia "{archivo}" contiene las figuras:')
+def step_escribir_copia_tabla(context, archivo):
+    """Escribe un archivo de figuras (versión con dos puntos)"""
+    step_escribir_copia(context, archivo)
+
+
+@when('fusiono "{izquierda}" y "{derecha}" desde "{base}" en "{destino}" prefiriendo la {preferencia}')
+def step_fusionar_copias(context, izquierda, derecha, base, destino, preferencia):
+    """Fusiona dos copias ordenando cada archivo en tramos de dos figuras"""
+    context.informe_fusion = FusionFiguras.fusionar(base, izquierda, derecha, destino,
+                                                    preferencia=preferencia, tamano_tramo=2)
+    context.archivo_fusion = destino
+    print(f"Informe de la fusión: {context.informe_fusion}")
+
+
+@then('la fusión debe informar {agregadas:d} agregadas, {eliminadas:d} eliminadas, '
+      '{modificadas:d} modificadas y {sin_cambios:d} sin cambios')
+def step_verificar_informe_fusion(context, agregadas, eliminadas, modificadas, sin_cambios):
+    """Verifica la clasificación de los IDs"""
+    informe = context.informe_fusion
+    obtenido = (informe['agregadas'], informe['eliminadas'], informe['modificadas'], informe['sin_cambios'])
+    esperado = (agregadas, eliminadas, modificadas, sin_cambios)
+    assert obtenido == esperado, f"Clasificación esperada: {esperado}, obtenida: {obtenido}"
+
+
+@then('la fusión debe informar el conflicto del ID {id_figura:d} resuelto con un "{tipo}" de dimensión {dimension:f}')
+def step_verificar_conflicto_fusion(context, id_figura, tipo, dimension):
+    """Verifica que el conflicto se resolvió con la copia preferida"""
+    assert context.informe_fusion['conflictos'] == [id_figura], \
+        f"Conflictos: {context.informe_fusion['conflictos']}"
+    datos = next(d for d in PersistenciaArchivos.iterar_registros(context.archivo_fusion) if d['id'] == id_figura)
+    tipo_figura = RegistroFiguras.obtener(tipo)
+    assert datos['nombre'] == tipo_figura.get_nombre(), f"Tipo conservado: {datos['nombre']}"
+    assert datos[tipo_figura.get_dimensiones()[0]] == dimension, f"Figura conservada: {datos}"
+
+
+@then('el ID {id_figura:d} agregado por la derecha debe renumerarse por encima de {maximo:d}')
+def step_verificar_renumeracion_fusion(context, id_figura, maximo):
+    """Verifica que la colisión de altas recibió un ID nuevo y se guardó"""
+    renumeradas = context.informe_fusion['renumeradas']
+    assert id_figura in renumeradas, f"Renumeradas: {renumeradas}"
+    assert renumeradas[id_figura] > maximo, f"ID nuevo: {renumeradas[id_figura]}"
+    ids = [d['id'] for d in PersistenciaArchivos.iterar_registros(context.archivo_fusion)]
+    assert len(ids) == len(set(ids)) == context.informe_fusion['total'], f"IDs guardados: {ids}"
+    assert renumeradas[id_figura] in ids and id_figura in ids, f"IDs guardados: {ids}"
+
+
+# =============================================================================
+# STEPS PARA LAS MÉTRICAS PERSISTIDAS
+# =============================================================================
+
+@given('que tengo un repositorio que guarda métricas en "{archivo}"')
+def step_repositorio_con_metricas(context, archivo):
+    """Crea un repositorio que persiste las métricas derivadas de cada figura"""
+    context.archivo_repositorio = archivo
+    context.repositorio = RepositorioFiguras(archivo, auto_guardar=True, guardar_metricas=True)
+    print(f"Repositorio con métricas creado en {archivo}")
+
+
+@when('cambio el lado de la figura almacenada en la posición {posicion:d} a {lado:f}')
+def step_cambiar_lado(context, posicion, lado):
+    """Modifica el lado de una figura ya almacenada y la vuelve a almacenar"""
+    figura = context.repositorio.obtener_figura(context.ids_multiples[posicion - 1])
+    figura.obtener_metricas()
+    figura.set_lado(lado)
+    context.repositorio.almacenar_figura(figura)
+    print(f"Lado de la figura {figura.get_id()} cambiado a {lado}")
+
+
+@then('cada registro del archivo debe tener métricas coherentes con sus dimensiones')
+def step_verificar_metricas_persistidas(context):
+    """Compara las métricas guardadas con las calculadas por las figuras"""
+    registros = list(PersistenciaArchivos.iterar_registros(context.archivo_repositorio))
+    assert registros, "El archivo no tiene registros"
+    for datos in registros:
+        esperadas = PersistenciaArchivos.dict_a_figura(datos).obtener_metricas()
+        assert datos['metricas'] == esperadas, f"Métricas de {datos['id']}: {datos['metricas']} != {esperadas}"
+    print(f"Métricas de {len(registros)} registros verificadas")
+
+
+@then('al filtrar por "{metrica}" entre {minimo:f} y {maximo:f} se obtienen las figuras en las posiciones {posiciones}')
+def step_filtrar_por_metrica(context, metrica, minimo, maximo, posiciones):
+    """Filtra el archivo por métrica sin construir figuras"""
+    esperados = [context.ids_multiples[int(posicion) - 1] for posicion in posiciones.split(',')]
+    with mock.patch.object(PersistenciaArchivos, 'dict_a_figura', side_effect=AssertionError("Se construyó una figura")):
+        ids = [datos['id'] for datos in
+               PersistenciaArchivos.filtrar_por_metrica(context.archivo_repositorio, metrica, minimo, maximo)]
+    assert sorted(ids) == sorted(esperados), f"IDs esperados: {esperados}, obtenidos: {ids}"
+    print(f"Filtro por {metrica} en [{minimo}, {maximo}]: {ids}")
+
+
+# =============================================================================
+# STEPS PARA EL HISTORIAL DE VERSIONES
+# =============================================================================
+
+@given('que tengo un repositorio con historial en "{archivo}"')
+def step_repositorio_con_historial(context, archivo):
+    """Crea un repositorio que registra las versiones de sus figuras"""
+    context.archivo_repositorio = archivo
+    context.repositorio = RepositorioFiguras(archivo, auto_guardar=True, historial=True)
+    print(f"Repositorio con historial creado en {archivo}")
+
+
+@when('anoto el momento actual')
+def step_anotar_momento(context):
+    """Guarda el momento actual, separado de las operaciones siguientes"""
+    time.sleep(0.01)
+    context.momento_anotado = time.time()
+    time.sleep(0.01)
+
+
+@when('le cambio el lado a {lado:f} a la figura almacenada en la posición {posicion:d} sin volver a almacenarla')
+def step_cambiar_lado_en_sitio(context, lado, posicion):
+    """Modifica una figura del repositorio solo con su setter"""
+    context.repositorio.obtener_figura(context.ids_multiples[posicion - 1]).set_lado(lado)
+
+
+@then('la figura almacenada en la posición {posicion:d} debe tener {cantidad:d} versiones')
+def step_verificar_cantidad_versiones(context, posicion, cantidad):
+    """Verifica cuántas versiones registró el historial"""
+    versiones = context.repositorio.obtener_versiones(context.ids_multiples[posicion - 1])
+    assert len(versiones) == cantidad, f"Versiones esperadas: {cantidad}, registradas: {versiones}"
+
+
+@then('la versión {version:d} de la figura en la posición {posicion:d} debe tener lado {lado:f}')
+def step_verificar_version(context, version, posicion, lado):
+    """Reconstruye una versión anterior de una figura"""
+    figura = context.repositorio.obtener_figura(context.ids_multiples[posicion - 1], version=version)
+    assert figura is not None, f"No se reconstruyó la versión {version}"
+    assert figura.get_lado() == lado, f"Lado esperado: {lado}, reconstruido: {figura.get_lado()}"
+
+
+@then('en el momento anotado el repositorio tenía {cantidad:d} figuras con la primera de lado {lado:f}')
+def step_verificar_momento(context, cantidad, lado):
+    """Lee el repositorio tal como estaba en el momento anotado"""
+    figuras = context.repositorio.obtener_figuras_en(context.momento_anotado)
+    assert len(figuras) == cantidad, f"Figuras esperadas: {cantidad}, obtenidas: {figuras}"
+    primera = next(figura for figura in figuras if figura.get_id() == context.ids_multiples[0])
+    assert primera.get_lado() == lado, f"Lado en el momento anotado: {primera.get_lado()}"
+
+
+@then('otro repositorio abierto sobre el mismo archivo debe ver la figura en la posición {posicion:d} con lado {lado:f}')
+def step_verificar_lado_persistido(context, posicion, lado):
+    """Verifica que un cambio hecho con un setter ya se persistió, sin cerrar el repositorio"""
+    otro = RepositorioFiguras(context.archivo_repositorio, auto_guardar=False)
+    figura = otro.obtener_figura(context.ids_multiples[posicion - 1])
+    assert figura is not None, "No se encontró la figura"
+    assert abs(figura.get_lado() - lado) < 1e-9, f"Lado persistido: {figura.get_lado()}, esperado: {lado}"
+    print(f"La figura {figura.get_id()} se persistió con lado {lado}")
+
+
+@then('al reabrir el repositorio la figura en la posición {posicion:d} figura eliminada en su última versión')
+def step_verificar_historial_reabierto(context, posicion):
+    """Verifica que el historial persiste, con deltas entre fotogramas clave"""
+    context.repositorio.cerrar()
+    reabierto = RepositorioFiguras(context.archivo_repositorio, auto_guardar=True, historial=True)
+    versiones = reabierto.obtener_versiones(context.ids_multiples[posicion - 1])
+    assert versiones and versiones[-1]['eliminada'], f"Versiones tras reabrir: {versiones}"
+    assert reabierto.obtener_figura(context.ids_multiples[0], version=2).get_lado() == 3.0
+    with open(context.archivo_repositorio + ".historial", encoding='utf-8') as f:
+        assert '"delta"' in f.read(), "El historial no guardó deltas"
+    reabierto.cerrar()
+
+
+# =============================================================================
+# STEPS PARA EL ÍNDICE POR TIPO
+# =============================================================================
+
+@when('renombro la figura almacenada en la posición {posicion:d} como "{nombre}"')
+def step_renombrar_figura(context, posicion, nombre):
+    """Cambia el nombre de una figura del repositorio con su setter"""
+    context.repositorio.obtener_figura(context.ids_multiples[posicion - 1]).set_nombre(nombre)
+
+
+@when('limpio el repositorio')
+def step_limpiar_repositorio(context):
+    """Elimina todas las figuras del repositorio"""
+    context.repositorio.limpiar_repositorio()
+
+
+@then('debe haber {cantidad:d} figuras de tipo "{tipo}" y {cantidad_categoria:d} de categoría "{categoria}"')
+def step_verificar_conteos_indice(context, cantidad, tipo, cantidad_categoria, categoria):
+    """Verifica los conteos del índice y que coinciden con las búsquedas"""
+    repositorio = context.repositorio
+    assert repositorio.contar_por_tipo(tipo) == cantidad, \
+        f"Figuras de tipo {tipo}: {repositorio.contar_por_tipo(tipo)}"
+    assert repositorio.contar_por_categoria(categoria) == cantidad_categoria, \
+        f"Figuras de categoría {categoria}: {repositorio.contar_por_categoria(categoria)}"
+
+    figuras = repositorio.buscar_por_tipo(tipo)
+    assert len(figuras) == cantidad and all(f.get_nombre().lower() == tipo.lower() for f in figuras), \
+        f"Búsqueda por tipo {tipo}: {figuras}"
+    figuras = repositorio.buscar_por_categoria(categoria)
+    assert len(figuras) == cantidad_categoria and all(f.get_tipo() == categoria.upper() for f in figuras), \
+        f"Búsqueda por categoría {categoria}: {figuras}"
+
+
+# =============================================================================
+# STEPS PARA LOS CONTADORES DE ESTADÍSTICAS
+# =============================================================================
+
+@then('las estadísticas deben sumar {valor:f} de "{metrica}" para "{tipo}" sin recalcular figuras')
+def step_verificar_suma_metrica(context, valor, metrica, tipo):
+    """Verifica una suma de métricas de las estadísticas sin calcular métricas de figuras"""
+    with mock.patch.object(Figura, 'obtener_metricas', side_effect=AssertionError("Se recalcularon métricas")):
+        estadisticas = context.repositorio.obtener_estadisticas()
+    suma = estadisticas['metricas'][tipo].get(metrica, 0.0)
+    assert abs(suma - valor) < 1e-9, f"Suma de {metrica} de {tipo}: {suma}, esperada: {valor}"
+    print(f"Suma de {metrica} de {tipo}: {suma}")
+
+
+# =============================================================================
+# STEPS PARA LOS ÍNDICES POR MÉTRICA
+# =============================================================================
+
+def _posiciones_de(context, figuras):
+    """Posiciones (desde 1) en la tabla de creación de las figuras devueltas"""
+    return [context.ids_multiples.index(figura.get_id()) + 1 for figura in figuras]
+
+
+@then('la búsqueda por "{metrica}" entre {minimo:f} y {maximo:f} {simbolo} debe devolver las posiciones {posiciones}')
+def step_verificar_busqueda_metrica(context, metrica, minimo, maximo, simbolo, posiciones):
+    """Verifica una búsqueda por rango con cotas en cualquier unidad"""
+    figuras = context.repositorio.buscar_por_metrica(metrica, minimo, maximo, UnidadMedida(simbolo))
+    obtenidas = _posiciones_de(context, figuras)
+    esperadas = [int(posicion) for posicion in posiciones.split(',')]
+    assert obtenidas == esperadas, f"Posiciones esperadas: {esperadas}, obtenidas: {obtenidas}"
+
+
+@then('la búsqueda de "{tipo}" con "{metrica}" desde {minimo:f} debe devolver las posiciones {posiciones}')
+def step_verificar_busqueda_metrica_tipo(context, tipo, metrica, minimo, posiciones):
+    """Verifica una búsqueda por métrica restringida a un tipo y sin cota superior"""
+    figuras = context.repositorio.buscar_por_metrica(metrica, minimo, tipo=tipo)
+    obtenidas = _posiciones_de(context, figuras)
+    esperadas = [int(posicion) for posicion in posiciones.split(',')]
+    assert obtenidas == esperadas, f"Posiciones esperadas: {esperadas}, obtenidas: {obtenidas}"
+
+
+@then('las {cantidad:d} figuras de {orden} "{metrica}" deben ser las posiciones {posiciones}')
+def step_verificar_extremos(context, cantidad, orden, metrica, posiciones):
+    """Verifica las figuras de mayor o menor métrica, en orden"""
+    figuras = context.repositorio.obtener_extremos(metrica, cantidad, mayores=orden == "mayor")
+    obtenidas = _posiciones_de(context, figuras)
+    esperadas = [int(posicion) for posicion in posiciones.split(',')]
+    assert obtenidas == esperadas, f"Posiciones esperadas: {esperadas}, obtenidas: {obtenidas}"
+
+
+@then('entre las figuras "{filtro}" las {cantidad:d} de {orden} "{metrica}" deben ser las posiciones {posiciones}')
+def step_verificar_extremos_filtrados(context, cantidad, orden, metrica, filtro, posiciones):
+    """Verifica los extremos de una métrica filtrando por categoría (2D/3D) o por tipo"""
+    if filtro.upper() in ("2D", "3D"):
+        filtros = {'categoria': filtro}
+    else:
+        filtros = {'tipo': filtro}
+    figuras = context.repositorio.obtener_extremos(metrica, cantidad, mayores=orden == "mayor", **filtros)
+    obtenidas = _posiciones_de(context, figuras)
+    esperadas = [int(posicion) for posicion in posiciones.split(',')] if posiciones != "ninguna" else []
+    assert obtenidas == esperadas, f"Posiciones esperadas: {esperadas}, obtenidas: {obtenidas}"
+
+
+# =============================================================================
+# STEPS PARA LA AGREGACIÓN DE MÉTRICAS
+# =============================================================================
+
+@then('la agregación de "{metrica}" para "{grupo}" debe dar {cantidad:d} valores, suma {suma:f}, '
+      'media {media:f}, mínimo {minimo:f}, máximo {maximo:f} y varianza {varianza:f}')
+def step_verificar_agregacion(context, metrica, grupo, cantidad, suma, media, minimo, maximo, varianza):
+    """Verifica la agregación de una métrica para un tipo o una categoría (2D/3D)"""
+    agregados = context.repositorio.obtener_agregados()
+    if grupo.upper() in ("2D", "3D"):
+        valores = agregados['por_categoria'][grupo.upper()][metrica]
+    else:
+        valores = agregados['por_tipo'][grupo.lower()][metrica]
+
+    assert valores['cantidad'] == cantidad, f"Cantidad esperada: {cantidad}, obtenida: {valores['cantidad']}"
+    esperados = {'suma': suma, 'media': media, 'minimo': minimo, 'maximo': maximo, 'varianza': varianza}
+    for clave, esperado in esperados.items():
+        assert math.isclose(valores[clave], esperado, abs_tol=1e-3), \
+            f"{clave} esperado: {esperado}, obtenido: {valores[clave]}"
+
+
+@then('los agregados formateados deben incluir "{texto}"')
+def step_verificar_agregados_formateados(context, texto):
+    """Verifica una línea de los agregados tal como se muestran al usuario"""
+    formateados = FormateadorSalida.formatear_agregados(context.repositorio.obtener_agregados(),
+                                                        UnidadMedida.METROS)
+    assert texto in formateados, f"No se encontró '{texto}' en:\n{formateados}"
+    print(f"Los agregados formateados incluyen '{texto}'")
+
+
+@then('la agregación leída del archivo debe coincidir con la del repositorio')
+def step_verificar_agregacion_archivo(context):
+    """Verifica que agregar el archivo en streaming da lo mismo que agregar las figuras"""
+    del_archivo = AgregadorMetricas.desde_archivo(context.archivo_repositorio)
+    del_repositorio = context.repositorio.obtener_agregados()
+    assert del_archivo.keys() == del_repositorio.keys()
+    for clave, grupos in del_repositorio.items():
+        assert grupos.keys() == del_archivo[clave].keys(), f"Grupos distintos en {clave}"
+        for grupo, metricas in grupos.items():
+            for metrica, valores in metricas.items():
+                for estadistico, valor in valores.items():
+                    leido = del_archivo[clave][grupo][metrica][estadistico]
+                    assert math.isclose(leido, valor, rel_tol=1e-12, abs_tol=1e-12), \
+                        f"{grupo}/{metrica}/{estadistico}: {leido} != {valor}"
+
+
+# =============================================================================
+# STEPS PARA LOS SKETCHES DE CUANTILES
+# =============================================================================
+
+def _verificar_percentil(repositorio, percentil, metrica, valor, tipo=None):
+    """Compara un percentil estimado con el esperado"""
+    obtenido = repositorio.obtener_percentil(metrica, percentil, tipo)
+    assert obtenido is not None and math.isclose(obtenido, valor, rel_tol=1e-9), \
+        f"Percentil {percentil} de {metrica} esperado: {valor}, obtenido: {obtenido}"
+
+
+@then('el percentil {percentil:d} de "{metrica}" debe ser {valor:f}')
+def step_verificar_percentil(context, percentil, metrica, valor):
+    """Verifica un percentil de una métrica sobre todas las figuras"""
+    _verificar_percentil(context.repositorio, percentil, metrica, valor)
+
+
+@then('entre las figuras "{tipo}" el percentil {percentil:d} de "{metrica}" debe ser {valor:f}')
+def step_verificar_percentil_tipo(context, percentil, metrica, tipo, valor):
+    """Verifica un percentil de una métrica sobre las figuras de un tipo"""
+    _verificar_percentil(context.repositorio, percentil, metrica, valor, tipo)
+
+
+@then('el percentil {percentil:d} de "{metrica}" debe ser {valor:f} sin recalcular las métricas de los cubos')
+def step_verificar_percentil_sin_cubos(context, percentil, metrica, valor):
+    """Verifica que una baja solo rehace las distribuciones del tipo afectado"""
+    with mock.patch.object(Cubo, 'obtener_metricas', side_effect=AssertionError("Se rehicieron los cubos")):
+        _verificar_percentil(context.repositorio, percentil, metrica, valor)
+
+
+@then('el histograma de "{metrica}" en {intervalos:d} intervalos debe contar {cantidades}')
+def step_verificar_histograma(context, metrica, intervalos, cantidades):
+    """Verifica las cantidades estimadas de cada intervalo del histograma"""
+    histograma = context.repositorio.obtener_histograma(metrica, intervalos)
+    obtenidas = [cantidad for _, _, cantidad in histograma]
+    esperadas = [int(cantidad) for cantidad in cantidades.split(',')]
+    assert obtenidas == esperadas, f"Cantidades esperadas: {esperadas}, obtenidas: {obtenidas}"
+
+
+@then('al reabrir el repositorio el percentil {percentil:d} de "{metrica}" debe ser {valor:f} '
+      'sin reconstruir las distribuciones')
+def step_verificar_percentil_reabierto(context, percentil, metrica, valor):
+    """Verifica que al reabrir los sketches se leen del archivo de distribuciones"""
+    repositorio = RepositorioFiguras(context.archivo_repositorio, auto_guardar=False)
+    with mock.patch.object(DistribucionesMetricas, 'agregar', side_effect=AssertionError("Se reconstruyeron")):
+        _verificar_percentil(repositorio, percentil, metrica, valor)
+
+
+@then('combinando las distribuciones con las de "{archivo}" el percentil {percentil:d} de "{metrica}" '
+      'debe ser {valor:f}')
+def step_verificar_percentil_combinado(context, archivo, percentil, metrica, valor):
+    """Verifica un percentil de la distribución global de dos repositorios"""
+    distribuciones = context.repositorio.obtener_distribuciones()
+    distribuciones.combinar(PersistenciaArchivos.obtener_distribuciones(archivo))
+    obtenido = distribuciones.percentil(metrica, percentil)
+    assert math.isclose(obtenido, valor, rel_tol=1e-9), f"Percentil esperado: {valor}, obtenido: {obtenido}"
+
+
 # =============================================================================
 # STEPS COMBINADOS (WHEN + THEN)
 # =============================================================================